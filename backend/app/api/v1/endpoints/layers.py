@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
 from datetime import datetime
@@ -7,6 +8,8 @@ from app.schemas.map_layers import (
     AllLayersResponse,
 )
 from app.services.map_service import MapService
+from app.data.polygon_loader import get_polygon_loader
+from app.services.calm_route_service import get_calm_route_service
 
 router = APIRouter()
 map_service = MapService()
@@ -57,3 +60,22 @@ async def get_all_layers(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка получения данных: {str(e)}")
+
+
+@router.post("/{layer_type}/reload")
+async def reload_layer(layer_type: LayerType):
+    try:
+        polygon_loader = get_polygon_loader()
+        version = await asyncio.to_thread(polygon_loader.reload_layer, layer_type.value)
+        get_calm_route_service().refresh_obstacle_tiles()
+        
+        return {
+            "layer": layer_type.value,
+            "version": version,
+            "polygons": len(polygon_loader.polygons_by_layer[layer_type.value])
+        }
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка перезагрузки слоя: {str(e)}")
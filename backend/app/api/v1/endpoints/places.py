@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Response, status
 from typing import Optional
 
 from app.schemas.places import (
@@ -6,9 +6,12 @@ from app.schemas.places import (
     PlaceSearchResponse,
     AccessibilityFilter,
     PlaceLocation,
-    AddReviewRequest
+    AddReviewRequest,
+    ReviewsPage
 )
+from app.core.config import settings
 from app.services.places_service import PlacesService
+from app.data.async_places_storage import get_async_places_storage
 
 router = APIRouter()
 places_service = PlacesService()
@@ -44,8 +47,8 @@ async def search_places(
             filters=filter_list
         )
         
-        result = await places_service.search_places(request)
-        return result
+        payload = await places_service.search_places_json(request)
+        return Response(content=payload, media_type="application/json")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -66,3 +69,30 @@ async def add_review(request: AddReviewRequest):
             status_code=500, 
             detail=f"Ошибка при добавлении отзыва: {str(e)}"
         )
+
+
+@router.get("/{place_id}/reviews", response_model=ReviewsPage)
+async def get_place_reviews(
+    place_id: str,
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+    limit: int = Query(settings.PLACES_REVIEWS_PAGE_SIZE, ge=1, le=100, description="Отзывов на странице")
+):
+    """Отзывы о месте постранично, от новых к старым"""
+    try:
+        return await places_service.get_reviews_page(place_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка получения отзывов: {str(e)}")
+
+
+@router.get("/storage/stats")
+async def get_storage_stats():
+    """Сколько блокирующего I/O хранилища выполнено вне event loop, и статистика кэшей"""
+    stats = get_async_places_storage().get_stats()
+    stats["search_cache"] = {
+        "entries": len(places_service.search_cache),
+        "hits": places_service.search_cache.hits,
+        "misses": places_service.search_cache.misses
+    }
+    return stats
@@ -1,11 +1,16 @@
 from fastapi import APIRouter, HTTPException
-from app.schemas.routing import CalmRouteRequest, CalmRouteResponse
+from app.schemas.routing import (
+    CalmRouteRequest, CalmRouteResponse, RouteMatrixRequest, RouteMatrixResponse,
+    IsochroneRequest, IsochroneResponse
+)
 from app.services.routing_service import RoutingService
 from app.services.calm_route_service import get_calm_route_service
+from app.services.isochrone_service import get_isochrone_service
 
 router = APIRouter()
 routing_service = RoutingService()
 calm_route_service = get_calm_route_service()
+isochrone_service = get_isochrone_service()
 
 
 @router.post("/calm", response_model=CalmRouteResponse)
@@ -18,3 +23,26 @@ async def calculate_calm_route(request: CalmRouteRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка построения маршрута: {str(e)}")
 
+
+
+
+@router.post("/matrix", response_model=RouteMatrixResponse)
+async def calculate_route_matrix(request: RouteMatrixRequest):
+    try:
+        return await calm_route_service.build_route_matrix(request)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка построения матрицы: {str(e)}")
+
+
+@router.post("/isochrone", response_model=IsochroneResponse)
+async def calculate_isochrone(request: IsochroneRequest):
+    try:
+        return await isochrone_service.build_isochrones(request)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка построения изохрон: {str(e)}")
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -11,6 +11,26 @@ class Settings(BaseSettings):
     DGIS_ROUTING_URL: str = "https://routing.api.2gis.com/routing/7.0.0/global"
     
     DATABASE_URL: str = "sqlite:///./dostup_city.db"
+    PLACES_STORAGE_BACKEND: str = "sqlite"
+    PLACES_DATA_DIR: str = "app/data/places"
+    PLACES_READ_CACHE_SIZE: int = 10000
+    PLACES_STORAGE_WORKERS: int = 4
+    PLACES_CACHE_CHECK_INTERVAL_MS: float = 100.0
+    PLACES_WRITE_BEHIND: bool = True
+    PLACES_JOURNAL_FILE: str = "app/data/places/journal.jsonl"
+    PLACES_FLUSH_BATCH_SIZE: int = 500
+    PLACES_FLUSH_INTERVAL_SEC: float = 2.0
+    PLACES_JOURNAL_FSYNC: bool = False
+    PLACES_RATING_HALF_LIFE_DAYS: float = 0.0
+    PLACES_INDEX_CELL_DEG: float = 0.01
+    PLACES_INDEX_REFRESH_SEC: float = 30.0
+    PLACES_LOCAL_MIN_RESULTS: int = 5
+    PLACES_UPSTREAM_REFRESH_TTL_SEC: float = 600.0
+    PLACES_SEARCH_CACHE_SIZE: int = 1000
+    PLACES_SEARCH_CACHE_TTL_SEC: float = 60.0
+    PLACES_SEARCH_CACHE_TILE_DEG: float = 0.005
+    PLACES_TOP_REVIEWS: int = 3
+    PLACES_REVIEWS_PAGE_SIZE: int = 20
     
     CORS_ORIGINS: List[str] = ["*"]
     
@@ -24,6 +44,47 @@ class Settings(BaseSettings):
     NOISE_THRESHOLD_DB: int = 75
     CROWD_THRESHOLD: int = 4
     
+    EXCLUDE_MAX_POLYGONS: int = 20
+    EXCLUDE_VERTEX_BUDGET: int = 400
+    EXCLUDE_CORRIDOR_M: float = 30.0
+    
+    CALM_ROUTE_MAX_ATTEMPTS: int = 3
+    CALM_ROUTE_TIME_BUDGET_MS: int = 4000
+    CALM_ROUTE_MAX_UPSTREAM_CALLS: int = 5
+    
+    EXPOSURE_SAMPLE_SPACING_M: float = 10.0
+    EXPOSURE_DEFAULT_NOISE_DB: float = 55.0
+    EXPOSURE_DEFAULT_CROWD: float = 1.0
+    
+    COST_GRID_ENABLED: bool = True
+    COST_GRID_RESOLUTION_M: float = 10.0
+    COST_GRID_AGGREGATE: str = "max"
+    COST_GRID_MAX_CELLS: int = 40_000_000
+    
+    LOCAL_ROUTING_ENABLED: bool = False
+    LOCAL_GRAPH_FILE: str = "app/data/graph/pedestrian.osm"
+    LOCAL_ROUTING_AVOID_PENALTY: float = 4.0
+    LOCAL_ROUTING_SPEED_M_PER_MIN: float = 80.0
+    LOCAL_ROUTING_LANDMARKS: int = 16
+    LOCAL_ROUTING_ACTIVE_LANDMARKS: int = 4
+    LOCAL_ROUTING_COST_CACHE_SIZE: int = 8
+    
+    ROUTE_MATRIX_MAX_CONCURRENCY: int = 4
+    ROUTE_MATRIX_CACHE_SIZE: int = 10000
+    ROUTE_MATRIX_SNAP_DECIMALS: int = 4
+    
+    ROUTE_CACHE_SIZE: int = 2000
+    ROUTE_CACHE_SNAP_DECIMALS: int = 4
+    ROUTE_CACHE_CROWD_BUCKET_MIN: int = 60
+    
+    OBSTACLE_TILE_SIZE_DEG: float = 0.01
+    OBSTACLE_TILE_PROFILES: List[Dict] = [{}]
+    
+    ISOCHRONE_MAX_BUDGET_MIN: int = 30
+    ISOCHRONE_BUFFER_M: float = 40.0
+    ISOCHRONE_GRID_CELL_M: float = 25.0
+    ISOCHRONE_GRID_DETOUR: float = 1.3
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.data.places_storage import get_places_storage
+
+
+class AsyncPlacesStorage:
+    """Асинхронный фасад хранилища мест.
+
+    Все вызовы хранилища (файлы, SQLite) выполняются в выделенном пуле
+    потоков, а не в event loop. Время каждого вызова копится в stats —
+    столько event loop простаивал бы при синхронном вызове.
+    """
+
+    def __init__(self, storage, max_workers: int = 1):
+        self.storage = storage
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="places-storage")
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    async def get_place_accessibility(self, place_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run("get_place_accessibility", self.storage.get_place_accessibility, place_id)
+
+    async def save_place_accessibility(self, place_id: str, accessibility_data: Dict[str, Any]) -> bool:
+        return await self._run("save_place_accessibility", self.storage.save_place_accessibility, place_id, accessibility_data)
+
+    async def update_place_accessibility(
+        self,
+        place_id: str,
+        update: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]
+    ) -> bool:
+        return await self._run("update_place_accessibility", self.storage.update_place_accessibility, place_id, update)
+
+    async def get_place_reviews(self, place_id: str) -> List[Dict[str, Any]]:
+        return await self._run("get_place_reviews", self.storage.get_place_reviews, place_id)
+
+    async def add_place_review(self, place_id: str, review: Dict[str, Any]) -> bool:
+        return await self._run("add_place_review", self.storage.add_place_review, place_id, review)
+
+    async def get_places_accessibility(self, place_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return await self._run("get_places_accessibility", self.storage.get_places_accessibility, place_ids)
+
+    async def get_places_review_summaries(self, place_ids: List[str], top_n: int) -> Dict[str, Dict[str, Any]]:
+        return await self._run("get_places_review_summaries", self.storage.get_places_review_summaries, place_ids, top_n)
+
+    async def get_place_reviews_page(
+        self,
+        place_id: str,
+        before: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        return await self._run("get_place_reviews_page", self.storage.get_place_reviews_page, place_id, before, limit)
+
+    async def save_places_data(
+        self,
+        accessibility: Dict[str, Dict[str, Any]],
+        reviews: Dict[str, List[Dict[str, Any]]]
+    ) -> bool:
+        return await self._run("save_places_data", self.storage.save_places_data, accessibility, reviews)
+
+    async def has_place_data(self, place_id: str) -> bool:
+        return await self._run("has_place_data", self.storage.has_place_data, place_id)
+
+    async def save_places(self, places: List[Dict[str, Any]]) -> bool:
+        return await self._run("save_places", self.storage.save_places, places)
+
+    async def get_place(self, place_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run("get_place", self.storage.get_place, place_id)
+
+    async def get_places_seen_after(self, seen_after: str) -> List[Dict[str, Any]]:
+        return await self._run("get_places_seen_after", self.storage.get_places_seen_after, seen_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Сколько вызовов и миллисекунд блокирующего I/O ушло из event loop"""
+        with self._stats_lock:
+            operations = {name: dict(values) for name, values in self._stats.items()}
+        stats = {
+            "offloaded_ms": round(sum(values["total_ms"] for values in operations.values()), 2),
+            "operations": operations
+        }
+
+        backend = getattr(self.storage, "backend", self.storage)
+        if hasattr(backend, "get_cache_stats"):
+            stats["read_cache"] = backend.get_cache_stats()
+        return stats
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    async def _run(self, name: str, func: Callable, *args) -> Any:
+        def timed_call():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self._record(name, (time.perf_counter() - started) * 1000)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, timed_call)
+
+    def _record(self, name: str, elapsed_ms: float) -> None:
+        with self._stats_lock:
+            stats = self._stats.setdefault(name, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["calls"] += 1
+            stats["total_ms"] = round(stats["total_ms"] + elapsed_ms, 3)
+            stats["max_ms"] = round(max(stats["max_ms"], elapsed_ms), 3)
+
+
+_async_storage = None
+
+def get_async_places_storage() -> AsyncPlacesStorage:
+    global _async_storage
+    if _async_storage is None:
+        _async_storage = AsyncPlacesStorage(get_places_storage(), max_workers=settings.PLACES_STORAGE_WORKERS)
+    return _async_storage
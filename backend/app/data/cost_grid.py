@@ -0,0 +1,101 @@
+import math
+from typing import List, Tuple
+
+import numpy as np
+import shapely
+
+
+class CostGrid:
+
+    def __init__(
+        self,
+        bounds: Tuple[float, float, float, float],
+        resolution_m: float,
+        aggregate: str = "max"
+    ):
+        if aggregate not in ("max", "mean"):
+            raise ValueError(f"Неизвестная агрегация: {aggregate}")
+
+        self.lon_min, self.lat_min, self.lon_max, self.lat_max = bounds
+        self.resolution_m = resolution_m
+        self.aggregate = aggregate
+
+        lat_mid = math.radians((self.lat_min + self.lat_max) / 2)
+        self.cell_lat = resolution_m / 111000.0
+        self.cell_lon = resolution_m / (111000.0 * math.cos(lat_mid))
+
+        self.rows = max(1, math.ceil((self.lat_max - self.lat_min) / self.cell_lat))
+        self.cols = max(1, math.ceil((self.lon_max - self.lon_min) / self.cell_lon))
+
+        self.values = np.full((self.rows, self.cols), np.nan, dtype=np.float32)
+
+    @staticmethod
+    def cell_count(bounds: Tuple[float, float, float, float], resolution_m: float) -> int:
+        lon_min, lat_min, lon_max, lat_max = bounds
+        lat_mid = math.radians((lat_min + lat_max) / 2)
+        rows = math.ceil((lat_max - lat_min) * 111000.0 / resolution_m)
+        cols = math.ceil((lon_max - lon_min) * 111000.0 * math.cos(lat_mid) / resolution_m)
+        return max(1, rows) * max(1, cols)
+
+    def rasterize(self, shapes: List[shapely.Geometry], values: np.ndarray) -> None:
+        """Записать значения полигонов в ячейки, центры которых попали внутрь"""
+        if self.aggregate == "mean":
+            sums = np.zeros((self.rows, self.cols), dtype=np.float64)
+            counts = np.zeros((self.rows, self.cols), dtype=np.int32)
+
+        for shape, value in zip(shapes, values):
+            if shape is None or shape.is_empty:
+                continue
+
+            lon_min, lat_min, lon_max, lat_max = shape.bounds
+            row_min, col_min = self._cell_of(lon_min, lat_min)
+            row_max, col_max = self._cell_of(lon_max, lat_max)
+            row_min, row_max = max(row_min, 0), min(row_max, self.rows - 1)
+            col_min, col_max = max(col_min, 0), min(col_max, self.cols - 1)
+            if row_min > row_max or col_min > col_max:
+                continue
+
+            rows = np.arange(row_min, row_max + 1)
+            cols = np.arange(col_min, col_max + 1)
+            grid_rows, grid_cols = np.meshgrid(rows, cols, indexing="ij")
+            center_lats = self.lat_min + (grid_rows + 0.5) * self.cell_lat
+            center_lons = self.lon_min + (grid_cols + 0.5) * self.cell_lon
+
+            mask = shapely.contains_xy(shape, center_lons, center_lats)
+            if mask.any():
+                target_rows, target_cols = grid_rows[mask], grid_cols[mask]
+            else:
+                point = shape.representative_point()
+                row, col = self._cell_of(point.x, point.y)
+                if not (0 <= row < self.rows and 0 <= col < self.cols):
+                    continue
+                target_rows, target_cols = np.array([row]), np.array([col])
+
+            if self.aggregate == "mean":
+                sums[target_rows, target_cols] += value
+                counts[target_rows, target_cols] += 1
+            else:
+                self.values[target_rows, target_cols] = np.fmax(self.values[target_rows, target_cols], value)
+
+        if self.aggregate == "mean":
+            filled = counts > 0
+            self.values[filled] = sums[filled] / counts[filled]
+
+    def lookup(self, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+        """Значения ячеек для массива точек (NaN — вне сетки или пустая ячейка)"""
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+
+        rows = np.floor((lats - self.lat_min) / self.cell_lat).astype(np.int64)
+        cols = np.floor((lons - self.lon_min) / self.cell_lon).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+
+        result = np.full(len(lons), np.nan)
+        result[inside] = self.values[rows[inside], cols[inside]]
+        return result
+
+    def _cell_of(self, lon: float, lat: float) -> Tuple[int, int]:
+        return (
+            int(math.floor((lat - self.lat_min) / self.cell_lat)),
+            int(math.floor((lon - self.lon_min) / self.cell_lon))
+        )
@@ -0,0 +1,81 @@
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.data.pedestrian_graph import PedestrianGraph
+
+
+class GraphLandmarks:
+    """Ориентиры ALT: расстояния (по длине рёбер) от K узлов до всех узлов графа.
+
+    Стоимость ребра в любом профиле не меньше его длины, поэтому нижние
+    оценки остаются допустимыми при любых весах RoutePriorities — при смене
+    весов пересчитываются только стоимости рёбер, а не ориентиры.
+    """
+
+    def __init__(self, landmarks: np.ndarray, distances: np.ndarray):
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph: PedestrianGraph, count: int = 16, seed: int = 0) -> "GraphLandmarks":
+        """Выбрать ориентиры методом дальней точки и посчитать расстояния"""
+        rng = np.random.default_rng(seed)
+        start = int(rng.integers(graph.node_count))
+
+        reach = graph.dijkstra(start)
+        landmarks = []
+        distances = []
+        min_distance = np.where(np.isfinite(reach), reach, -1.0)
+
+        for i in range(count):
+            landmark = int(np.argmax(min_distance))
+            landmark_distances = graph.dijkstra(landmark)
+            landmarks.append(landmark)
+            distances.append(landmark_distances.astype(np.float32))
+
+            finite = np.isfinite(landmark_distances)
+            min_distance = np.where(finite, np.minimum(min_distance, landmark_distances), min_distance)
+            min_distance[landmarks] = -1.0
+            print(f"📍 [LANDMARKS] {i + 1}/{count}: узел {landmark}")
+
+        return cls(np.array(landmarks, dtype=np.int64), np.vstack(distances))
+
+    def lower_bounds(self, target: int, active: np.ndarray) -> np.ndarray:
+        """Нижние оценки расстояния от каждого узла до target по активным ориентирам"""
+        distances = self.distances[active]
+        to_target = distances[:, target][:, None]
+        known = np.isfinite(distances) & np.isfinite(to_target)
+        bounds = np.where(known, np.abs(to_target - distances), 0.0)
+        return bounds.max(axis=0)
+
+    def select_active(self, source: int, target: int, count: int) -> np.ndarray:
+        """Ориентиры с лучшей оценкой для пары source-target"""
+        pair = self.distances[:, [source, target]]
+        known = np.isfinite(pair).all(axis=1)
+        estimates = np.where(known, np.abs(pair[:, 1] - pair[:, 0]), -1.0)
+        return np.argsort(estimates)[::-1][:count]
+
+    def save(self, file_path: Path) -> None:
+        np.savez_compressed(file_path, landmarks=self.landmarks, distances=self.distances)
+
+    @classmethod
+    def load(cls, file_path: Path, graph: PedestrianGraph) -> Optional["GraphLandmarks"]:
+        if not file_path.exists():
+            print(f"⚠️ [LANDMARKS] Файл не найден: {file_path}, A* без ориентиров")
+            return None
+
+        with np.load(file_path) as data:
+            landmarks = cls(data["landmarks"], data["distances"])
+
+        if landmarks.distances.shape[1] != graph.node_count:
+            print(f"⚠️ [LANDMARKS] {file_path} построен для другого графа, пересоберите ориентиры")
+            return None
+
+        print(f"✅ [LANDMARKS] Загружено {len(landmarks.landmarks)} ориентиров из {file_path}")
+        return landmarks
+
+
+def landmarks_path(graph_file: str) -> Path:
+    return Path(graph_file).with_suffix(".landmarks.npz")
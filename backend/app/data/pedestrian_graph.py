@@ -0,0 +1,231 @@
+import heapq
+import math
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+
+PEDESTRIAN_HIGHWAYS = {
+    "footway", "pedestrian", "path", "steps", "living_street", "residential",
+    "service", "unclassified", "tertiary", "tertiary_link", "secondary",
+    "secondary_link", "primary", "primary_link", "track", "cycleway",
+    "corridor", "bridleway", "road"
+}
+
+UNPAVED_SURFACES = {
+    "unpaved", "dirt", "ground", "gravel", "fine_gravel", "sand", "grass",
+    "mud", "earth", "compacted", "pebblestone", "woodchips"
+}
+
+EDGE_STEPS = 1
+EDGE_UNPAVED = 2
+
+
+class PedestrianGraph:
+    """Пешеходный граф в CSR-виде: рёбра узла i — indices[indptr[i]:indptr[i + 1]]"""
+
+    def __init__(
+        self,
+        node_lon: np.ndarray,
+        node_lat: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        edge_length_m: np.ndarray,
+        edge_flags: np.ndarray
+    ):
+        self.node_lon = node_lon
+        self.node_lat = node_lat
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_length_m = edge_length_m
+        self.edge_flags = edge_flags
+
+        self.edge_source = np.repeat(np.arange(len(node_lon), dtype=np.int32), np.diff(indptr))
+        self.edge_mid_lon = (node_lon[self.edge_source] + node_lon[indices]) / 2
+        self.edge_mid_lat = (node_lat[self.edge_source] + node_lat[indices]) / 2
+
+        self._node_index = STRtree(shapely.points(node_lon, node_lat))
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_lon)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    def nearest_node(self, lon: float, lat: float) -> int:
+        return int(self._node_index.nearest(shapely.Point(lon, lat)))
+
+    def path_coordinates(self, path: List[int]) -> List[List[float]]:
+        return [[float(self.node_lon[i]), float(self.node_lat[i])] for i in path]
+
+    def dijkstra(
+        self,
+        source: int,
+        costs: Optional[List[float]] = None,
+        max_cost: float = math.inf
+    ) -> np.ndarray:
+        """Стоимости от source до всех узлов (inf — недостижимы или дальше max_cost)"""
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        costs = costs if costs is not None else self.edge_length_m.tolist()
+
+        best = {source: 0.0}
+        queue = [(0.0, source)]
+        while queue:
+            cost, node = heapq.heappop(queue)
+            if cost > best[node]:
+                continue
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[edge]
+                new_cost = cost + costs[edge]
+                if new_cost <= max_cost and new_cost < best.get(neighbour, math.inf):
+                    best[neighbour] = new_cost
+                    heapq.heappush(queue, (new_cost, neighbour))
+
+        distances = np.full(self.node_count, np.inf)
+        distances[list(best.keys())] = list(best.values())
+        return distances
+
+    def save(self, file_path: Path) -> None:
+        np.savez_compressed(
+            file_path,
+            node_lon=self.node_lon,
+            node_lat=self.node_lat,
+            indptr=self.indptr,
+            indices=self.indices,
+            edge_length_m=self.edge_length_m,
+            edge_flags=self.edge_flags
+        )
+
+    @classmethod
+    def load(cls, file_path: str) -> Optional["PedestrianGraph"]:
+        """Загрузить граф из OSM XML, используя .npz-кэш рядом с файлом"""
+        source = Path(file_path)
+        cache = source.with_suffix(".npz")
+
+        if cache.exists() and (not source.exists() or cache.stat().st_mtime >= source.stat().st_mtime):
+            with np.load(cache) as data:
+                graph = cls(**{key: data[key] for key in data.files})
+            print(f"✅ [GRAPH] Загружен граф из {cache}: {graph.node_count} узлов, {graph.edge_count} рёбер")
+            return graph
+
+        if not source.exists():
+            print(f"⚠️ [GRAPH] Файл не найден: {file_path}")
+            return None
+
+        graph = cls.from_osm(source)
+        graph.save(cache)
+        print(f"✅ [GRAPH] Построен граф из {source}: {graph.node_count} узлов, {graph.edge_count} рёбер")
+        return graph
+
+    @classmethod
+    def from_osm(cls, file_path: Path) -> "PedestrianGraph":
+        node_coords: Dict[int, Tuple[float, float]] = {}
+        ways: List[Tuple[List[int], int]] = []
+
+        for _, element in ET.iterparse(file_path, events=("end",)):
+            if element.tag == "node":
+                node_coords[int(element.get("id"))] = (float(element.get("lon")), float(element.get("lat")))
+                element.clear()
+            elif element.tag == "way":
+                tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+                if cls._is_walkable(tags):
+                    refs = [int(nd.get("ref")) for nd in element.iter("nd")]
+                    ways.append((refs, cls._edge_flags(tags)))
+                element.clear()
+
+        node_ids: Dict[int, int] = {}
+        sources, targets, flags = [], [], []
+        for refs, way_flags in ways:
+            refs = [ref for ref in refs if ref in node_coords]
+            for a, b in zip(refs, refs[1:]):
+                ia = node_ids.setdefault(a, len(node_ids))
+                ib = node_ids.setdefault(b, len(node_ids))
+                sources += [ia, ib]
+                targets += [ib, ia]
+                flags += [way_flags, way_flags]
+
+        coords = np.empty((len(node_ids), 2), dtype=np.float64)
+        for osm_id, i in node_ids.items():
+            coords[i] = node_coords[osm_id]
+
+        return cls.from_edges(coords[:, 0], coords[:, 1], np.array(sources), np.array(targets), np.array(flags))
+
+    @classmethod
+    def from_edges(
+        cls,
+        node_lon: np.ndarray,
+        node_lat: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        flags: Optional[np.ndarray] = None
+    ) -> "PedestrianGraph":
+        node_lon = np.asarray(node_lon, dtype=np.float64)
+        node_lat = np.asarray(node_lat, dtype=np.float64)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if flags is None:
+            flags = np.zeros(len(sources), dtype=np.uint8)
+
+        order = np.argsort(sources, kind="stable")
+        sources, targets, flags = sources[order], targets[order], np.asarray(flags)[order]
+
+        indptr = np.zeros(len(node_lon) + 1, dtype=np.int64)
+        np.add.at(indptr, sources + 1, 1)
+        indptr = np.cumsum(indptr)
+
+        return cls(
+            node_lon=node_lon,
+            node_lat=node_lat,
+            indptr=indptr,
+            indices=targets.astype(np.int32),
+            edge_length_m=distance_m(node_lon[sources], node_lat[sources], node_lon[targets], node_lat[targets]).astype(np.float32),
+            edge_flags=flags.astype(np.uint8)
+        )
+
+    @staticmethod
+    def _is_walkable(tags: Dict[str, str]) -> bool:
+        if tags.get("highway") not in PEDESTRIAN_HIGHWAYS:
+            return False
+        if tags.get("foot") in ("no", "private"):
+            return False
+        if tags.get("access") in ("no", "private") and tags.get("foot") not in ("yes", "designated", "permissive"):
+            return False
+        return True
+
+    @staticmethod
+    def _edge_flags(tags: Dict[str, str]) -> int:
+        flags = 0
+        if tags.get("highway") == "steps":
+            flags |= EDGE_STEPS
+        if tags.get("surface") in UNPAVED_SURFACES:
+            flags |= EDGE_UNPAVED
+        return flags
+
+
+def distance_m(lon1, lat1, lon2, lat2):
+    """Расстояние в метрах (равнопромежуточная аппроксимация, годится для города)"""
+    lat_mid = np.radians((np.asarray(lat1) + np.asarray(lat2)) / 2)
+    dx = (np.asarray(lon2) - np.asarray(lon1)) * 111000.0 * np.cos(lat_mid)
+    dy = (np.asarray(lat2) - np.asarray(lat1)) * 111000.0
+    return np.hypot(dx, dy)
+
+
+_pedestrian_graph = None
+_graph_loaded = False
+
+def get_pedestrian_graph(file_path: str) -> Optional[PedestrianGraph]:
+    global _pedestrian_graph, _graph_loaded
+    if not _graph_loaded:
+        _graph_loaded = True
+        try:
+            _pedestrian_graph = PedestrianGraph.load(file_path)
+        except Exception as e:
+            print(f"❌ [GRAPH] Ошибка загрузки графа: {e}")
+    return _pedestrian_graph
@@ -0,0 +1,637 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Any, Tuple
+
+from sqlalchemy import (
+    Column, Index, Integer, MetaData, String, Table, Text,
+    and_, create_engine, event, func, or_, select, update
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.data.places_storage import initial_review_uid
+
+
+metadata = MetaData()
+
+place_accessibility = Table(
+    "place_accessibility",
+    metadata,
+    Column("place_id", String, primary_key=True),
+    Column("data", Text, nullable=False),
+    Column("updated_at", String, nullable=False)
+)
+
+place_reviews = Table(
+    "place_reviews",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("place_id", String, nullable=False),
+    Column("review_id", String, nullable=False),
+    Column("author", String, nullable=False),
+    Column("rating", Integer, nullable=False),
+    Column("text", Text, nullable=False),
+    Column("date", String, nullable=False),
+    Column("uid", String, nullable=False),
+    Index("ix_place_reviews_place_id_date", "place_id", "date"),
+    Index("ux_place_reviews_place_id_review_id", "place_id", "review_id", unique=True),
+    Index("ux_place_reviews_uid", "uid", unique=True)
+)
+
+# Места, уже полученные от 2GIS, — источник локального поиска
+seen_places = Table(
+    "seen_places",
+    metadata,
+    Column("place_id", String, primary_key=True),
+    Column("data", Text, nullable=False),
+    Column("seen_at", String, nullable=False),
+    Index("ix_seen_places_seen_at", "seen_at")
+)
+
+# Общая для всех процессов версия данных и версия последнего изменения каждого места
+storage_meta = Table(
+    "storage_meta",
+    metadata,
+    Column("key", String, primary_key=True),
+    Column("value", Integer, nullable=False)
+)
+
+place_changes = Table(
+    "place_changes",
+    metadata,
+    Column("place_id", String, primary_key=True),
+    Column("version", Integer, nullable=False),
+    Index("ix_place_changes_version", "version")
+)
+
+_MISSING = object()
+
+
+class SqlitePlacesStorage:
+    """Хранилище мест в SQLite (WAL): запись отзыва — одна вставка, а не перезапись всего файла.
+
+    Безопасно для нескольких воркеров uvicorn: записи идут транзакциями
+    BEGIN IMMEDIATE, каждая поднимает общую версию в storage_meta и
+    отмечает изменённые места в place_changes. Кэш чтения у каждого
+    процесса свой; при смене версии из него выбрасываются только
+    изменённые с тех пор места.
+    """
+
+    def __init__(self, database_url: str, cache_size: int = 10000, cache_check_interval_ms: float = 100.0):
+        self.engine = create_engine(database_url, connect_args={"check_same_thread": False, "timeout": 30})
+        event.listen(self.engine, "connect", self._configure_connection)
+        event.listen(self.engine, "begin", self._begin_transaction)
+        self.write_engine = self.engine.execution_options(sqlite_immediate=True)
+
+        self.cache_size = cache_size
+        self.cache_check_interval_sec = cache_check_interval_ms / 1000
+        self._cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_version: Optional[int] = None
+        self._cache_checked_at = 0.0
+        # Растёт при каждой чистке: загруженное до неё в кэш не кладём
+        self._cache_epoch = 0
+        self._cache_kinds = {"accessibility", "reviews"}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        metadata.create_all(self.engine)
+        with self.write_engine.begin() as connection:
+            connection.execute(sqlite_insert(storage_meta).values(key="version", value=0).on_conflict_do_nothing())
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, connection_record) -> None:
+        # Транзакциями управляет _begin_transaction, а не драйвер sqlite3
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    @staticmethod
+    def _begin_transaction(connection) -> None:
+        # Запись сразу берёт блокировку базы: чтение-и-вставка (номер отзыва)
+        # не пересекается с такой же транзакцией другого процесса
+        if connection.get_execution_options().get("sqlite_immediate"):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            connection.exec_driver_sql("BEGIN")
+
+    def get_place_accessibility(self, place_id: str) -> Optional[Dict[str, Any]]:
+        data = self._cached(("accessibility", place_id), self._load_accessibility)
+        return json.loads(data) if data else None
+
+    def get_places_accessibility(self, place_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Доступность нескольких мест одним запросом (для промахов кэша)"""
+        data = self._cached_many("accessibility", place_ids, self._load_accessibility_many)
+        return {place_id: json.loads(value) for place_id, value in data.items() if value}
+
+    def save_place_accessibility(self, place_id: str, accessibility_data: Dict[str, Any]) -> bool:
+        """Сохранить данные о доступности места"""
+        try:
+            with self.write_engine.begin() as connection:
+                self._upsert_accessibility(connection, place_id, accessibility_data)
+                self._bump_version(connection, [place_id])
+            return True
+        except Exception as e:
+            print(f"⚠️ Ошибка сохранения доступности {place_id}: {e}")
+            return False
+        finally:
+            self._evict([place_id])
+
+    def update_place_accessibility(
+        self,
+        place_id: str,
+        update: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]
+    ) -> bool:
+        """Прочитать, изменить и записать доступность места одной транзакцией BEGIN IMMEDIATE.
+
+        Блокировка записи берётся до чтения, поэтому параллельные
+        обновления из других потоков и процессов не теряются.
+        """
+        try:
+            with self.write_engine.begin() as connection:
+                row = connection.execute(
+                    select(place_accessibility.c.data).where(place_accessibility.c.place_id == place_id)
+                ).first()
+                self._upsert_accessibility(connection, place_id, update(json.loads(row.data) if row else None))
+                self._bump_version(connection, [place_id])
+            return True
+        except Exception as e:
+            print(f"⚠️ Ошибка обновления доступности {place_id}: {e}")
+            return False
+        finally:
+            self._evict([place_id])
+
+    def write_batch(
+        self,
+        accessibility: Dict[str, Dict[str, Any]],
+        reviews: List[Tuple[str, Dict[str, Any], str]]
+    ) -> bool:
+        """Записать пачку изменений одной транзакцией.
+
+        Отзывы идемпотентны по uid. Если номер отзыва уже занят отзывом
+        из другого процесса, отзыв получает следующий свободный номер.
+        Доступность не перезаписывается более старой версией.
+        """
+        place_ids = set(accessibility) | {place_id for place_id, _, _ in reviews}
+        try:
+            with self.write_engine.begin() as connection:
+                if accessibility:
+                    statement = sqlite_insert(place_accessibility)
+                    connection.execute(
+                        statement.on_conflict_do_update(
+                            index_elements=[place_accessibility.c.place_id],
+                            set_={"data": statement.excluded.data, "updated_at": statement.excluded.updated_at},
+                            where=statement.excluded.updated_at >= place_accessibility.c.updated_at
+                        ),
+                        [
+                            {
+                                "place_id": place_id,
+                                "data": json.dumps(data, ensure_ascii=False),
+                                "updated_at": data.get("updated_at", "")
+                            }
+                            for place_id, data in accessibility.items()
+                        ]
+                    )
+                review_rows = self._new_review_rows(connection, reviews)
+                if review_rows:
+                    connection.execute(sqlite_insert(place_reviews), review_rows)
+                if place_ids:
+                    self._bump_version(connection, place_ids)
+            return True
+        except Exception as e:
+            print(f"⚠️ Ошибка записи пачки изменений: {e}")
+            return False
+        finally:
+            self._evict(place_ids)
+
+    def get_place_reviews(self, place_id: str) -> List[Dict[str, Any]]:
+        """Получить отзывы о месте"""
+        rows = self._cached(("reviews", place_id), self._load_reviews)
+        return [self._review_from_row(row) for row in rows]
+
+    def get_places_review_summaries(self, place_ids: List[str], top_n: int) -> Dict[str, Dict[str, Any]]:
+        """Число отзывов и top_n последних для нескольких мест (промахи кэша — двумя запросами)"""
+        data = self._cached_many(
+            f"review_summary_{top_n}",
+            place_ids,
+            lambda missing: self._load_review_summaries(missing, top_n)
+        )
+        return {
+            place_id: {"count": count, "reviews": [self._review_from_row(row) for row in rows]}
+            for place_id, (count, rows) in data.items()
+        }
+
+    def get_place_reviews_page(
+        self,
+        place_id: str,
+        before: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Отзывы от новых к старым, строго после курсора before = (date, id)"""
+        query = (
+            select(place_reviews)
+            .where(place_reviews.c.place_id == place_id)
+            .order_by(place_reviews.c.date.desc(), place_reviews.c.review_id.desc())
+            .limit(limit)
+        )
+        if before:
+            date, review_id = before
+            query = query.where(or_(
+                place_reviews.c.date < date,
+                and_(place_reviews.c.date == date, place_reviews.c.review_id < review_id)
+            ))
+        with self.engine.connect() as connection:
+            return [self._review_from_row(row) for row in connection.execute(query)]
+
+    def save_places_data(
+        self,
+        accessibility: Dict[str, Dict[str, Any]],
+        reviews: Dict[str, List[Dict[str, Any]]]
+    ) -> bool:
+        """Записать доступность и отзывы новых мест одной транзакцией.
+
+        uid отзывов детерминированы (initial_review_uid), поэтому первый
+        показ места из нескольких запросов или процессов пишет их один раз.
+        """
+        now = datetime.utcnow().isoformat()
+        accessibility = {place_id: {**data, "updated_at": now} for place_id, data in accessibility.items()}
+        review_items = []
+        for place_id, place_reviews in reviews.items():
+            for i, review in enumerate(place_reviews):
+                review["id"] = f"review_{i + 1}"
+                review["date"] = now
+                review_items.append((place_id, review, initial_review_uid(place_id, i + 1)))
+        return self.write_batch(accessibility, review_items)
+
+    def add_place_review(self, place_id: str, review: Dict[str, Any]) -> bool:
+        """Добавить отзыв о месте"""
+        try:
+            with self.write_engine.begin() as connection:
+                count = connection.execute(
+                    select(func.count()).select_from(place_reviews).where(place_reviews.c.place_id == place_id)
+                ).scalar_one()
+
+                review["id"] = f"review_{count + 1}"
+                review["date"] = datetime.utcnow().isoformat()
+
+                connection.execute(
+                    sqlite_insert(place_reviews).values(self._review_to_row(place_id, review, uuid.uuid4().hex))
+                )
+                self._bump_version(connection, [place_id])
+            return True
+        except Exception as e:
+            print(f"⚠️ Ошибка сохранения отзыва {place_id}: {e}")
+            return False
+        finally:
+            self._evict([place_id])
+
+    def has_place_data(self, place_id: str) -> bool:
+        """Проверить есть ли данные о месте"""
+        return (
+            self._cached(("accessibility", place_id), self._load_accessibility) is not None or
+            bool(self._cached(("reviews", place_id), self._load_reviews))
+        )
+
+    def save_places(self, places: List[Dict[str, Any]]) -> bool:
+        """Сохранить места из выдачи 2GIS"""
+        seen_at = datetime.utcnow().isoformat()
+        statement = sqlite_insert(seen_places)
+        try:
+            with self.write_engine.begin() as connection:
+                connection.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[seen_places.c.place_id],
+                        set_={"data": statement.excluded.data, "seen_at": statement.excluded.seen_at}
+                    ),
+                    [
+                        {"place_id": place["id"], "data": json.dumps(place, ensure_ascii=False), "seen_at": seen_at}
+                        for place in places
+                    ]
+                )
+            return True
+        except Exception as e:
+            print(f"⚠️ Ошибка сохранения мест: {e}")
+            return False
+
+    def get_place(self, place_id: str) -> Optional[Dict[str, Any]]:
+        """Сохранённое место из выдачи 2GIS (с рубриками) или None"""
+        with self.engine.connect() as connection:
+            row = connection.execute(
+                select(seen_places.c.data, seen_places.c.seen_at).where(seen_places.c.place_id == place_id)
+            ).first()
+        return {**json.loads(row.data), "seen_at": row.seen_at} if row else None
+
+    def get_places_seen_after(self, seen_after: str) -> List[Dict[str, Any]]:
+        """Места, сохранённые не раньше seen_after (с полем seen_at)"""
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(seen_places.c.data, seen_places.c.seen_at)
+                .where(seen_places.c.seen_at >= seen_after)
+                .order_by(seen_places.c.seen_at)
+            ).all()
+        return [{**json.loads(row.data), "seen_at": row.seen_at} for row in rows]
+
+    def is_empty(self) -> bool:
+        with self.engine.connect() as connection:
+            return self._is_empty(connection)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        with self._cache_lock:
+            return {
+                "version": self._cache_version,
+                "entries": len(self._cache),
+                "hits": self.cache_hits,
+                "misses": self.cache_misses
+            }
+
+    def migrate_from_json(self, data_dir: str) -> bool:
+        """Однократно перенести accessibility.json, reviews.json и places.json в пустую базу"""
+        data_path = Path(data_dir)
+        accessibility_file = data_path / "accessibility.json"
+        reviews_file = data_path / "reviews.json"
+        places_file = data_path / "places.json"
+
+        if not self.is_empty() or not (accessibility_file.exists() or reviews_file.exists() or places_file.exists()):
+            return False
+
+        accessibility_data = self._load_json(accessibility_file)
+        reviews_data = self._load_json(reviews_file)
+        places_data = self._load_json(places_file)
+
+        accessibility_rows = [
+            {
+                "place_id": place_id,
+                "data": json.dumps(data, ensure_ascii=False),
+                "updated_at": data.get("updated_at", "")
+            }
+            for place_id, data in accessibility_data.items()
+        ]
+        review_rows = [
+            self._review_to_row(place_id, review, f"{place_id}/{review['id']}")
+            for place_id, reviews in reviews_data.items()
+            for review in reviews
+        ]
+        place_rows = [
+            {
+                "place_id": place_id,
+                "data": json.dumps({key: value for key, value in place.items() if key != "seen_at"}, ensure_ascii=False),
+                "seen_at": place["seen_at"]
+            }
+            for place_id, place in places_data.items()
+        ]
+
+        with self.write_engine.begin() as connection:
+            # Воркеры стартуют одновременно — переносит тот, кто первым взял блокировку
+            if not self._is_empty(connection):
+                return False
+            if accessibility_rows:
+                connection.execute(sqlite_insert(place_accessibility).on_conflict_do_nothing(), accessibility_rows)
+            if review_rows:
+                connection.execute(sqlite_insert(place_reviews).on_conflict_do_nothing(), review_rows)
+            if place_rows:
+                connection.execute(sqlite_insert(seen_places).on_conflict_do_nothing(), place_rows)
+            self._bump_version(connection, set(accessibility_data) | set(reviews_data))
+
+        print(
+            f"✅ [PLACES] Перенесено в SQLite: {len(accessibility_rows)} мест, {len(review_rows)} отзывов, "
+            f"{len(place_rows)} мест 2GIS из {data_path}"
+        )
+        return True
+
+    def _is_empty(self, connection) -> bool:
+        return (
+            connection.execute(select(place_accessibility.c.place_id).limit(1)).first() is None and
+            connection.execute(select(place_reviews.c.id).limit(1)).first() is None and
+            connection.execute(select(seen_places.c.place_id).limit(1)).first() is None
+        )
+
+    def _new_review_rows(self, connection, reviews: List[Tuple[str, Dict[str, Any], str]]) -> List[Dict[str, Any]]:
+        """Строки для вставки: без уже записанных uid, с уникальными номерами внутри места"""
+        if not reviews:
+            return []
+
+        uids = [uid for _, _, uid in reviews]
+        written = set()
+        for start in range(0, len(uids), 500):
+            written.update(connection.execute(
+                select(place_reviews.c.uid).where(place_reviews.c.uid.in_(uids[start:start + 500]))
+            ).scalars())
+
+        place_ids = list({place_id for place_id, _, _ in reviews})
+        taken: Dict[str, set] = {place_id: set() for place_id in place_ids}
+        for start in range(0, len(place_ids), 500):
+            for place_id, review_id in connection.execute(
+                select(place_reviews.c.place_id, place_reviews.c.review_id)
+                .where(place_reviews.c.place_id.in_(place_ids[start:start + 500]))
+            ):
+                taken[place_id].add(review_id)
+
+        rows = []
+        for place_id, review, uid in reviews:
+            if uid in written:
+                continue
+            written.add(uid)
+            review_id = review["id"]
+            number = len(taken[place_id])
+            while review_id in taken[place_id]:
+                number += 1
+                review_id = f"review_{number}"
+            taken[place_id].add(review_id)
+            rows.append(self._review_to_row(place_id, {**review, "id": review_id}, uid))
+        return rows
+
+    def _upsert_accessibility(self, connection, place_id: str, accessibility_data: Dict[str, Any]) -> None:
+        updated_at = datetime.utcnow().isoformat()
+        data = json.dumps({**accessibility_data, "updated_at": updated_at}, ensure_ascii=False)
+
+        statement = sqlite_insert(place_accessibility).values(place_id=place_id, data=data, updated_at=updated_at)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[place_accessibility.c.place_id],
+            set_={"data": statement.excluded.data, "updated_at": statement.excluded.updated_at}
+        ))
+
+    def _bump_version(self, connection, place_ids: Iterable[str]) -> None:
+        connection.execute(
+            update(storage_meta).where(storage_meta.c.key == "version").values(value=storage_meta.c.value + 1)
+        )
+        version = connection.execute(
+            select(storage_meta.c.value).where(storage_meta.c.key == "version")
+        ).scalar_one()
+
+        rows = [{"place_id": place_id, "version": version} for place_id in place_ids]
+        if rows:
+            statement = sqlite_insert(place_changes)
+            connection.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[place_changes.c.place_id],
+                    set_={"version": statement.excluded.version}
+                ),
+                rows
+            )
+
+    def _cached_many(self, kind: str, place_ids: List[str], loader) -> Dict[str, Any]:
+        self._sync_cache()
+        result = {}
+        with self._cache_lock:
+            for place_id in place_ids:
+                value = self._cache.get((kind, place_id), _MISSING)
+                if value is not _MISSING:
+                    self._cache.move_to_end((kind, place_id))
+                    result[place_id] = value
+            self.cache_hits += len(result)
+            missing = [place_id for place_id in place_ids if place_id not in result]
+            self.cache_misses += len(missing)
+            epoch = self._cache_epoch
+
+        if missing:
+            loaded = loader(missing)
+            with self._cache_lock:
+                self._cache_kinds.add(kind)
+                for place_id in missing:
+                    result[place_id] = loaded[place_id]
+                    if epoch == self._cache_epoch:
+                        self._cache[(kind, place_id)] = loaded[place_id]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _cached(self, key: Tuple[str, str], loader) -> Any:
+        self._sync_cache()
+        with self._cache_lock:
+            value = self._cache.get(key, _MISSING)
+            if value is not _MISSING:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return value
+            self.cache_misses += 1
+            epoch = self._cache_epoch
+
+        value = loader(key[1])
+        with self._cache_lock:
+            if epoch == self._cache_epoch:
+                self._cache[key] = value
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return value
+
+    def _sync_cache(self) -> None:
+        """Сверить версию с базой не чаще cache_check_interval и выбросить изменённые места"""
+        now = time.monotonic()
+        if now - self._cache_checked_at < self.cache_check_interval_sec:
+            return
+
+        with self.engine.connect() as connection:
+            version = connection.execute(
+                select(storage_meta.c.value).where(storage_meta.c.key == "version")
+            ).scalar_one()
+            changed = None
+            if self._cache_version is not None and version != self._cache_version:
+                changed = connection.execute(
+                    select(place_changes.c.place_id).where(place_changes.c.version > self._cache_version)
+                ).scalars().all()
+
+        with self._cache_lock:
+            if self._cache_version is None or version < self._cache_version:
+                self._cache.clear()
+                self._cache_epoch += 1
+            elif changed:
+                self._evict_locked(changed)
+            self._cache_version = version
+            self._cache_checked_at = now
+
+    def _evict(self, place_ids: Iterable[str]) -> None:
+        # Свои записи видны сразу, не дожидаясь сверки версии
+        with self._cache_lock:
+            self._evict_locked(place_ids)
+
+    def _evict_locked(self, place_ids: Iterable[str]) -> None:
+        self._cache_epoch += 1
+        for place_id in place_ids:
+            for kind in self._cache_kinds:
+                self._cache.pop((kind, place_id), None)
+
+    def _load_accessibility(self, place_id: str) -> Optional[str]:
+        with self.engine.connect() as connection:
+            row = connection.execute(
+                select(place_accessibility.c.data).where(place_accessibility.c.place_id == place_id)
+            ).first()
+        return row.data if row else None
+
+    def _load_reviews(self, place_id: str) -> List[Any]:
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(place_reviews)
+                .where(place_reviews.c.place_id == place_id)
+                .order_by(place_reviews.c.id)
+            ).all()
+
+    def _load_accessibility_many(self, place_ids: List[str]) -> Dict[str, Optional[str]]:
+        loaded = dict.fromkeys(place_ids)
+        with self.engine.connect() as connection:
+            for start in range(0, len(place_ids), 500):
+                for row in connection.execute(
+                    select(place_accessibility.c.place_id, place_accessibility.c.data)
+                    .where(place_accessibility.c.place_id.in_(place_ids[start:start + 500]))
+                ):
+                    loaded[row.place_id] = row.data
+        return loaded
+
+    def _load_review_summaries(self, place_ids: List[str], top_n: int) -> Dict[str, Tuple[int, List[Any]]]:
+        counts = dict.fromkeys(place_ids, 0)
+        top = {place_id: [] for place_id in place_ids}
+        with self.engine.connect() as connection:
+            for start in range(0, len(place_ids), 500):
+                chunk = place_ids[start:start + 500]
+                for place_id, count in connection.execute(
+                    select(place_reviews.c.place_id, func.count())
+                    .where(place_reviews.c.place_id.in_(chunk))
+                    .group_by(place_reviews.c.place_id)
+                ):
+                    counts[place_id] = count
+                if top_n <= 0:
+                    continue
+
+                ranked = select(
+                    place_reviews,
+                    func.row_number().over(
+                        partition_by=place_reviews.c.place_id,
+                        order_by=(place_reviews.c.date.desc(), place_reviews.c.review_id.desc())
+                    ).label("rank")
+                ).where(place_reviews.c.place_id.in_(chunk)).subquery()
+                for row in connection.execute(
+                    select(ranked).where(ranked.c.rank <= top_n).order_by(ranked.c.place_id, ranked.c.rank)
+                ):
+                    top[row.place_id].append(row)
+        return {place_id: (counts[place_id], top[place_id]) for place_id in place_ids}
+
+    def _load_json(self, file_path: Path) -> Dict[str, Any]:
+        if not file_path.exists():
+            return {}
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _review_to_row(self, place_id: str, review: Dict[str, Any], uid: str) -> Dict[str, Any]:
+        return {
+            "place_id": place_id,
+            "review_id": review["id"],
+            "author": review["author"],
+            "rating": review["rating"],
+            "text": review["text"],
+            "date": review["date"],
+            "uid": uid
+        }
+
+    def _review_from_row(self, row) -> Dict[str, Any]:
+        return {
+            "author": row.author,
+            "rating": row.rating,
+            "text": row.text,
+            "id": row.review_id,
+            "date": row.date
+        }
@@ -1,11 +1,29 @@
 import json
 import os
-from typing import Dict, List, Optional, Any
+import threading
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from datetime import datetime
 from pathlib import Path
 
+from app.core.config import settings
+
+
+def newest_reviews(reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Отзывы от новых к старым; порядок (date, id) совпадает с SQLite"""
+    return sorted(reviews, key=lambda review: (review["date"], review["id"]), reverse=True)
+
+
+def initial_review_uid(place_id: str, number: int) -> str:
+    """uid сгенерированного отзыва при первом показе места: повторная запись не создаёт дублей"""
+    return f"{place_id}/initial_{number}"
+
 
 class PlacesStorage:
+    """Хранилище мест в JSON-файлах (один процесс).
+
+    Словари общие для потоков пула AsyncPlacesStorage и сброса
+    write-behind буфера, поэтому все обращения к ним идут под self._lock.
+    """
     
     def __init__(self, data_dir: str = "app/data/places"):
         self.data_dir = Path(data_dir)
@@ -13,9 +31,12 @@ class PlacesStorage:
         
         self.accessibility_file = self.data_dir / "accessibility.json"
         self.reviews_file = self.data_dir / "reviews.json"
+        self.places_file = self.data_dir / "places.json"
+        self._lock = threading.RLock()
         
         self.accessibility_data = self._load_json(self.accessibility_file)
         self.reviews_data = self._load_json(self.reviews_file)
+        self.places_data = self._load_json(self.places_file)
     
     def _load_json(self, file_path: Path) -> Dict[str, Any]:
         if file_path.exists():
@@ -37,41 +58,174 @@ class PlacesStorage:
             return False
     
     def get_place_accessibility(self, place_id: str) -> Optional[Dict[str, Any]]:
-        return self.accessibility_data.get(place_id)
+        with self._lock:
+            return self.accessibility_data.get(place_id)
+    
+    def get_places_accessibility(self, place_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {place_id: self.accessibility_data[place_id] for place_id in place_ids if place_id in self.accessibility_data}
+    
+    def get_places_review_summaries(self, place_ids: List[str], top_n: int) -> Dict[str, Dict[str, Any]]:
+        summaries = {}
+        with self._lock:
+            for place_id in place_ids:
+                reviews = self.reviews_data.get(place_id, [])
+                summaries[place_id] = {"count": len(reviews), "reviews": newest_reviews(reviews)[:top_n]}
+        return summaries
+    
+    def get_place_reviews_page(
+        self,
+        place_id: str,
+        before: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Отзывы от новых к старым, строго после курсора before = (date, id)"""
+        with self._lock:
+            reviews = newest_reviews(self.reviews_data.get(place_id, []))
+        if before:
+            reviews = [review for review in reviews if (review["date"], review["id"]) < tuple(before)]
+        return reviews[:limit]
+    
+    def save_places_data(
+        self,
+        accessibility: Dict[str, Dict[str, Any]],
+        reviews: Dict[str, List[Dict[str, Any]]]
+    ) -> bool:
+        """Записать доступность и отзывы новых мест, перезаписав каждый файл один раз.
+
+        Отзывы пишутся только местам, у которых их ещё нет: параллельный
+        первый показ того же места не добавляет второй набор.
+        """
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            review_items = []
+            for place_id, place_reviews in reviews.items():
+                has_reviews = bool(self.reviews_data.get(place_id))
+                for i, review in enumerate(place_reviews):
+                    review["id"] = f"review_{i + 1}"
+                    review["date"] = now
+                    if not has_reviews:
+                        review_items.append((place_id, review, initial_review_uid(place_id, i + 1)))
+            return self.write_batch(
+                {place_id: {**data, "updated_at": now} for place_id, data in accessibility.items()},
+                review_items
+            )
     
     def save_place_accessibility(self, place_id: str, accessibility_data: Dict[str, Any]) -> bool:
         """Сохранить данные о доступности места"""
-        self.accessibility_data[place_id] = {
-            **accessibility_data,
-            "updated_at": datetime.utcnow().isoformat()
-        }
-        return self._save_json(self.accessibility_file, self.accessibility_data)
+        with self._lock:
+            self.accessibility_data[place_id] = {
+                **accessibility_data,
+                "updated_at": datetime.utcnow().isoformat()
+            }
+            return self._save_json(self.accessibility_file, self.accessibility_data)
+    
+    def update_place_accessibility(
+        self,
+        place_id: str,
+        update: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]
+    ) -> bool:
+        """Заменить доступность места на update(текущая или None) без потерянных обновлений"""
+        with self._lock:
+            self.accessibility_data[place_id] = {
+                **update(self.accessibility_data.get(place_id)),
+                "updated_at": datetime.utcnow().isoformat()
+            }
+            return self._save_json(self.accessibility_file, self.accessibility_data)
     
     def get_place_reviews(self, place_id: str) -> List[Dict[str, Any]]:
         """Получить отзывы о месте"""
-        return self.reviews_data.get(place_id, [])
+        with self._lock:
+            return list(self.reviews_data.get(place_id, []))
     
     def add_place_review(self, place_id: str, review: Dict[str, Any]) -> bool:
         """Добавить отзыв о месте"""
-        if place_id not in self.reviews_data:
-            self.reviews_data[place_id] = []
-        
-        review["id"] = f"review_{len(self.reviews_data[place_id]) + 1}"
-        review["date"] = datetime.utcnow().isoformat()
-        
-        self.reviews_data[place_id].append(review)
-        return self._save_json(self.reviews_file, self.reviews_data)
+        with self._lock:
+            if place_id not in self.reviews_data:
+                self.reviews_data[place_id] = []
+            
+            review["id"] = f"review_{len(self.reviews_data[place_id]) + 1}"
+            review["date"] = datetime.utcnow().isoformat()
+            
+            self.reviews_data[place_id].append(review)
+            return self._save_json(self.reviews_file, self.reviews_data)
+    
+    def write_batch(
+        self,
+        accessibility: Dict[str, Dict[str, Any]],
+        reviews: List[Tuple[str, Dict[str, Any], str]]
+    ) -> bool:
+        """Применить пачку изменений и перезаписать каждый файл один раз (только один процесс).
+
+        Доступность не перезаписывается более старой версией — как в SQLite.
+        """
+        with self._lock:
+            for place_id, data in accessibility.items():
+                current = self.accessibility_data.get(place_id)
+                if not current or data.get("updated_at", "") >= current.get("updated_at", ""):
+                    self.accessibility_data[place_id] = data
+            
+            for place_id, review, _ in reviews:
+                place_reviews = self.reviews_data.setdefault(place_id, [])
+                if not any(existing.get("id") == review["id"] for existing in place_reviews):
+                    place_reviews.append(review)
+            
+            success = True
+            if accessibility:
+                success = self._save_json(self.accessibility_file, self.accessibility_data) and success
+            if reviews:
+                success = self._save_json(self.reviews_file, self.reviews_data) and success
+            return success
     
     def has_place_data(self, place_id: str) -> bool:
         """Проверить есть ли данные о месте"""
-        return place_id in self.accessibility_data or place_id in self.reviews_data
+        with self._lock:
+            return place_id in self.accessibility_data or place_id in self.reviews_data
+    
+    def save_places(self, places: List[Dict[str, Any]]) -> bool:
+        """Сохранить места из выдачи 2GIS"""
+        seen_at = datetime.utcnow().isoformat()
+        with self._lock:
+            for place in places:
+                self.places_data[place["id"]] = {**place, "seen_at": seen_at}
+            return self._save_json(self.places_file, self.places_data)
+    
+    def get_place(self, place_id: str) -> Optional[Dict[str, Any]]:
+        """Сохранённое место из выдачи 2GIS (с рубриками) или None"""
+        with self._lock:
+            return self.places_data.get(place_id)
+    
+    def get_places_seen_after(self, seen_after: str) -> List[Dict[str, Any]]:
+        """Места, сохранённые не раньше seen_after (с полем seen_at)"""
+        with self._lock:
+            places = [place for place in self.places_data.values() if place["seen_at"] >= seen_after]
+        return sorted(places, key=lambda place: place["seen_at"])
 
 
 _storage = None
 
-def get_places_storage() -> PlacesStorage:
-    """Получить экземпляр хранилища"""
+def get_places_storage():
+    """Получить экземпляр хранилища (SQLite или JSON-файлы, см. PLACES_STORAGE_BACKEND)"""
     global _storage
     if _storage is None:
-        _storage = PlacesStorage()
+        if settings.PLACES_STORAGE_BACKEND == "sqlite":
+            from app.data.places_sqlite_storage import SqlitePlacesStorage
+            _storage = SqlitePlacesStorage(
+                settings.DATABASE_URL,
+                cache_size=settings.PLACES_READ_CACHE_SIZE,
+                cache_check_interval_ms=settings.PLACES_CACHE_CHECK_INTERVAL_MS
+            )
+            _storage.migrate_from_json(settings.PLACES_DATA_DIR)
+        else:
+            _storage = PlacesStorage(settings.PLACES_DATA_DIR)
+        
+        if settings.PLACES_WRITE_BEHIND:
+            from app.data.places_write_buffer import PlacesWriteBuffer
+            _storage = PlacesWriteBuffer(
+                _storage,
+                settings.PLACES_JOURNAL_FILE,
+                batch_size=settings.PLACES_FLUSH_BATCH_SIZE,
+                flush_interval_sec=settings.PLACES_FLUSH_INTERVAL_SEC,
+                fsync=settings.PLACES_JOURNAL_FSYNC
+            )
     return _storage
@@ -0,0 +1,436 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+from app.data.places_storage import initial_review_uid, newest_reviews
+
+try:
+    import fcntl
+except ImportError:  # Windows: один процесс, журналы без блокировок
+    fcntl = None
+
+
+class PlacesWriteBuffer:
+    """Write-behind поверх хранилища мест (JSON или SQLite).
+
+    Изменения сразу видны из памяти и дописываются строкой в журнал,
+    в хранилище они уходят пачкой — по размеру или по времени. Журнал
+    переигрывается при старте, поэтому падение процесса ничего не теряет;
+    отзывы пишутся в хранилище идемпотентно по uid. Пересчёт оценок
+    по отзыву (update_place_accessibility) буфер не копит — он сразу
+    идёт в хранилище, иначе процессы перетирали бы агрегаты друг друга.
+
+    У каждого процесса (воркера uvicorn) свой журнал journal.<pid>.jsonl
+    под flock. При старте переигрываются только журналы, которые никто
+    не держит, — то есть оставшиеся от упавших процессов.
+    """
+
+    def __init__(
+        self,
+        backend,
+        journal_file: str,
+        batch_size: int = 500,
+        flush_interval_sec: float = 2.0,
+        fsync: bool = False
+    ):
+        self.backend = backend
+        self.base_journal_path = Path(journal_file)
+        pid = os.getpid()
+        self.journal_path = self.base_journal_path.with_name(f"{self.base_journal_path.stem}.{pid}.jsonl")
+        self.flushing_path = self.base_journal_path.with_name(f"{self.base_journal_path.stem}.{pid}.flushing.jsonl")
+        self.batch_size = batch_size
+        self.flush_interval_sec = flush_interval_sec
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = self._empty_batch()
+        self._flushing: Optional[Dict[str, Any]] = None
+        self._pending_count = 0
+        self._first_pending_at: Optional[float] = None
+        self._flusher_running = False
+
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        self._replay_orphaned_journals()
+        self._journal = self._create_journal()
+
+    @staticmethod
+    def _empty_batch() -> Dict[str, Any]:
+        return {"accessibility": {}, "reviews": {}}
+
+    def get_place_accessibility(self, place_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            buffered = self._buffered_accessibility(place_id)
+        return buffered if buffered is not None else self.backend.get_place_accessibility(place_id)
+
+    def get_places_accessibility(self, place_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        with self._lock:
+            for batch in (self._flushing, self._pending):
+                if batch:
+                    result.update(
+                        (place_id, batch["accessibility"][place_id])
+                        for place_id in place_ids if place_id in batch["accessibility"]
+                    )
+        missing = [place_id for place_id in place_ids if place_id not in result]
+        if missing:
+            result.update(self.backend.get_places_accessibility(missing))
+        return result
+
+    def get_places_review_summaries(self, place_ids: List[str], top_n: int) -> Dict[str, Dict[str, Any]]:
+        summaries = self.backend.get_places_review_summaries(place_ids, top_n)
+        for place_id in place_ids:
+            buffered = self._buffered_reviews(place_id)
+            if buffered:
+                summary = summaries[place_id]
+                summaries[place_id] = {
+                    "count": summary["count"] + len(buffered),
+                    "reviews": newest_reviews(summary["reviews"] + buffered)[:top_n]
+                }
+        return summaries
+
+    def get_place_reviews_page(
+        self,
+        place_id: str,
+        before: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        reviews = self.backend.get_place_reviews_page(place_id, before, limit)
+        buffered = self._buffered_reviews(place_id)
+        if before:
+            buffered = [review for review in buffered if (review["date"], review["id"]) < tuple(before)]
+        return newest_reviews(reviews + buffered)[:limit] if buffered else reviews
+
+    def save_places_data(
+        self,
+        accessibility: Dict[str, Dict[str, Any]],
+        reviews: Dict[str, List[Dict[str, Any]]]
+    ) -> bool:
+        """Доступность и отзывы новых мест — одна пачка в журнал.
+
+        uid отзывов детерминированы: уже лежащие в буфере не дублируются,
+        а при записи в хранилище повтор отбрасывается по uid.
+        """
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            for place_id, data in accessibility.items():
+                data = {**data, "updated_at": now}
+                self._journal_write({"op": "accessibility", "place_id": place_id, "data": data}, sync=False)
+                self._pending["accessibility"][place_id] = data
+                self._mark_pending()
+
+            for place_id, place_reviews in reviews.items():
+                buffered_uids = {
+                    uid
+                    for batch in (self._flushing, self._pending) if batch
+                    for _, uid in batch["reviews"].get(place_id, [])
+                }
+                count = len(self._buffered_reviews_locked(place_id))
+                for i, review in enumerate(place_reviews):
+                    review["id"] = f"review_{count + i + 1}"
+                    review["date"] = now
+                    uid = initial_review_uid(place_id, i + 1)
+                    if uid in buffered_uids:
+                        continue
+                    self._journal_write({"op": "review", "place_id": place_id, "review": review, "uid": uid}, sync=False)
+                    self._pending["reviews"].setdefault(place_id, []).append((review, uid))
+                    self._mark_pending()
+            self._sync_journal()
+        self._maybe_flush()
+        return True
+
+    def save_place_accessibility(self, place_id: str, accessibility_data: Dict[str, Any]) -> bool:
+        """Сохранить данные о доступности места"""
+        data = {
+            **accessibility_data,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            self._journal_write({"op": "accessibility", "place_id": place_id, "data": data})
+            self._pending["accessibility"][place_id] = data
+            self._mark_pending()
+        self._maybe_flush()
+        return True
+
+    def update_place_accessibility(
+        self,
+        place_id: str,
+        update: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]
+    ) -> bool:
+        """Изменить доступность места сразу в хранилище, минуя буфер.
+
+        Полная запись из пачки перетёрла бы изменения других процессов,
+        поэтому чтение и запись идут одной операцией хранилища (в SQLite —
+        транзакция BEGIN IMMEDIATE). Ещё не записанная версия места
+        из буфера учитывается, если она новее сохранённой.
+        """
+        with self._flush_lock:
+            with self._lock:
+                staged = self._pending["accessibility"].pop(place_id, None)
+                if staged is not None:
+                    self._unmark_pending()
+
+            def merged_update(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+                if staged and (not current or staged["updated_at"] >= current.get("updated_at", "")):
+                    current = staged
+                return update(current)
+
+            success = self.backend.update_place_accessibility(place_id, merged_update)
+            if not success and staged:
+                with self._lock:
+                    if place_id not in self._pending["accessibility"]:
+                        self._pending["accessibility"][place_id] = staged
+                        self._mark_pending()
+            return success
+
+    def get_place_reviews(self, place_id: str) -> List[Dict[str, Any]]:
+        """Получить отзывы о месте"""
+        return self.backend.get_place_reviews(place_id) + self._buffered_reviews(place_id)
+
+    def add_place_review(self, place_id: str, review: Dict[str, Any]) -> bool:
+        """Добавить отзыв о месте.
+
+        Номер считается по хранилищу и буферу, а не по счётчику в памяти:
+        отзывы других процессов видны сразу. Если номер всё же займут
+        параллельно, write_batch выдаст следующий свободный.
+        """
+        stored = self.backend.get_places_review_summaries([place_id], 0)[place_id]["count"]
+        with self._lock:
+            count = stored + len(self._buffered_reviews_locked(place_id))
+            review["id"] = f"review_{count + 1}"
+            review["date"] = datetime.utcnow().isoformat()
+
+            uid = uuid.uuid4().hex
+            self._journal_write({"op": "review", "place_id": place_id, "review": review, "uid": uid})
+            self._pending["reviews"].setdefault(place_id, []).append((review, uid))
+            self._mark_pending()
+        self._maybe_flush()
+        return True
+
+    def has_place_data(self, place_id: str) -> bool:
+        """Проверить есть ли данные о месте"""
+        with self._lock:
+            for batch in (self._pending, self._flushing):
+                if batch and (place_id in batch["accessibility"] or place_id in batch["reviews"]):
+                    return True
+        return self.backend.has_place_data(place_id)
+
+    def save_places(self, places: List[Dict[str, Any]]) -> bool:
+        """Места из выдачи 2GIS пишутся сразу: новых мало, и они не в горячем пути"""
+        return self.backend.save_places(places)
+
+    def get_place(self, place_id: str) -> Optional[Dict[str, Any]]:
+        return self.backend.get_place(place_id)
+
+    def get_places_seen_after(self, seen_after: str) -> List[Dict[str, Any]]:
+        return self.backend.get_places_seen_after(seen_after)
+
+    def flush(self) -> bool:
+        """Записать накопленные изменения в хранилище одной пачкой"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending_count:
+                    return True
+                self._flushing = self._pending
+                self._pending = self._empty_batch()
+                count = self._pending_count
+                self._pending_count = 0
+                self._first_pending_at = None
+
+                # Старый дескриптор держит flock, пока пачка не записана
+                flushing_journal = self._journal
+                os.replace(self.journal_path, self.flushing_path)
+                self._journal = self._create_journal()
+
+            started = time.perf_counter()
+            success = self.backend.write_batch(
+                self._flushing["accessibility"],
+                self._flatten_reviews(self._flushing["reviews"])
+            )
+
+            with self._lock:
+                if success:
+                    self.flushing_path.unlink(missing_ok=True)
+                else:
+                    self._restore_failed_batch(count)
+                flushing_journal.close()
+                self._flushing = None
+
+        if success:
+            print(f"💾 [PLACES] Записано {count} изменений за {(time.perf_counter() - started) * 1000:.0f} мс")
+        else:
+            print(f"⚠️ [PLACES] Не удалось записать {count} изменений, повторим позже")
+        return success
+
+    async def run_flusher(self, poll_interval_sec: float = 0.2) -> None:
+        """Фоновый сброс буфера: по размеру пачки или по flush_interval_sec"""
+        self._flusher_running = True
+        try:
+            while True:
+                await asyncio.sleep(poll_interval_sec)
+                if self._flush_due():
+                    await asyncio.to_thread(self.flush)
+        finally:
+            self._flusher_running = False
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if not self._pending_count:
+                self.journal_path.unlink(missing_ok=True)
+            self._journal.close()
+
+    def _flush_due(self) -> bool:
+        if not self._pending_count:
+            return False
+        if self._pending_count >= self.batch_size:
+            return True
+        return time.monotonic() - self._first_pending_at >= self.flush_interval_sec
+
+    def _maybe_flush(self) -> None:
+        # Без фонового сброса (скрипты, тесты) пачку по размеру пишем сразу
+        if not self._flusher_running and self._pending_count >= self.batch_size:
+            self.flush()
+
+    def _mark_pending(self) -> None:
+        self._pending_count += 1
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+
+    def _unmark_pending(self) -> None:
+        self._pending_count -= 1
+        if not self._pending_count:
+            self._first_pending_at = None
+
+    def _buffered_accessibility(self, place_id: str) -> Optional[Dict[str, Any]]:
+        """Ещё не записанная доступность места; вызывать под self._lock"""
+        for batch in (self._pending, self._flushing):
+            if batch and place_id in batch["accessibility"]:
+                return batch["accessibility"][place_id]
+        return None
+
+    def _buffered_reviews(self, place_id: str) -> List[Dict[str, Any]]:
+        """Ещё не записанные в хранилище отзывы места, от старых к новым"""
+        with self._lock:
+            return self._buffered_reviews_locked(place_id)
+
+    def _buffered_reviews_locked(self, place_id: str) -> List[Dict[str, Any]]:
+        return [
+            review
+            for batch in (self._flushing, self._pending) if batch
+            for review, _ in batch["reviews"].get(place_id, [])
+        ]
+
+    def _journal_write(self, entry: Dict[str, Any], sync: bool = True) -> None:
+        self._journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if sync:
+            self._sync_journal()
+
+    def _sync_journal(self) -> None:
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def _restore_failed_batch(self, count: int) -> None:
+        """Вернуть неудачную пачку в буфер перед более новыми изменениями"""
+        failed, newer = self._flushing, self._pending
+        failed["accessibility"].update(newer["accessibility"])
+        for place_id, reviews in newer["reviews"].items():
+            failed["reviews"].setdefault(place_id, []).extend(reviews)
+        self._pending = failed
+        self._pending_count += count
+        self._first_pending_at = time.monotonic()
+
+        lines = self._read_journal_lines(self.flushing_path) + self._read_journal_lines(self.journal_path)
+        journal = self._create_journal(lines)
+        self.flushing_path.unlink(missing_ok=True)
+        self._journal.close()
+        self._journal = journal
+
+    def _create_journal(self, lines: List[str] = ()):
+        """Новый журнал процесса; под своим именем он появляется уже под flock"""
+        temp_path = self.journal_path.with_suffix(".tmp")
+        journal = open(temp_path, "w", encoding="utf-8")
+        if fcntl:
+            fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        journal.writelines(lines)
+        journal.flush()
+        os.replace(temp_path, self.journal_path)
+        return journal
+
+    def _replay_orphaned_journals(self) -> None:
+        """Применить журналы упавших процессов (и journal.jsonl прежнего формата).
+
+        Свои journal.<pid> тоже применяются: после перезапуска контейнера
+        pid нового процесса может совпасть с pid упавшего.
+        """
+        stem = self.base_journal_path.stem
+        paths = list(self.base_journal_path.parent.glob(f"{stem}.*.jsonl"))
+        # .flushing того же процесса старше его основного журнала
+        paths.sort(key=lambda path: (path.name.replace(".flushing", ""), ".flushing" not in path.name))
+        if self.base_journal_path.exists():
+            paths.insert(0, self.base_journal_path)
+
+        for path in paths:
+            try:
+                journal = open(path, "r", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            try:
+                if fcntl:
+                    try:
+                        fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        # Журнал живого воркера
+                        continue
+                    # Пока ждали, журнал мог применить и удалить другой процесс
+                    if not path.exists() or os.stat(path).st_ino != os.fstat(journal.fileno()).st_ino:
+                        continue
+                self._replay_journal(path)
+                path.unlink(missing_ok=True)
+            finally:
+                journal.close()
+
+    def _replay_journal(self, path: Path) -> None:
+        batch = self._empty_batch()
+        entries = 0
+        for line in self._read_journal_lines(path):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Недописанная последняя строка при падении
+                continue
+            if entry["op"] == "accessibility":
+                batch["accessibility"][entry["place_id"]] = entry["data"]
+            else:
+                review = entry["review"]
+                uid = entry.get("uid") or f"{entry['place_id']}/{review['id']}"
+                batch["reviews"].setdefault(entry["place_id"], []).append((review, uid))
+            entries += 1
+
+        if entries:
+            if not self.backend.write_batch(batch["accessibility"], self._flatten_reviews(batch["reviews"])):
+                raise RuntimeError(f"Не удалось применить журнал {path}")
+            print(f"✅ [PLACES] Применено {entries} изменений из журнала {path}")
+
+    def _read_journal_lines(self, path: Path) -> List[str]:
+        if not path.exists():
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return [line if line.endswith("\n") else line + "\n" for line in f if line.strip()]
+
+    def _flatten_reviews(
+        self,
+        reviews: Dict[str, List[Tuple[Dict[str, Any], str]]]
+    ) -> List[Tuple[str, Dict[str, Any], str]]:
+        return [
+            (place_id, review, uid)
+            for place_id, place_reviews in reviews.items()
+            for review, uid in place_reviews
+        ]
@@ -1,8 +1,45 @@
 import json
+import threading
 from typing import List, Dict, Tuple, Optional
 from pathlib import Path
 
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
 from app.const import USE_REAL_DATA
+from app.core.config import settings
+from app.data.cost_grid import CostGrid
+
+
+LAYER_METRIC_KEYS = {
+    "noise": "noise_db",
+    "crowd": "crowd_level",
+    "light": "light_lux",
+    "puddles": "puddles"
+}
+
+
+class LayerSnapshot:
+    """Согласованное состояние слоёв: полигоны, индексы, значения, сетки и версии.
+
+    При перезагрузке слоя собирается новый снимок и подменяется целиком,
+    так что читатели никогда не видят индекс одной версии с полигонами другой.
+    """
+    
+    def __init__(
+        self,
+        polygons_by_layer: Dict[str, List[Dict]],
+        index_by_layer: Dict[str, STRtree],
+        values_by_layer: Dict[str, np.ndarray],
+        grid_by_layer: Dict[str, CostGrid],
+        layer_versions: Dict[str, int]
+    ):
+        self.polygons_by_layer = polygons_by_layer
+        self.index_by_layer = index_by_layer
+        self.values_by_layer = values_by_layer
+        self.grid_by_layer = grid_by_layer
+        self.layer_versions = layer_versions
 
 
 class PolygonLoader:
@@ -16,13 +53,121 @@ class PolygonLoader:
             "puddles": "app/data/polygons_puddles.json"
         }
         
-        self.polygons_by_layer = {}
+        polygons_by_layer = {}
         for layer_type, file_path in self.layer_files.items():
             if layer_type == "light" and self.gis_service:
                 print(f"✅ [LIGHT] Будет использоваться 2GIS API для поиска ТЦ")
-                self.polygons_by_layer[layer_type] = []
+                polygons_by_layer[layer_type] = []
+            else:
+                polygons_by_layer[layer_type] = self._load_data(file_path, layer_type)
+        
+        self._reload_lock = threading.Lock()
+        self._snapshot = self._build_snapshot(polygons_by_layer, {layer_type: 0 for layer_type in self.layer_files})
+    
+    @property
+    def snapshot(self) -> LayerSnapshot:
+        return self._snapshot
+    
+    @property
+    def polygons_by_layer(self) -> Dict[str, List[Dict]]:
+        return self._snapshot.polygons_by_layer
+    
+    @property
+    def index_by_layer(self) -> Dict[str, STRtree]:
+        return self._snapshot.index_by_layer
+    
+    @property
+    def values_by_layer(self) -> Dict[str, np.ndarray]:
+        return self._snapshot.values_by_layer
+    
+    @property
+    def grid_by_layer(self) -> Dict[str, CostGrid]:
+        return self._snapshot.grid_by_layer
+    
+    @property
+    def layer_versions(self) -> Dict[str, int]:
+        return self._snapshot.layer_versions
+    
+    def reload_layer(self, layer_type: str) -> int:
+        """Перечитать слой из файла, пересобрать индекс и сетки; возвращает новую версию слоя.
+
+        Долгая операция — из async-кода вызывать через asyncio.to_thread.
+        """
+        if layer_type not in self.layer_files:
+            raise ValueError(f"Неизвестный слой: {layer_type}")
+        
+        with self._reload_lock:
+            previous = self._snapshot
+            polygons_by_layer = {
+                **previous.polygons_by_layer,
+                layer_type: self._load_data(self.layer_files[layer_type], layer_type)
+            }
+            layer_versions = {**previous.layer_versions, layer_type: previous.layer_versions[layer_type] + 1}
+            self._snapshot = self._build_snapshot(polygons_by_layer, layer_versions, previous)
+        
+        print(f"🔄 [{layer_type.upper()}] Слой перезагружен, версия {layer_versions[layer_type]}")
+        return layer_versions[layer_type]
+    
+    def _build_snapshot(
+        self,
+        polygons_by_layer: Dict[str, List[Dict]],
+        layer_versions: Dict[str, int],
+        previous: Optional[LayerSnapshot] = None
+    ) -> LayerSnapshot:
+        index_by_layer = {}
+        values_by_layer = {}
+        for layer_type, polygons in polygons_by_layer.items():
+            if previous and previous.polygons_by_layer.get(layer_type) is polygons:
+                index_by_layer[layer_type] = previous.index_by_layer[layer_type]
+                values_by_layer[layer_type] = previous.values_by_layer[layer_type]
             else:
-                self.polygons_by_layer[layer_type] = self._load_data(file_path, layer_type)
+                index_by_layer[layer_type], values_by_layer[layer_type] = self._build_index(layer_type, polygons)
+        
+        grid_by_layer = {}
+        if settings.COST_GRID_ENABLED:
+            grid_by_layer = self._build_cost_grids(polygons_by_layer, index_by_layer, values_by_layer)
+        
+        return LayerSnapshot(polygons_by_layer, index_by_layer, values_by_layer, grid_by_layer, layer_versions)
+    
+    def _build_index(self, layer_type: str, polygons: List[Dict]) -> Tuple[STRtree, np.ndarray]:
+        shapes = []
+        for polygon in polygons:
+            try:
+                shapes.append(shapely.Polygon(polygon["coordinates"]))
+            except Exception as e:
+                print(f"⚠️ [{layer_type.upper()}] Ошибка создания полигона {polygon.get('id')}: {e}")
+                shapes.append(shapely.Polygon())
+        
+        metric_key = LAYER_METRIC_KEYS[layer_type]
+        values = np.array(
+            [float(polygon.get("metrics", {}).get(metric_key) or 0) for polygon in polygons],
+            dtype=np.float64
+        )
+        return STRtree(shapes), values
+    
+    def _build_cost_grids(
+        self,
+        polygons_by_layer: Dict[str, List[Dict]],
+        index_by_layer: Dict[str, STRtree],
+        values_by_layer: Dict[str, np.ndarray]
+    ) -> Dict[str, CostGrid]:
+        layers = [layer_type for layer_type, polygons in polygons_by_layer.items() if polygons]
+        if not layers:
+            return {}
+        
+        bounds = shapely.total_bounds(np.concatenate([index_by_layer[layer_type].geometries for layer_type in layers]))
+        cells = CostGrid.cell_count(tuple(bounds), settings.COST_GRID_RESOLUTION_M)
+        if cells > settings.COST_GRID_MAX_CELLS:
+            print(f"⚠️ [GRID] Сетка {cells} ячеек больше лимита {settings.COST_GRID_MAX_CELLS}, используем поиск по полигонам")
+            return {}
+        
+        grid_by_layer = {}
+        for layer_type in layers:
+            grid = CostGrid(tuple(bounds), settings.COST_GRID_RESOLUTION_M, settings.COST_GRID_AGGREGATE)
+            grid.rasterize(index_by_layer[layer_type].geometries, values_by_layer[layer_type])
+            grid_by_layer[layer_type] = grid
+            print(f"✅ [{layer_type.upper()}] Сетка {grid.rows}x{grid.cols} ({settings.COST_GRID_RESOLUTION_M} м)")
+        return grid_by_layer
     
     def _load_data(self, file_path: str, layer_type: str) -> List[Dict]:
         data_file = Path(file_path)
@@ -72,39 +217,36 @@ class PolygonLoader:
         layer_type: str,
         bbox: Tuple[float, float, float, float]
     ) -> List[Dict]:
-        if layer_type not in self.polygons_by_layer:
+        snapshot = self._snapshot
+        if layer_type not in snapshot.polygons_by_layer:
             return []
         
-        polygons_data = self.polygons_by_layer[layer_type]
-        result = []
-        
-        for polygon in polygons_data:
-            if self._intersects_bbox(polygon["coordinates"], bbox):
-                result.append(polygon)
+        lat_min, lon_min, lat_max, lon_max = bbox
+        polygons_data = snapshot.polygons_by_layer[layer_type]
+        indices = snapshot.index_by_layer[layer_type].query(shapely.box(lon_min, lat_min, lon_max, lat_max))
         
-        return result
+        return [polygons_data[i] for i in np.sort(indices)]
     
-    def _intersects_bbox(
-        self, 
-        coords: List[List[float]], 
-        bbox: Tuple[float, float, float, float]
-    ) -> bool:
-        lat_min, lon_min, lat_max, lon_max = bbox
+    def lookup_points(
+        self,
+        layer_type: str,
+        lons: np.ndarray,
+        lats: np.ndarray
+    ) -> np.ndarray:
+        """Значение слоя в каждой точке: из сетки, если она построена, иначе по полигонам (NaN — нет данных)"""
+        snapshot = self._snapshot
+        if layer_type in snapshot.grid_by_layer:
+            return snapshot.grid_by_layer[layer_type].lookup(lons, lats)
         
-        poly_lons = [coord[0] for coord in coords]
-        poly_lats = [coord[1] for coord in coords]
+        result = np.full(len(lons), np.nan)
+        if not snapshot.polygons_by_layer.get(layer_type) or len(lons) == 0:
+            return result
         
-        poly_lon_min = min(poly_lons)
-        poly_lon_max = max(poly_lons)
-        poly_lat_min = min(poly_lats)
-        poly_lat_max = max(poly_lats)
+        points = shapely.points(lons, lats)
+        point_idx, polygon_idx = snapshot.index_by_layer[layer_type].query(points, predicate="intersects")
+        np.fmax.at(result, point_idx, snapshot.values_by_layer[layer_type][polygon_idx])
         
-        return not (
-            poly_lon_max < lon_min or
-            poly_lon_min > lon_max or
-            poly_lat_max < lat_min or
-            poly_lat_min > lat_max
-        )
+        return result
     
     def convert_to_segments(self, polygons: List[Dict]) -> List[Dict]:
         segments = []
@@ -1,9 +1,15 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.api.v1.router import api_router
 from app.core.config import settings
+from app.data.places_storage import get_places_storage
+from app.data.places_write_buffer import PlacesWriteBuffer
+from app.services.calm_route_service import get_calm_route_service
+from app.services.local_router import get_local_router
 
 
 @asynccontextmanager
@@ -11,9 +17,21 @@ async def lifespan(app: FastAPI):
     print("🚀 Запуск Доступ.City API...")
     print(f"📍 Документация доступна: http://localhost:8000/docs")
     
+    places_storage = get_places_storage()
+    flusher = None
+    if isinstance(places_storage, PlacesWriteBuffer):
+        flusher = asyncio.create_task(places_storage.run_flusher())
+    
+    get_calm_route_service().refresh_obstacle_tiles()
+    # Граф города и значения слоёв на рёбрах грузятся секундами — не в event loop
+    await asyncio.to_thread(get_local_router)
+    
     yield
     
     print("👋 Остановка API...")
+    if flusher:
+        flusher.cancel()
+        await asyncio.to_thread(places_storage.close)
 
 
 app = FastAPI(
@@ -42,7 +42,8 @@ class Place(BaseModel):
     accessibility_conditions: List[AccessibilityCondition] = Field(
         ..., description="Доступные условия и их рейтинги"
     )
-    reviews: List[Review] = Field(default_factory=list, description="Отзывы")
+    reviews: List[Review] = Field(default_factory=list, description="Последние отзывы, остальные — GET /places/{id}/reviews")
+    reviews_count: int = Field(0, ge=0, description="Всего отзывов")
     overall_rating: float = Field(..., ge=0, le=5, description="Общий рейтинг")
 
 
@@ -55,6 +56,11 @@ class PlaceSearchRequest(BaseModel):
     )
 
 
+class ReviewsPage(BaseModel):
+    reviews: List[Review] = Field(..., description="Отзывы от новых к старым")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы, None — страниц больше нет")
+
+
 class PlaceSearchResponse(BaseModel):
     places: List[Place] = Field(..., description="Найденные места")
     
@@ -1,6 +1,12 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 from datetime import datetime
+from enum import Enum
+
+
+class RoutingEngine(str, Enum):
+    DGIS = "2gis"
+    LOCAL = "local"
 
 
 class Location(BaseModel):
@@ -33,6 +39,13 @@ class CalmRouteRequest(BaseModel):
     end: Location
     profile: RouteProfile = Field(default_factory=RouteProfile)
     alternatives: int = Field(3, ge=1, le=5, description="Количество альтернатив")
+    engine: RoutingEngine = Field(RoutingEngine.DGIS, description="Движок маршрутизации: 2gis или local")
+
+class RouteMatrixRequest(BaseModel):
+    points: List[Location] = Field(..., min_length=2, max_length=10, description="Точки (все пары)")
+    profile: RouteProfile = Field(default_factory=RouteProfile)
+    engine: RoutingEngine = Field(RoutingEngine.DGIS, description="Движок маршрутизации: 2gis или local")
+
 
 class RouteMetrics(BaseModel):
     """Метрики маршрута"""
@@ -40,6 +53,8 @@ class RouteMetrics(BaseModel):
     duration_min: int = Field(..., description="Время в пути (минуты)")
     avg_noise_db: float = Field(..., description="Средний уровень шума")
     avg_crowd: float = Field(..., ge=1, le=5, description="Средний уровень толпы")
+    noise_above_threshold_m: int = Field(0, description="Метров с шумом выше порога")
+    crowd_above_threshold_m: int = Field(0, description="Метров с толпой выше порога")
 
 
 class RouteExplanation(BaseModel):
@@ -71,9 +86,20 @@ class Route(BaseModel):
     warnings: List[RouteWarning] = []
 
 
+class RerouteIteration(BaseModel):
+    """Одна попытка перестроения маршрута"""
+    attempt: int
+    strategy: Optional[str] = Field(None, description="Стратегия обхода")
+    duration_ms: float = Field(..., description="Время запроса к 2GIS (мс)")
+    excluded_polygons: int = Field(..., description="Сколько полигонов исключили")
+    hit_polygons: int = Field(..., description="Сколько препятствий задел маршрут")
+    status: str = Field(..., description="ok/failed/timeout")
+
+
 class CalmRouteResponse(BaseModel):
     """Ответ со спокойными маршрутами"""
     routes: List[Route] = Field(..., description="Список доступных маршрутов")
+    iterations: List[RerouteIteration] = Field(default_factory=list, description="Попытки перестроения")
     generated_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Config:
@@ -107,3 +133,43 @@ class CalmRouteResponse(BaseModel):
             }
         }
 
+
+
+class RouteMatrixCell(BaseModel):
+    """Маршрут между парой точек матрицы"""
+    origin: int = Field(..., description="Индекс начальной точки")
+    destination: int = Field(..., description="Индекс конечной точки")
+    metrics: Optional[RouteMetrics] = Field(None, description="Нет, если маршрут не построен")
+    calm_score: Optional[float] = Field(None, ge=0, le=10)
+
+
+class RouteMatrixResponse(BaseModel):
+    """Матрица спокойных расстояний"""
+    cells: List[RouteMatrixCell]
+    generated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class IsochroneRequest(BaseModel):
+    start: Location
+    budgets_min: List[int] = Field([5, 10, 15], min_length=1, max_length=5, description="Бюджеты времени (минуты)")
+    profile: RouteProfile = Field(default_factory=RouteProfile)
+
+
+class IsochroneGeometry(BaseModel):
+    """GeoJSON геометрия зоны доступности"""
+    type: str = "MultiPolygon"
+    coordinates: List[List[List[List[float]]]]
+
+
+class IsochroneContour(BaseModel):
+    """Зона, достижимая за бюджет времени без нарушения фильтров профиля"""
+    budget_min: int
+    geometry: IsochroneGeometry
+    area_m2: int = Field(..., description="Площадь зоны")
+
+
+class IsochroneResponse(BaseModel):
+    """Изохроны спокойной доступности"""
+    contours: List[IsochroneContour]
+    method: str = Field(..., description="graph — по пешеходному графу, grid — по сетке слоёв")
+    generated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,32 @@
+# coding: utf-8
+import argparse
+import time
+
+from app.core.config import settings
+from app.data.pedestrian_graph import PedestrianGraph
+from app.data.graph_landmarks import GraphLandmarks, landmarks_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute ALT landmarks for the local pedestrian graph")
+    parser.add_argument("--graph", default=settings.LOCAL_GRAPH_FILE, help="OSM XML extract")
+    parser.add_argument("--count", type=int, default=settings.LOCAL_ROUTING_LANDMARKS, help="Number of landmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    graph = PedestrianGraph.load(args.graph)
+    if graph is None:
+        print(f"Error: graph {args.graph} not found!")
+        return
+
+    started_at = time.perf_counter()
+    landmarks = GraphLandmarks.build(graph, count=args.count, seed=args.seed)
+
+    output_file = landmarks_path(args.graph)
+    landmarks.save(output_file)
+
+    print(f"Saved {args.count} landmarks to {output_file} in {time.perf_counter() - started_at:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# coding: utf-8
+import argparse
+import json
+import math
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from app.schemas.places import AccessibilityFilter
+from app.services.accessibility_generator import AccessibilityGenerator
+from app.services.accessibility_mask import FILTER_BITS
+from app.services.rating_aggregator import RatingAggregator
+
+
+LAYERS = ["noise", "crowd", "light", "puddles"]
+
+REVIEW_AUTHORS = ["Анна С.", "Михаил М.", "Елена К.", "Дмитрий В.", "Ольга П."]
+REVIEW_TEXTS = [
+    "Отличное место, очень доступно! Есть пандус и широкие проходы",
+    "Хорошая атмосфера, но шумно. Нет индукционной петли",
+    "Прекрасное обслуживание, рекомендую. Все условия доступности соблюдены",
+    "Уютно и тихо, идеально для работы. Мягкое освещение, низкий уровень шума",
+    "Дорого, но качественно. Есть аудиогиды и Брайль"
+]
+
+# Рубрика 2GIS для каждого типа места генератора доступности
+RUBRIC_NAMES = {
+    "restaurant": "Кафе",
+    "museum": "Музей",
+    "park": "Парк",
+    "library": "Библиотека",
+    "shopping_center": "Торговый центр",
+    "medical": "Поликлиника",
+    "bank": "Банк"
+}
+
+BASE_DATE = datetime(2025, 1, 1)
+CHUNK_SIZE = 50_000
+PLACE_ID_BASE = 70000001000000000
+
+
+class CityLayout:
+    """Координаты точек вокруг центра: плотность падает от центра, шум выше у «магистралей»"""
+
+    def __init__(self, center_lat: float, center_lon: float, radius_km: float, avenues: int, rng: np.random.Generator):
+        self.center_lat = center_lat
+        self.center_lon = center_lon
+        self.radius_m = radius_km * 1000
+        self.lon_scale = 111000.0 * math.cos(math.radians(center_lat))
+        self.avenue_angles = rng.uniform(0, math.pi, avenues)
+
+    def sample_points(self, rng: np.random.Generator, count: int):
+        radius = self.radius_m * np.sqrt(rng.beta(1.2, 2.0, count))
+        angle = rng.uniform(0, 2 * math.pi, count)
+        x = radius * np.cos(angle)
+        y = radius * np.sin(angle)
+        return x, y
+
+    def avenue_distance(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Расстояние (м) до ближайшей «магистрали» — прямой через центр"""
+        normals = np.stack([-np.sin(self.avenue_angles), np.cos(self.avenue_angles)])
+        return np.abs(np.column_stack([x, y]) @ normals).min(axis=1)
+
+    def to_lon_lat(self, x: np.ndarray, y: np.ndarray):
+        return self.center_lon + x / self.lon_scale, self.center_lat + y / 111000.0
+
+
+def layer_values(layer: str, rng: np.random.Generator, avenue_m: np.ndarray, center_share: np.ndarray) -> np.ndarray:
+    count = len(avenue_m)
+    if layer == "noise":
+        return np.round(np.clip(95 - avenue_m / 25 + rng.normal(0, 6, count), 40, 110), 1)
+    if layer == "crowd":
+        return np.clip(np.round(1 + 4 * (1 - center_share) + rng.normal(0, 0.8, count)), 1, 5).astype(int)
+    if layer == "light":
+        return np.round(np.clip(rng.lognormal(4.3, 0.8, count) * (1.5 - center_share), 0, 1000)).astype(int)
+    return rng.random(count) < 0.35
+
+
+def polygon_chunk(layout: CityLayout, layer: str, rng: np.random.Generator, start: int, count: int, vertices: int):
+    x, y = layout.sample_points(rng, count)
+    avenue_m = layout.avenue_distance(x, y)
+    center_share = np.hypot(x, y) / layout.radius_m
+    values = layer_values(layer, rng, avenue_m, center_share)
+
+    radius = rng.uniform(15, 60, (count, 1)) * rng.uniform(0.7, 1.0, (count, vertices))
+    angle = np.linspace(0, 2 * math.pi, vertices, endpoint=False) + rng.uniform(0, math.pi, (count, 1))
+    lons, lats = layout.to_lon_lat(x[:, None] + radius * np.cos(angle), y[:, None] + radius * np.sin(angle))
+    rings = np.round(np.stack([lons, lats], axis=2), 6).tolist()
+
+    metrics_key = {"noise": "noise_db", "crowd": "crowd_level", "light": "light_lux", "puddles": "puddles"}[layer]
+    for i, ring in enumerate(rings):
+        value = values[i].item()
+        yield {
+            "id": f"{layer}_{start + i}",
+            "coordinates": ring,
+            "metrics": {metrics_key: value}
+        }
+
+
+def write_layer(path: Path, layout: CityLayout, layer: str, count: int, vertices: int, seed: int) -> None:
+    rng = np.random.default_rng([seed, LAYERS.index(layer)])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"polygons": [\n')
+        for start in range(0, count, CHUNK_SIZE):
+            chunk = polygon_chunk(layout, layer, rng, start, min(CHUNK_SIZE, count - start), vertices)
+            lines = [json.dumps(polygon, ensure_ascii=False, separators=(",", ":")) for polygon in chunk]
+            f.write((",\n" if start else "") + ",\n".join(lines))
+        f.write("\n]}\n")
+
+
+def write_places(places_dir: Path, layout: CityLayout, count: int, reviews_per_place: float, seed: int) -> int:
+    rng = np.random.default_rng([seed, len(LAYERS)])
+    # Координаты — отдельным потоком, чтобы доступность и отзывы не зависели от них
+    location_rng = np.random.default_rng([seed, len(LAYERS), 1])
+    generator = AccessibilityGenerator()
+    aggregator = RatingAggregator()
+    place_types = list(generator.rubric_probabilities)
+    filters = [filter_type.value for filter_type in AccessibilityFilter]
+    names = {key: generator.get_condition_name(key) for key in filters}
+    total_reviews = 0
+    reviews_written = False
+
+    seen_at = BASE_DATE.isoformat()
+
+    with open(places_dir / "accessibility.json", "w", encoding="utf-8") as accessibility_file, \
+            open(places_dir / "reviews.json", "w", encoding="utf-8") as reviews_file, \
+            open(places_dir / "places.json", "w", encoding="utf-8") as places_file:
+        accessibility_file.write("{\n")
+        reviews_file.write("{\n")
+        places_file.write("{\n")
+
+        for start in range(0, count, CHUNK_SIZE):
+            size = min(CHUNK_SIZE, count - start)
+            types = rng.integers(len(place_types), size=size)
+            probabilities = np.array([
+                [generator.rubric_probabilities[place_type].get(key, 0.5) for key in filters]
+                for place_type in place_types
+            ])[types]
+            available = rng.random((size, len(filters))) < probabilities
+            masks = available @ np.array([FILTER_BITS[key] for key in filters])
+            ratings = np.round(rng.uniform(3.0, 5.0, (size, len(filters))), 1)
+            updated = rng.integers(0, 365 * 24 * 3600, size)
+            review_counts = rng.poisson(reviews_per_place, size)
+            lons, lats = layout.to_lon_lat(*layout.sample_points(location_rng, size))
+
+            accessibility_lines, review_lines, place_lines = [], [], []
+            for i in range(size):
+                place_id = json.dumps(str(PLACE_ID_BASE + start + i))
+                rubric = RUBRIC_NAMES[place_types[types[i]]]
+                place = {
+                    "id": str(PLACE_ID_BASE + start + i),
+                    "name": f"{rubric} №{start + i + 1}",
+                    "latitude": round(lats[i].item(), 6),
+                    "longitude": round(lons[i].item(), 6),
+                    "address": "",
+                    "rubrics": [{"name": rubric}],
+                    "address_comment": "",
+                    "seen_at": seen_at
+                }
+                place_lines.append(f"{place_id}: {json.dumps(place, ensure_ascii=False)}")
+                conditions = [
+                    {"filter_type": key, "name": names[key], "rating": ratings[i, j].item()}
+                    for j, key in enumerate(filters) if available[i, j]
+                ]
+                updated_at = (BASE_DATE + timedelta(seconds=int(updated[i]))).isoformat()
+                entry = {
+                    "accessibility_conditions": conditions,
+                    "rating_aggregates": aggregator.from_ratings(
+                        {condition["filter_type"]: condition["rating"] for condition in conditions}, updated_at
+                    ),
+                    "filter_mask": int(masks[i]),
+                    "overall_rating": generator.calculate_overall_rating(conditions),
+                    "updated_at": updated_at
+                }
+                accessibility_lines.append(f"{place_id}: {json.dumps(entry, ensure_ascii=False)}")
+
+                n_reviews = int(review_counts[i])
+                if n_reviews:
+                    picks = rng.integers(len(REVIEW_TEXTS), size=n_reviews)
+                    stars = rng.integers(1, 6, size=n_reviews)
+                    dates = np.sort(rng.integers(0, 365 * 24 * 3600, size=n_reviews))
+                    reviews = [
+                        {
+                            "author": REVIEW_AUTHORS[picks[k] % len(REVIEW_AUTHORS)],
+                            "rating": int(stars[k]),
+                            "text": REVIEW_TEXTS[picks[k]],
+                            "id": f"review_{k + 1}",
+                            "date": (BASE_DATE + timedelta(seconds=int(dates[k]))).isoformat()
+                        }
+                        for k in range(n_reviews)
+                    ]
+                    review_lines.append(f"{place_id}: {json.dumps(reviews, ensure_ascii=False)}")
+                    total_reviews += n_reviews
+
+            if accessibility_lines:
+                accessibility_file.write((",\n" if start else "") + ",\n".join(accessibility_lines))
+                places_file.write((",\n" if start else "") + ",\n".join(place_lines))
+            if review_lines:
+                reviews_file.write((",\n" if reviews_written else "") + ",\n".join(review_lines))
+                reviews_written = True
+
+        accessibility_file.write("\n}\n")
+        reviews_file.write("\n}\n")
+        places_file.write("\n}\n")
+
+    return total_reviews
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded city-scale dataset for benchmarks and load tests")
+    parser.add_argument("--output-dir", default="synthetic_city", help="Layout matches app/data: polygons_*.json and places/")
+    parser.add_argument("--polygons", type=int, default=10_000, help="Polygons per layer")
+    parser.add_argument("--vertices", type=int, default=8, help="Vertices per polygon")
+    parser.add_argument("--places", type=int, default=10_000)
+    parser.add_argument("--reviews-per-place", type=float, default=3.0, help="Mean of a Poisson distribution")
+    parser.add_argument("--center", type=float, nargs=2, default=[55.7558, 37.6173], metavar=("LAT", "LON"))
+    parser.add_argument("--radius-km", type=float, default=15.0)
+    parser.add_argument("--avenues", type=int, default=12, help="Number of loud radial avenues")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    places_dir = output_dir / "places"
+    places_dir.mkdir(parents=True, exist_ok=True)
+
+    layout = CityLayout(args.center[0], args.center[1], args.radius_km, args.avenues, np.random.default_rng(args.seed))
+
+    for layer in LAYERS:
+        started_at = time.perf_counter()
+        path = output_dir / f"polygons_{layer}.json"
+        write_layer(path, layout, layer, args.polygons, args.vertices, args.seed)
+        print(f"Saved {args.polygons} {layer} polygons to {path} in {time.perf_counter() - started_at:.1f}s")
+
+    started_at = time.perf_counter()
+    total_reviews = write_places(places_dir, layout, args.places, args.reviews_per_place, args.seed)
+    print(f"Saved {args.places} places and {total_reviews} reviews to {places_dir} in {time.perf_counter() - started_at:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
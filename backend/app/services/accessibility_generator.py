@@ -1,9 +1,43 @@
-import random
-from typing import Dict, List, Any, Tuple
+import hashlib
+from typing import Dict, List, Any
+
+import numpy as np
+
 from app.schemas.places import AccessibilityFilter
+from app.services.rating_aggregator import get_rating_aggregator
+from app.services.accessibility_mask import FILTER_BITS
+
+
+FILTER_KEYS = [filter_type.value for filter_type in AccessibilityFilter]
+
+# Синтетические оценки считаются выставленными в этот момент — данные
+# не зависят от времени генерации, а при затухании уступают настоящим отзывам
+SYNTHETIC_RATED_AT = "2025-01-01T00:00:00"
+
+
+def place_seeds(place_ids: List[str]) -> np.ndarray:
+    """64-битный seed из blake2b(id): одинаков во всех процессах, в отличие от hash()"""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(str(place_id).encode(), digest_size=8).digest(), "little") for place_id in place_ids],
+        dtype=np.uint64
+    ).reshape(len(place_ids))
+
+
+def seeded_uniforms(seeds: np.ndarray, count: int) -> np.ndarray:
+    """count равномерных чисел [0, 1) на каждый seed (splitmix64 по номеру числа)"""
+    x = seeds[:, None] + np.arange(1, count + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
 
 
 class AccessibilityGenerator:
+    """Синтетические данные о доступности для мест без отзывов.
+
+    Результат зависит только от id и рубрик места, поэтому его не нужно
+    сохранять: любой воркер в любой момент получит те же данные.
+    """
     
     def __init__(self):
         self.rubric_probabilities = {
@@ -99,40 +133,44 @@ class AccessibilityGenerator:
         }
     
     def generate_accessibility_data(self, place_data: Dict[str, Any]) -> Dict[str, Any]:
-        rubrics = place_data.get("rubrics", [])
-        place_type = self._determine_place_type(rubrics)
-        
-        probabilities = self.rubric_probabilities.get(place_type, self.default_probabilities)
-        
-        accessibility_conditions = []
+        return self.generate_batch([place_data])[0]
+    
+    def generate_batch(self, places: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Данные для многих мест за один векторный проход"""
+        if not places:
+            return []
         
-        for filter_type in AccessibilityFilter:
-            filter_key = filter_type.value
-            probability = probabilities.get(filter_key, 0.5)
-            
-            is_available = random.random() < probability
-            
-            if is_available:
-                rating = random.uniform(3.0, 5.0)
-                
-                condition = {
-                    "filter_type": filter_key,
-                    "name": self._get_condition_name(filter_key),
-                    "rating": round(rating, 1)
-                }
-                accessibility_conditions.append(condition)
+        place_types = [self._determine_place_type(place.get("rubrics", [])) for place in places]
+        probability_rows = {
+            place_type: [self.rubric_probabilities.get(place_type, self.default_probabilities).get(key, 0.5) for key in FILTER_KEYS]
+            for place_type in set(place_types)
+        }
+        probabilities = np.array([probability_rows[place_type] for place_type in place_types])
         
-        all_ratings = {}
-        for condition in accessibility_conditions:
-            filter_type = condition["filter_type"]
-            rating = condition["rating"]
-            all_ratings[filter_type] = [rating]
+        uniforms = seeded_uniforms(place_seeds([place["id"] for place in places]), 2 * len(FILTER_KEYS))
+        available = uniforms[:, :len(FILTER_KEYS)] < probabilities
+        ratings = np.round(3.0 + 2.0 * uniforms[:, len(FILTER_KEYS):], 1)
+        masks = available @ np.array([FILTER_BITS[key] for key in FILTER_KEYS], dtype=np.int64)
         
-        return {
-            "accessibility_conditions": accessibility_conditions,
-            "all_ratings": all_ratings,
-            "overall_rating": self._calculate_overall_rating(accessibility_conditions)
-        }
+        names = [self.get_condition_name(key) for key in FILTER_KEYS]
+        aggregator = get_rating_aggregator()
+        results = []
+        for place_available, place_ratings, mask in zip(available.tolist(), ratings.tolist(), masks.tolist()):
+            accessibility_conditions = [
+                {"filter_type": key, "name": name, "rating": rating}
+                for key, name, rating, is_available in zip(FILTER_KEYS, names, place_ratings, place_available)
+                if is_available
+            ]
+            results.append({
+                "accessibility_conditions": accessibility_conditions,
+                "rating_aggregates": aggregator.from_ratings(
+                    {condition["filter_type"]: condition["rating"] for condition in accessibility_conditions},
+                    SYNTHETIC_RATED_AT
+                ),
+                "filter_mask": mask,
+                "overall_rating": self.calculate_overall_rating(accessibility_conditions)
+            })
+        return results
     
     def _determine_place_type(self, rubrics: List[Any]) -> str:
         if not rubrics:
@@ -163,7 +201,8 @@ class AccessibilityGenerator:
         else:
             return "unknown"
     
-    def _get_condition_name(self, filter_key: str) -> str:
+    def get_condition_name(self, filter_key: str) -> str:
+        """Название условия доступности для ответа API"""
         names = {
             "wheelchair_access": "Пандус или лифт",
             "accessible_parking": "Парковка для инвалидов",
@@ -177,7 +216,8 @@ class AccessibilityGenerator:
         }
         return names.get(filter_key, filter_key)
     
-    def _calculate_overall_rating(self, conditions: List[Dict[str, Any]]) -> float:
+    def calculate_overall_rating(self, conditions: List[Dict[str, Any]]) -> float:
+        """Общий рейтинг — среднее по условиям, с одним знаком"""
         if not conditions:
             return 0.0
         
@@ -0,0 +1,32 @@
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+from app.schemas.places import AccessibilityFilter
+
+
+# Бит фильтра — его позиция в AccessibilityFilter; новые фильтры добавлять только в конец
+FILTER_BITS: Dict[str, int] = {filter_type.value: 1 << i for i, filter_type in enumerate(AccessibilityFilter)}
+
+
+def filters_mask(filters: Iterable[str]) -> int:
+    mask = 0
+    for filter_type in filters:
+        mask |= FILTER_BITS.get(filter_type, 0)
+    return mask
+
+
+def conditions_mask(conditions: List[Dict[str, Any]]) -> int:
+    return filters_mask(condition["filter_type"] for condition in conditions)
+
+
+def accessibility_mask(accessibility_data: Dict[str, Any]) -> int:
+    """Маска места; для записей без filter_mask считается по условиям"""
+    if "filter_mask" in accessibility_data:
+        return accessibility_data["filter_mask"]
+    return conditions_mask(accessibility_data.get("accessibility_conditions", []))
+
+
+def match_masks(masks: np.ndarray, required: int) -> np.ndarray:
+    """Какие из мест-кандидатов удовлетворяют всем фильтрам required"""
+    return (masks & required) == required
@@ -1,16 +1,57 @@
-from typing import List, Dict, Tuple, Optional
-from shapely.geometry import Polygon
+import asyncio
+import time
+from datetime import datetime
+from typing import List, Dict, Tuple, Optional, Sequence
+from shapely.geometry import Polygon, LineString
+from shapely.strtree import STRtree
+import numpy as np
 from app.services.gis_service import get_gis_service
 from app.services.map_service import MapService
-from app.schemas.routing import CalmRouteRequest, CalmRouteResponse, Route, RouteMetrics, RouteGeometry, RouteExplanation
+from app.services.exclusion_planner import get_exclusion_planner
+from app.services.exposure_service import get_exposure_service
+from app.services.local_router import get_local_router
+from app.services.route_cache import RouteCache
+from app.services.obstacle_tiles import ObstacleTileIndex
+from app.data.polygon_loader import LAYER_METRIC_KEYS, get_polygon_loader
+from app.services.route_geometry import ParsedRoute, parse_route, parse_route_item
+from app.schemas.routing import (
+    CalmRouteRequest,
+    CalmRouteResponse,
+    Route,
+    RouteMetrics,
+    RouteGeometry,
+    RouteExplanation,
+    RerouteIteration,
+    AvoidOptions,
+    RoutingEngine,
+    RouteProfile,
+    RouteMatrixRequest,
+    RouteMatrixResponse,
+    RouteMatrixCell
+)
 from app.schemas.map_layers import LayerType
+from app.core.config import settings
 
 
 class CalmRouteService:
     
+    STRATEGIES = [
+        {"id": "profile", "name": "Спокойный", "shift": 0, "layers": None},
+        {"id": "strict", "name": "Самый тихий", "shift": -1, "layers": None},
+        {"id": "relaxed", "name": "Сбалансированный", "shift": 1, "layers": None},
+        {"id": "noise_only", "name": "Без шумных улиц", "shift": 0, "layers": [LayerType.NOISE]},
+    ]
+    
     def __init__(self):
         self.gis_service = get_gis_service()
         self.map_service = MapService()
+        self.exclusion_planner = get_exclusion_planner()
+        self.exposure_service = get_exposure_service()
+        self.route_cache = RouteCache(settings.ROUTE_CACHE_SIZE, settings.ROUTE_CACHE_SNAP_DECIMALS)
+        self.matrix_cache = RouteCache(settings.ROUTE_MATRIX_CACHE_SIZE, settings.ROUTE_MATRIX_SNAP_DECIMALS)
+        self.polygon_loader = get_polygon_loader()
+        self.obstacle_tiles = ObstacleTileIndex(settings.OBSTACLE_TILE_SIZE_DEG)
+        self._obstacle_tiles_task: Optional[asyncio.Task] = None
     
     async def build_calm_route(
         self, 
@@ -19,87 +60,601 @@ class CalmRouteService:
         start = (request.start.lat, request.start.lon)
         end = (request.end.lat, request.end.lon)
         
+        cache_key = self.route_cache.make_key(start, end, request.profile, request.engine.value, request.alternatives)
+        cached = self.route_cache.get(cache_key)
+        if cached:
+            print(f"⚡ [CALM ROUTE] Маршрут из кэша: {start} -> {end}")
+            return cached.model_copy(update={"generated_at": datetime.utcnow()})
+        
+        tiles_fresh = self.obstacle_tiles.layer_versions == self.polygon_loader.layer_versions
+        response = await self._compute_calm_route(request, start, end)
+        # Ответ, посчитанный на старых тайлах, не кэшируем под новыми версиями слоёв
+        if tiles_fresh and not any(route.id == "fallback_route" for route in response.routes):
+            self.route_cache.put(cache_key, response)
+        return response
+    
+    async def _compute_calm_route(
+        self,
+        request: CalmRouteRequest,
+        start: Tuple[float, float],
+        end: Tuple[float, float]
+    ) -> CalmRouteResponse:
         print(f"🗺️ [CALM ROUTE] Строим маршрут: {start} -> {end}")
         
-        base_route = await self.gis_service.get_route(
-            start=start,
-            end=end,
-            profile="pedestrian"
-        )
+        if request.engine == RoutingEngine.LOCAL:
+            local_response = await self._build_local_route(request)
+            if local_response:
+                return local_response
+            print(f"⚠️ [CALM ROUTE] Локальный маршрутизатор недоступен, используем 2GIS")
+        
+        base_route = await self._fetch_route(start, end)
         
 
         if not base_route:
+            if request.engine != RoutingEngine.LOCAL:
+                local_response = await self._build_local_route(request)
+                if local_response:
+                    return local_response
             return self._create_fallback_route(request)
-
-        # return self._convert_route_to_response(base_route, request)
         
         bbox = self._get_route_bbox(base_route)
+        tiles = self._current_obstacle_tiles()
         problematic_polygons = await self._find_problematic_polygons(
             bbox, 
-            request
+            request.profile,
+            skip_layers=self._get_tiled_layers(tiles, request.profile)
         )
         
-        if problematic_polygons:
-            print(f"🚫 [CALM ROUTE] Найдено {len(problematic_polygons)} проблемных полигонов")
-            
-            merged_polygons = self._merge_intersecting_polygons(problematic_polygons)
-            print(f"🔗 [CALM ROUTE] Объединено в {len(merged_polygons)} полигонов")
+        obstacle_sets = [
+            self._collect_obstacles(tiles, problematic_polygons, request.profile, strategy, bbox)
+            for strategy in self.STRATEGIES
+        ]
+        
+        base_candidates = [
+            {"strategy": None, "route": {"result": [route_item]}, "iterations": []}
+            for route_item in base_route.get("result", [])
+        ]
+        
+        if not any(obstacle_sets):
+            print(f"✅ [CALM ROUTE] Проблемных полигонов не найдено, используем базовый маршрут")
+            ranked = self._rank_candidates(base_candidates, request)
+            return self._convert_candidates_to_response(ranked[:request.alternatives], request)
+        
+        print(f"🚫 [CALM ROUTE] Найдено {len(problematic_polygons)} проблемных полигонов")
+        
+        runs = [
+            self._start_strategy(strategy, base_route, obstacles)
+            for strategy, obstacles in zip(self.STRATEGIES, obstacle_sets)
+        ]
+        await self._run_strategies(runs, start, end, request)
+    
+        candidates = base_candidates + runs
+        ranked = self._rank_candidates(candidates, request)
+        
+        return self._convert_candidates_to_response(ranked[:request.alternatives], request)
+    
+    async def build_route_matrix(self, request: RouteMatrixRequest) -> RouteMatrixResponse:
+        points = [(point.lat, point.lon) for point in request.points]
+        pairs = [(i, j) for i in range(len(points)) for j in range(len(points)) if i != j]
+        
+        cells = {}
+        missing = []
+        for pair in pairs:
+            cell = self.matrix_cache.get(self._matrix_cache_key(points[pair[0]], points[pair[1]], request))
+            if cell:
+                cells[pair] = cell
+            else:
+                missing.append(pair)
+        
+        print(f"🧮 [MATRIX] {len(points)} точек, {len(pairs)} пар, из кэша {len(pairs) - len(missing)}")
+        
+        if missing:
+            local_router = get_local_router() if request.engine == RoutingEngine.LOCAL else None
+            if local_router:
+                computed = await asyncio.to_thread(self._compute_local_matrix, local_router, points, missing, request.profile)
+            else:
+                computed = await self._compute_upstream_matrix(points, missing, request.profile)
             
+            for pair, cell in computed.items():
+                cells[pair] = cell
+                if cell["metrics"] is not None:
+                    self.matrix_cache.put(self._matrix_cache_key(points[pair[0]], points[pair[1]], request), cell)
+        
+        return RouteMatrixResponse(cells=[
+            RouteMatrixCell(origin=i, destination=j, **cells[(i, j)])
+            for i, j in pairs
+        ])
+    
+    def _matrix_cache_key(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float],
+        request: RouteMatrixRequest
+    ) -> str:
+        return self.matrix_cache.make_key(origin, destination, request.profile, request.engine.value)
+    
+    async def _compute_upstream_matrix(
+        self,
+        points: List[Tuple[float, float]],
+        pairs: List[Tuple[int, int]],
+        profile: RouteProfile
+    ) -> Dict[Tuple[int, int], Dict]:
+        """Одна ячейка — один запрос к 2GIS с исключениями.
+
+        Базовый маршрут пары заранее не запрашиваем: препятствия отбираются
+        по прямой между точками. Если исключения перекрыли все пути и 2GIS
+        ничего не вернул, ячейку считаем по маршруту без исключений —
+        как одиночный маршрут, где базовый всегда остаётся кандидатом.
+        """
+        lats = [lat for lat, _ in points]
+        lons = [lon for _, lon in points]
+        lat_pad = (max(lats) - min(lats)) * 0.1
+        lon_pad = (max(lons) - min(lons)) * 0.1
+        bbox = (min(lats) - lat_pad, min(lons) - lon_pad, max(lats) + lat_pad, max(lons) + lon_pad)
+        
+        tiles = self._current_obstacle_tiles()
+        problematic_polygons = await self._find_problematic_polygons(
+            bbox,
+            profile,
+            skip_layers=self._get_tiled_layers(tiles, profile)
+        )
+        obstacles = self._collect_obstacles(tiles, problematic_polygons, profile, self.STRATEGIES[0], bbox)
+        print(f"🧮 [MATRIX] Общий набор препятствий: {len(obstacles)} полигонов")
+        
+        semaphore = asyncio.Semaphore(settings.ROUTE_MATRIX_MAX_CONCURRENCY)
+        
+        async def compute(pair: Tuple[int, int]) -> Tuple[Tuple[int, int], Dict]:
+            origin, destination = points[pair[0]], points[pair[1]]
+            straight_line = [[origin[1], origin[0]], [destination[1], destination[0]]]
             exclude_polygons = [
                 self.gis_service.create_exclude_polygon(polygon["coordinates"])
-                for polygon in merged_polygons
-            ][:20]
-            print(f"✅ [CALM ROUTE] Исключения: {len(exclude_polygons)} полигонов")
+                for polygon in self.exclusion_planner.plan(obstacles, straight_line)
+            ]
             
-            calm_route = await self.gis_service.get_route(
-                start=start,
-                end=end,
-                profile="pedestrian",
-                exclude_polygons=exclude_polygons
-            )
+            async with semaphore:
+                route = await self._fetch_route(origin, destination, exclude_polygons or None)
+                route_data = route.get("result", []) if route else []
+                if not route_data and exclude_polygons:
+                    route = await self._fetch_route(origin, destination)
+                    route_data = route.get("result", []) if route else []
             
-            if calm_route:
-                print(f"✅ [CALM ROUTE] Построен маршрут с исключениями")
-                return self._convert_route_to_response(calm_route, request)
-            else:
-                print(f"⚠️ [CALM ROUTE] Не удалось построить маршрут с исключениями, используем базовый")
-                return self._convert_route_to_response(base_route, request)
-        else:
-            print(f"✅ [CALM ROUTE] Проблемных полигонов не найдено, используем базовый маршрут")
+            if not route_data:
+                return pair, {"metrics": None, "calm_score": None}
+            
+            route_item = route_data[0]
+            metrics = self._extract_route_metrics(route_item, profile, self._get_parsed_route(route_item).coords)
+            return pair, {"metrics": metrics, "calm_score": self._calculate_calm_score(metrics)}
+        
+        results = await asyncio.gather(*[compute(pair) for pair in pairs])
+        return dict(results)
+    
+    def _compute_local_matrix(
+        self,
+        local_router,
+        points: List[Tuple[float, float]],
+        pairs: List[Tuple[int, int]],
+        profile: RouteProfile
+    ) -> Dict[Tuple[int, int], Dict]:
+        destinations_by_origin = {}
+        for i, j in pairs:
+            destinations_by_origin.setdefault(i, []).append(j)
+        
+        cells = {}
+        for i, destinations in destinations_by_origin.items():
+            results = local_router.route_many(points[i], [points[j] for j in destinations], profile)
+            for j, result in zip(destinations, results):
+                if not result:
+                    cells[(i, j)] = {"metrics": None, "calm_score": None}
+                    continue
+                
+                route_item = {"total_distance": result["distance_m"], "total_duration": result["duration_sec"]}
+                metrics = self._extract_route_metrics(route_item, profile, result["coordinates"])
+                cells[(i, j)] = {"metrics": metrics, "calm_score": self._calculate_calm_score(metrics)}
+        
+        return cells
+    
+    async def _fetch_route(
+        self,
+        start: Tuple[float, float],
+        end: Tuple[float, float],
+        exclude_polygons: Optional[List[Dict]] = None
+    ) -> Dict:
+        route = await self.gis_service.get_route(
+            start=start,
+            end=end,
+            profile="pedestrian",
+            exclude_polygons=exclude_polygons
+        )
+        return parse_route(route) if route else route
+    
+    def _start_strategy(
+        self,
+        strategy: Dict,
+        base_route: Dict,
+        merged_polygons: List[Dict]
+    ) -> Dict:
+        """Кандидат стратегии до перестроений: базовый маршрут и задетые им препятствия"""
+        run = {"strategy": strategy, "route": base_route, "iterations": [], "hits": [], "attempts": 0, "done": True}
+        if not merged_polygons:
+            print(f"✅ [CALM ROUTE] [{strategy['id']}] Препятствий нет, используем базовый маршрут")
+            return run
+    
+        print(f"🔗 [CALM ROUTE] [{strategy['id']}] {len(merged_polygons)} препятствий после объединения")
+    
+        run["obstacles"] = merged_polygons
+        run["obstacle_index"] = self._build_obstacle_index(merged_polygons)
+        run["base_coords"] = self._get_first_route_coords(base_route)
+        run["hits"] = self._find_route_hits(run["base_coords"], run["obstacle_index"], merged_polygons)
+        run["required_ids"] = set(run["hits"])
+        run["done"] = not run["hits"]
+        return run
+    
+    async def _run_strategies(
+        self,
+        runs: List[Dict],
+        start: Tuple[float, float],
+        end: Tuple[float, float],
+        request: CalmRouteRequest
+    ) -> None:
+        """Перестроения в пределах CALM_ROUTE_MAX_UPSTREAM_CALLS запросов к 2GIS.
+    
+        Первая попытка — у всех стратегий сразу, дальше перестраивается
+        только лучшая по оценке. Останавливаемся, как только чистых
+        маршрутов набралось request.alternatives.
+        """
+        started_at = time.perf_counter()
+        calls_left = settings.CALM_ROUTE_MAX_UPSTREAM_CALLS
+    
+        wave = [run for run in runs if not run["done"]][:calls_left]
+        if wave and self._count_clean(runs) < request.alternatives:
+            calls = await asyncio.gather(*[
+                self._reroute_once(start, end, run, started_at)
+                for run in wave
+            ])
+            calls_left -= sum(calls)
+    
+        while calls_left > 0 and self._count_clean(runs) < request.alternatives:
+            pending = [run for run in runs if not run["done"]]
+            if not pending:
+                break
+            best_strategy = self._rank_candidates(pending, request)[0]["strategy"]
+            best_run = next(run for run in pending if run["strategy"] is best_strategy)
+            calls_left -= await self._reroute_once(start, end, best_run, started_at)
+    
+        for run in runs:
+            if run["iterations"] and not run["hits"]:
+                print(f"✅ [CALM ROUTE] [{run['strategy']['id']}] Построен маршрут без препятствий")
+            elif run["iterations"]:
+                print(f"⚠️ [CALM ROUTE] [{run['strategy']['id']}] Маршрут задевает {len(run['hits'])} препятствий")
+    
+    def _count_clean(self, runs: List[Dict]) -> int:
+        """Сколько разных маршрутов не задевают препятствий профиля пользователя"""
+        routes = {}
+        for run in runs:
+            coords = self._get_first_route_coords(run["route"])
+            routes[coords.tobytes()] = coords
+        
+        profile_run = runs[0]
+        if "obstacle_index" not in profile_run:
+            return len(routes)
+        return sum(
+            1 for coords in routes.values()
+            if not self._find_route_hits(coords, profile_run["obstacle_index"], profile_run["obstacles"])
+        )
+    
+    def _collect_obstacles(
+        self,
+        tiles: ObstacleTileIndex,
+        problematic_polygons: List[Dict],
+        profile: RouteProfile,
+        strategy: Dict,
+        bbox: Tuple[float, float, float, float]
+    ) -> List[Dict]:
+        """Объединённые препятствия стратегии: готовые из тайлов плюс отобранные из запроса слоёв"""
+        avoid = self._get_strategy_avoid(strategy, profile.avoid)
+        obstacles = self._merge_intersecting_polygons(
+            self._select_obstacles(problematic_polygons, avoid, strategy["layers"])
+        )
+        
+        tile_key = self._get_tile_key(profile.avoid, strategy)
+        if tiles.has(tile_key):
+            obstacles = obstacles + tiles.lookup(tile_key, bbox)
+        
+        return obstacles
+    
+    def _get_tile_key(self, avoid: AvoidOptions, strategy: Dict) -> str:
+        return f"{strategy['id']}:{avoid.model_dump_json()}"
+    
+    def _get_tiled_layers(self, tiles: ObstacleTileIndex, profile: RouteProfile) -> List[str]:
+        """Слои, препятствия которых для этого профиля уже лежат в тайлах"""
+        if tiles.has(self._get_tile_key(profile.avoid, self.STRATEGIES[0])):
+            return tiles.layers
+        return []
+    
+    def refresh_obstacle_tiles(self) -> Optional[asyncio.Task]:
+        """Пересобрать тайлы в фоне, если слои поменялись.
+
+        Вызывается при старте и после перезагрузки слоя; пока идёт сборка,
+        запросы работают с прежним набором тайлов.
+        """
+        if self.obstacle_tiles.layer_versions == self.polygon_loader.layer_versions:
+            return None
+        if self._obstacle_tiles_task is None or self._obstacle_tiles_task.done():
+            self._obstacle_tiles_task = asyncio.create_task(self._rebuild_obstacle_tiles())
+        return self._obstacle_tiles_task
+    
+    async def _rebuild_obstacle_tiles(self) -> None:
+        # Слой могли перезагрузить ещё раз, пока шла сборка — тогда собираем заново
+        while self.obstacle_tiles.layer_versions != self.polygon_loader.layer_versions:
+            try:
+                self.obstacle_tiles = await asyncio.to_thread(self._build_obstacle_tiles)
+            except Exception as e:
+                print(f"❌ [OBSTACLE TILES] Ошибка сборки тайлов: {e}")
+                return
+    
+    def _current_obstacle_tiles(self) -> ObstacleTileIndex:
+        """Текущий набор тайлов; если он устарел — запускает пересборку в фоне"""
+        self.refresh_obstacle_tiles()
+        return self.obstacle_tiles
+    
+    def _build_obstacle_tiles(self) -> ObstacleTileIndex:
+        started = time.perf_counter()
+        snapshot = self.polygon_loader.snapshot
+        tiles = ObstacleTileIndex(settings.OBSTACLE_TILE_SIZE_DEG)
+        tiles.layer_versions = dict(snapshot.layer_versions)
+        tiles.layers = [
+            layer_type for layer_type in LAYER_METRIC_KEYS
+            if snapshot.polygons_by_layer.get(layer_type)
+        ]
+        
+        for profile_options in settings.OBSTACLE_TILE_PROFILES:
+            profile_avoid = AvoidOptions(**profile_options)
+            polygons = [
+                self._make_problematic_polygon(
+                    polygon.get("id", f"{layer_type}_{i}"),
+                    LayerType(layer_type),
+                    polygon["coordinates"],
+                    float(polygon.get("metrics", {}).get(LAYER_METRIC_KEYS[layer_type]) or 0),
+                    profile_avoid
+                )
+                for layer_type in tiles.layers
+                for i, polygon in enumerate(snapshot.polygons_by_layer[layer_type])
+                if polygon.get("coordinates")
+            ]
+            polygons_by_tile = tiles.group_by_tile(polygons)
+            
+            for strategy in self.STRATEGIES:
+                key = self._get_tile_key(profile_avoid, strategy)
+                avoid = self._get_strategy_avoid(strategy, profile_avoid)
+                tiles.mark_built(key)
+                
+                for tile, tile_polygons in polygons_by_tile.items():
+                    merged = self._merge_intersecting_polygons(
+                        self._select_obstacles(tile_polygons, avoid, strategy["layers"])
+                    )
+                    for obstacle in merged:
+                        if obstacle.get("type") == "merged":
+                            obstacle["id"] = f"tile_{tile[0]}_{tile[1]}_{obstacle['id']}"
+                    tiles.add(key, tile, merged)
+        
+        print(
+            f"✅ [OBSTACLE TILES] {len(settings.OBSTACLE_TILE_PROFILES)} профилей, слои {tiles.layers}: "
+            f"{tiles.obstacle_count()} препятствий за {(time.perf_counter() - started) * 1000:.0f} мс"
+        )
+        return tiles
+    
+    def _get_strategy_avoid(self, strategy: Dict, avoid: AvoidOptions) -> AvoidOptions:
+        shift = strategy["shift"]
+        
+        return avoid.model_copy(update={
+            "noise_above_db": avoid.noise_above_db + shift * 5 if avoid.noise_above_db else None,
+            "crowd_level_above": min(5, max(1, avoid.crowd_level_above + shift)) if avoid.crowd_level_above else None,
+            "light_below_lux": max(0, avoid.light_below_lux - shift * 25) if avoid.light_below_lux else None,
+            "puddles": avoid.puddles or shift < 0
+        })
+    
+    def _select_obstacles(
+        self,
+        problematic_polygons: List[Dict],
+        avoid: AvoidOptions,
+        layers: Optional[List[LayerType]] = None
+    ) -> List[Dict]:
+        obstacles = []
+        
+        for polygon in problematic_polygons:
+            if layers and polygon["type"] not in layers:
+                continue
+            
+            if self._violates_filters(polygon["metrics"], avoid, polygon["type"]):
+                obstacles.append({
+                    **polygon,
+                    "reason": self._get_violation_reason(polygon["metrics"], avoid, polygon["type"])
+                })
+        
+        return obstacles
+    
+    def _rank_candidates(
+        self,
+        candidates: List[Dict],
+        request: CalmRouteRequest
+    ) -> List[Dict]:
+        unique = {}
+        for candidate in candidates:
+            route_data = candidate["route"].get("result", [])
+            if not route_data:
+                continue
+            
+            route_item = route_data[0]
+            parsed = self._get_parsed_route(route_item)
+            key = parsed.coords.tobytes()
+            
+            if key in unique:
+                unique[key]["iterations"] = unique[key]["iterations"] + candidate["iterations"]
+                continue
+            
+            metrics = self._extract_route_metrics(route_item, request.profile, parsed.coords)
+            unique[key] = {
+                **candidate,
+                "route_item": route_item,
+                "metrics": metrics,
+                "calm_score": self._calculate_calm_score(metrics)
+            }
+        
+        return sorted(unique.values(), key=lambda c: (-c["calm_score"], c["metrics"].distance_m))
+    
+    async def _reroute_once(
+        self,
+        start: Tuple[float, float],
+        end: Tuple[float, float],
+        run: Dict,
+        started_at: float
+    ) -> int:
+        """Очередная попытка обхода для стратегии; возвращает число запросов к 2GIS"""
+        strategy_id = run["strategy"]["id"]
+        remaining_s = settings.CALM_ROUTE_TIME_BUDGET_MS / 1000 - (time.perf_counter() - started_at)
+        if remaining_s <= 0:
+            print(f"⏱️ [CALM ROUTE] [{strategy_id}] Бюджет времени исчерпан после {run['attempts']} попыток")
+            run["done"] = True
+            return 0
+    
+        run["attempts"] += 1
+        attempt = run["attempts"]
+        obstacles = run["obstacles"]
+    
+        planned_polygons = self.exclusion_planner.plan(obstacles, run["base_coords"], required_ids=run["required_ids"])
+        exclude_polygons = [
+            self.gis_service.create_exclude_polygon(polygon["coordinates"])
+            for polygon in planned_polygons
+        ]
+        print(f"✅ [CALM ROUTE] [{strategy_id}] Попытка {attempt}: исключения {len(exclude_polygons)} полигонов")
+    
+        attempt_started_at = time.perf_counter()
+        try:
+            route = await asyncio.wait_for(
+                self._fetch_route(start, end, exclude_polygons),
+                timeout=remaining_s
+            )
+            status = "ok" if route else "failed"
+        except asyncio.TimeoutError:
+            route = {}
+            status = "timeout"
+    
+        hits = self._find_route_hits(self._get_first_route_coords(route), run["obstacle_index"], obstacles) if route else []
+        run["iterations"].append(RerouteIteration(
+            attempt=attempt,
+            strategy=strategy_id,
+            duration_ms=round((time.perf_counter() - attempt_started_at) * 1000, 1),
+            excluded_polygons=len(exclude_polygons),
+            hit_polygons=len(hits),
+            status=status
+        ))
+    
+        if not route:
+            print(f"⚠️ [CALM ROUTE] [{strategy_id}] Попытка {attempt}: {status}")
+            run["done"] = True
+            return 1
+    
+        if len(hits) <= len(run["hits"]):
+            run["route"], run["hits"] = route, hits
+    
+        new_hits = set(hits) - run["required_ids"]
+        if not new_hits or attempt >= settings.CALM_ROUTE_MAX_ATTEMPTS:
+            run["done"] = True
+            return 1
+    
+        print(f"🔁 [CALM ROUTE] [{strategy_id}] Попытка {attempt}: маршрут задел {len(new_hits)} новых препятствий")
+        run["required_ids"] |= new_hits
+        return 1
+    
+    def _build_obstacle_index(self, obstacles: List[Dict]) -> STRtree:
+        shapes = []
+        for obstacle in obstacles:
+            try:
+                shapes.append(Polygon(obstacle["coordinates"]))
+            except Exception as e:
+                print(f"⚠️ [CALM ROUTE] Ошибка создания полигона {obstacle.get('id')}: {e}")
+                shapes.append(Polygon())
+        return STRtree(shapes)
+    
+    def _find_route_hits(
+        self,
+        route_coords: np.ndarray,
+        obstacle_index: STRtree,
+        obstacles: List[Dict]
+    ) -> List[str]:
+        if len(route_coords) < 2:
+            return []
+        
+        hit_indices = obstacle_index.query(LineString(route_coords), predicate="intersects")
+        return [obstacles[i]["id"] for i in hit_indices]
+    
+    def _get_first_route_coords(self, route: Dict) -> np.ndarray:
+        route_data = route.get("result", [])
+        if not route_data:
+            return np.empty((0, 2))
+        return self._get_parsed_route(route_data[0]).coords
+    
+    def _get_parsed_route(self, route_item: Dict) -> ParsedRoute:
+        if "parsed" not in route_item:
+            route_item["parsed"] = parse_route_item(route_item)
+        return route_item["parsed"]
     
     async def _find_problematic_polygons(
         self, 
         bbox: Tuple[float, float, float, float],
-        request: CalmRouteRequest
+        profile: RouteProfile,
+        skip_layers: Sequence[str] = ()
     ) -> List[Dict]:
         problematic_polygons = []
         
+        layer_types = [
+            layer_type for layer_type in [LayerType.NOISE, LayerType.CROWD, LayerType.LIGHT, LayerType.PUDDLES]
+            if layer_type.value not in skip_layers
+        ]
+        if not layer_types:
+            return problematic_polygons
+        
         all_layers = await self.map_service.get_all_layers(
-            layer_types=[LayerType.NOISE, LayerType.CROWD, LayerType.LIGHT, LayerType.PUDDLES],
+            layer_types=layer_types,
             bbox=bbox
         )
         
         for layer_type, features in all_layers.items():
             for feature in features:
-                polygon = feature.geometry.coordinates[0]
-                
-                metrics = {
-                    "noise_db": feature.value if layer_type == LayerType.NOISE else 0,
-                    "crowd_level": feature.value if layer_type == LayerType.CROWD else 0,
-                    "light_lux": feature.value if layer_type == LayerType.LIGHT else 0,
-                    "puddles": feature.value > 0.5 if layer_type == LayerType.PUDDLES else False
-                }
-                
-                if True:
-                    problematic_polygons.append({
-                        "id": feature.segment_id,
-                        "type": layer_type,
-                        "coordinates": polygon,
-                        "reason":""
-                    })
+                problematic_polygons.append(self._make_problematic_polygon(
+                    feature.segment_id,
+                    LayerType(layer_type),
+                    feature.geometry.coordinates[0],
+                    feature.value,
+                    profile.avoid
+                ))
         
         return problematic_polygons
     
+    def _make_problematic_polygon(
+        self,
+        polygon_id: str,
+        layer_type: LayerType,
+        coordinates: List[List[float]],
+        value: float,
+        avoid: AvoidOptions
+    ) -> Dict:
+        metrics = {
+            "noise_db": value if layer_type == LayerType.NOISE else 0,
+            "crowd_level": value if layer_type == LayerType.CROWD else 0,
+            "light_lux": value if layer_type == LayerType.LIGHT else 0,
+            "puddles": value > 0.5 if layer_type == LayerType.PUDDLES else False
+        }
+        
+        return {
+            "id": polygon_id,
+            "type": layer_type,
+            "coordinates": coordinates,
+            "metrics": metrics,
+            "severity": self._get_severity(value, avoid, layer_type),
+            "reason": ""
+        }
+    
     def _merge_intersecting_polygons(self, polygons: List[Dict]) -> List[Dict]:
         if not polygons:
             return []
@@ -110,7 +665,6 @@ class CalmRouteService:
                 coords = poly["coordinates"]
                 
                 if isinstance(coords, list) and len(coords) >= 3:
-                    print(f"🔍 [MERGE] Полигон {i}: {len(coords)} точек")
                     if isinstance(coords[0], list) and len(coords[0]) == 2:
                         if coords[0] != coords[-1]:
                             coords = coords + [coords[0]]
@@ -175,6 +729,7 @@ class CalmRouteService:
                             "id": f"merged_{len(merged_polygons)}",
                             "type": "merged",
                             "coordinates": coords,
+                            "severity": max(p["original"].get("severity", 1.0) for p in group),
                             "reason": f"Объединено {len(group)} полигонов"
                         }
                         merged_polygons.append(merged_polygon)
@@ -190,10 +745,9 @@ class CalmRouteService:
     def _violates_filters(
         self, 
         metrics: Dict, 
-        request: CalmRouteRequest, 
+        avoid: AvoidOptions, 
         layer_type: LayerType
     ) -> bool:
-        avoid = request.profile.avoid
         
         if layer_type == LayerType.NOISE:
             noise_db = metrics.get("noise_db", 0)
@@ -213,13 +767,37 @@ class CalmRouteService:
         
         return False
     
+    def _get_severity(
+        self, 
+        value: float, 
+        avoid: AvoidOptions, 
+        layer_type: LayerType
+    ) -> float:
+        
+        if layer_type == LayerType.NOISE:
+            threshold = avoid.noise_above_db or settings.NOISE_THRESHOLD_DB
+            return max(0.2, 1 + (value - threshold) / 10)
+        
+        elif layer_type == LayerType.CROWD:
+            threshold = avoid.crowd_level_above or settings.CROWD_THRESHOLD
+            return max(0.2, 1 + (value - threshold) / 2)
+        
+        elif layer_type == LayerType.PUDDLES:
+            return 1.0 if avoid.puddles and value > 0.5 else 0.3
+        
+        elif layer_type == LayerType.LIGHT:
+            if not avoid.light_below_lux:
+                return 0.2
+            return max(0.2, 1 + (avoid.light_below_lux - value) / avoid.light_below_lux)
+        
+        return 1.0
+    
     def _get_violation_reason(
         self, 
         metrics: Dict, 
-        request: CalmRouteRequest, 
+        avoid: AvoidOptions, 
         layer_type: LayerType
     ) -> str:
-        avoid = request.profile.avoid
         
         if layer_type == LayerType.NOISE:
             noise_db = metrics.get("noise_db", 0)
@@ -239,95 +817,79 @@ class CalmRouteService:
         return "Нарушение фильтра"
     
     def _get_route_bbox(self, route: Dict) -> Tuple[float, float, float, float]:
-        all_lats = []
-        all_lons = []
-        
-        route_data = route.get("result", [])
-        for route_item in route_data:
-            maneuvers = route_item.get("maneuvers", [])
-            for maneuver in maneuvers:
-                outcoming_path = maneuver.get("outcoming_path", {})
-                geometry_list = outcoming_path.get("geometry", [])
-                
-                for geom_item in geometry_list:
-                    selection = geom_item.get("selection", "")
-                    if selection.startswith("LINESTRING"):
-                        coords_str = selection.replace("LINESTRING(", "").replace(")", "")
-                        coord_pairs = coords_str.split(", ")
-                        
-                        for coord_pair in coord_pairs:
-                            lon_str, lat_str = coord_pair.strip().split(" ")
-                            all_lons.append(float(lon_str))
-                            all_lats.append(float(lat_str))
+        bboxes = [
+            self._get_parsed_route(route_item).bbox()
+            for route_item in route.get("result", [])
+        ]
+        bboxes = [bbox for bbox in bboxes if bbox]
         
-        if not all_lats:
+        if not bboxes:
             return (55.75, 37.61, 55.76, 37.63)
         
-        lat_min, lat_max = min(all_lats), max(all_lats)
-        lon_min, lon_max = min(all_lons), max(all_lons)
-        
-        lat_range = lat_max - lat_min
-        lon_range = lon_max - lon_min
-        
         return (
-            lat_min - lat_range * 0.1,
-            lon_min - lon_range * 0.1,
-            lat_max + lat_range * 0.1,
-            lon_max + lon_range * 0.1
+            min(bbox[0] for bbox in bboxes),
+            min(bbox[1] for bbox in bboxes),
+            max(bbox[2] for bbox in bboxes),
+            max(bbox[3] for bbox in bboxes)
         )
     
-    def _convert_route_to_response(
+    def _convert_candidates_to_response(
         self, 
-        route: Dict, 
+        candidates: List[Dict], 
         request: CalmRouteRequest
     ) -> CalmRouteResponse:
+        if not candidates:
+            return self._create_fallback_route(request)
+        
         routes = []
+        iterations = []
+        for i, candidate in enumerate(candidates):
+            strategy = candidate["strategy"]
+            route = self._build_route(
+                candidate["route_item"],
+                request,
+                i,
+                name=strategy["name"] if strategy else None,
+                metrics=candidate["metrics"]
+            )
+            if strategy:
+                route.id = f"{strategy['id']}_{route.id}"
+            routes.append(route)
+            iterations.extend(candidate["iterations"])
         
-        route_data = route.get("result", [])
-        if not route_data:
-            return self._create_fallback_route(request)
+        return CalmRouteResponse(routes=routes, iterations=iterations)
+    
+    def _build_route(
+        self, 
+        route_item: Dict, 
+        request: CalmRouteRequest, 
+        index: int,
+        name: Optional[str] = None,
+        metrics: Optional[RouteMetrics] = None
+    ) -> Route:
+        geometry = self._extract_route_geometry(route_item)
         
-        for i, route_item in enumerate(route_data[:3]):
-            geometry = self._extract_route_geometry(route_item)
-            
-            metrics = self._extract_route_metrics(route_item)
-            
-            calm_score = self._calculate_calm_score(metrics)
-            
-            explanations = self._generate_explanations(route_item, request)
-            
-            route_name = self._get_route_name(route_item, i)
-            
-            routes.append(Route(
-                id=route_item.get("id", f"route_{i+1}"),
-                name=route_name,
-                geometry=geometry,
-                metrics=metrics,
-                calm_score=calm_score,
-                explanations=explanations
-            ))
+        metrics = metrics or self._extract_route_metrics(route_item, request.profile, self._get_parsed_route(route_item).coords)
+        
+        calm_score = self._calculate_calm_score(metrics)
+        
+        explanations = self._generate_explanations(route_item, request)
         
-        return CalmRouteResponse(routes=routes)
+        route_name = name or self._get_route_name(route_item, index)
+        
+        return Route(
+            id=route_item.get("id", f"route_{index+1}"),
+            name=route_name,
+            geometry=geometry,
+            metrics=metrics,
+            calm_score=calm_score,
+            explanations=explanations
+        )
     
     def _extract_route_geometry(self, route_item: Dict) -> RouteGeometry:
-        coordinates = []
-        
-        maneuvers = route_item.get("maneuvers", [])
-        for maneuver in maneuvers:
-            outcoming_path = maneuver.get("outcoming_path", {})
-            geometry_list = outcoming_path.get("geometry", [])
-            
-            for geom_item in geometry_list:
-                selection = geom_item.get("selection", "")
-                if selection.startswith("LINESTRING"):
-                    coords_str = selection.replace("LINESTRING(", "").replace(")", "")
-                    coord_pairs = coords_str.split(", ")
-                    
-                    for coord_pair in coord_pairs:
-                        lon_str, lat_str = coord_pair.strip().split(" ")
-                        coordinates.append([float(lon_str), float(lat_str)])
+        parsed = self._get_parsed_route(route_item)
         
-        if not coordinates:
+        if parsed.is_empty:
             return RouteGeometry(
                 type="LineString",
                 coordinates=[[37.617, 55.755], [37.625, 55.760]]
@@ -335,30 +897,35 @@ class CalmRouteService:
         
         return RouteGeometry(
             type="LineString",
-            coordinates=coordinates
+            coordinates=parsed.to_list()
         )
     
-    def _extract_route_metrics(self, route_item: Dict) -> RouteMetrics:
-        distance_m = route_item.get("total_distance", 1000)
-        duration_sec = route_item.get("total_duration", 720)
-        duration_min = duration_sec // 60
+    def _extract_route_metrics(
+        self, 
+        route_item: Dict, 
+        profile: RouteProfile, 
+        route_coords: Sequence[Sequence[float]]
+    ) -> RouteMetrics:
+        exposure = self.exposure_service.score_route(route_coords, profile.avoid)
         
-        import random
-        avg_noise_db = random.uniform(60, 80)
-        avg_crowd = random.uniform(1, 5)
+        distance_m = route_item.get("total_distance", exposure["length_m"])
+        duration_sec = route_item.get("total_duration", distance_m / 80 * 60)
+        duration_min = duration_sec // 60
         
         return RouteMetrics(
             distance_m=int(distance_m),
             duration_min=int(duration_min),
-            avg_noise_db=round(avg_noise_db, 1),
-            avg_crowd=round(avg_crowd, 1)
+            avg_noise_db=round(exposure["avg_noise_db"], 1),
+            avg_crowd=round(min(5, max(1, exposure["avg_crowd"])), 1),
+            noise_above_threshold_m=int(exposure["noise_above_m"]),
+            crowd_above_threshold_m=int(exposure["crowd_above_m"])
         )
     
     def _calculate_calm_score(self, metrics: RouteMetrics) -> float:
         noise_score = max(0, 10 - (metrics.avg_noise_db - 40) / 5)
         crowd_score = 10 - (metrics.avg_crowd - 1) * 2.5
         
-        calm_score = (noise_score * 0.6 + crowd_score * 0.4) * 10
+        calm_score = noise_score * 0.6 + crowd_score * 0.4
         
         return min(10, max(0, round(calm_score, 1)))
     
@@ -403,6 +970,42 @@ class CalmRouteService:
         else:
             return f"Маршрут {index + 1}"
     
+    async def _build_local_route(self, request: CalmRouteRequest) -> Optional[CalmRouteResponse]:
+        local_router = get_local_router()
+        if local_router is None:
+            return None
+        
+        result = await asyncio.to_thread(
+            local_router.route,
+            (request.start.lat, request.start.lon),
+            (request.end.lat, request.end.lon),
+            request.profile
+        )
+        if not result:
+            return None
+        
+        print(f"✅ [CALM ROUTE] Построен локальный маршрут: {int(result['distance_m'])} м")
+        
+        geometry = RouteGeometry(type="LineString", coordinates=result["coordinates"])
+        route_item = {
+            "total_distance": result["distance_m"],
+            "total_duration": result["duration_sec"]
+        }
+        metrics = self._extract_route_metrics(route_item, request.profile, result["coordinates"])
+        
+        return CalmRouteResponse(
+            routes=[
+                Route(
+                    id="local_route",
+                    name="Спокойный (локальный)",
+                    geometry=geometry,
+                    metrics=metrics,
+                    calm_score=self._calculate_calm_score(metrics),
+                    explanations=self._generate_explanations(route_item, request)
+                )
+            ]
+        )
+    
     def _create_fallback_route(self, request: CalmRouteRequest) -> CalmRouteResponse:
         return CalmRouteResponse(
             routes=[
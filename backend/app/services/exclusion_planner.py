@@ -0,0 +1,173 @@
+import math
+from typing import List, Dict, Optional, Sequence, Set
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, LineString
+
+from app.core.config import settings
+
+
+class ExclusionPlanner:
+
+    def __init__(
+        self,
+        max_polygons: int = settings.EXCLUDE_MAX_POLYGONS,
+        vertex_budget: int = settings.EXCLUDE_VERTEX_BUDGET,
+        corridor_m: float = settings.EXCLUDE_CORRIDOR_M
+    ):
+        self.max_polygons = max_polygons
+        self.vertex_budget = vertex_budget
+        self.corridor_m = corridor_m
+        self.min_vertices = 4
+
+    def plan(
+        self,
+        polygons: List[Dict],
+        route_coords: Sequence[Sequence[float]],
+        required_ids: Optional[Set[str]] = None
+    ) -> List[Dict]:
+        """Выбрать и упростить полигоны для исключения под бюджет 2GIS"""
+        if not polygons:
+            return []
+        
+        required_ids = required_ids or set()
+
+        to_metric, to_degrees = self._make_projection(polygons, route_coords)
+
+        route_line = None
+        corridor = None
+        if len(route_coords) >= 2:
+            route_line = to_metric(LineString(route_coords))
+            corridor = route_line.buffer(self.corridor_m)
+
+        candidates = []
+        for poly in polygons:
+            shape = self._to_metric_polygon(poly["coordinates"], to_metric)
+            if shape is None:
+                continue
+
+            score = self._score(shape, poly.get("severity", 1.0), route_line, corridor)
+            candidates.append({
+                "polygon": poly,
+                "shape": shape,
+                "score": score
+            })
+
+        candidates.sort(key=lambda c: (c["polygon"].get("id") in required_ids, c["score"]), reverse=True)
+        selected = candidates[:self.max_polygons]
+
+        budgets = self._allocate_vertices(selected)
+
+        planned = []
+        for candidate, budget in zip(selected, budgets):
+            simplified = self._simplify_to_budget(candidate["shape"], budget)
+            coords = [list(c) for c in to_degrees(simplified).exterior.coords]
+
+            planned.append({
+                **candidate["polygon"],
+                "coordinates": coords,
+                "score": round(candidate["score"], 2)
+            })
+
+        total_vertices = sum(len(p["coordinates"]) - 1 for p in planned)
+        print(f"📐 [EXCLUDE] Выбрано {len(planned)} из {len(polygons)} полигонов, {total_vertices} вершин (бюджет {self.vertex_budget})")
+
+        return planned
+
+    def _score(
+        self,
+        shape: Polygon,
+        severity: float,
+        route_line: Optional[LineString],
+        corridor: Optional[Polygon]
+    ) -> float:
+        if route_line is None:
+            return severity
+
+        overlap_m = 0.0
+        if shape.intersects(corridor):
+            overlap_m = shape.intersection(corridor).area / (2 * self.corridor_m)
+
+        proximity = self.corridor_m * math.exp(-shape.distance(route_line) / (4 * self.corridor_m))
+
+        return severity * (overlap_m + proximity)
+
+    def _allocate_vertices(self, selected: List[Dict]) -> List[int]:
+        if not selected:
+            return []
+
+        spare = max(0, self.vertex_budget - self.min_vertices * len(selected))
+        total_score = sum(c["score"] for c in selected)
+
+        budgets = []
+        for candidate in selected:
+            share = candidate["score"] / total_score if total_score > 0 else 1 / len(selected)
+            budgets.append(self.min_vertices + int(spare * share))
+
+        return budgets
+
+    def _simplify_to_budget(self, shape: Polygon, budget: int) -> Polygon:
+        if self._vertex_count(shape) <= budget:
+            return shape
+
+        tolerance = max(1.0, math.sqrt(shape.area) / 100)
+        for _ in range(12):
+            simplified = shape.simplify(tolerance, preserve_topology=True)
+            if isinstance(simplified, Polygon) and not simplified.is_empty and self._vertex_count(simplified) <= budget:
+                return simplified
+            tolerance *= 2
+
+        hull = shape.convex_hull
+        if isinstance(hull, Polygon) and self._vertex_count(hull) <= budget:
+            return hull
+
+        return shape.minimum_rotated_rectangle
+
+    def _vertex_count(self, shape: Polygon) -> int:
+        return len(shape.exterior.coords) - 1
+
+    def _to_metric_polygon(self, coords: List[List[float]], to_metric) -> Optional[Polygon]:
+        if not isinstance(coords, list) or len(coords) < 3:
+            return None
+
+        try:
+            shape = to_metric(Polygon(coords))
+        except Exception as e:
+            print(f"⚠️ [EXCLUDE] Ошибка создания полигона: {e}")
+            return None
+
+        if not shape.is_valid:
+            shape = shape.buffer(0)
+        if shape.geom_type == "MultiPolygon":
+            shape = max(shape.geoms, key=lambda g: g.area)
+        if not isinstance(shape, Polygon) or shape.is_empty:
+            return None
+
+        return shape
+
+    def _make_projection(self, polygons: List[Dict], route_coords: Sequence[Sequence[float]]):
+        if len(route_coords):
+            lon0, lat0 = route_coords[0]
+        else:
+            lon0, lat0 = polygons[0]["coordinates"][0]
+
+        origin = np.array([lon0, lat0])
+        scale = np.array([111000.0 * math.cos(math.radians(lat0)), 111000.0])
+
+        def to_metric(geom):
+            return shapely.transform(geom, lambda xy: (xy - origin) * scale)
+
+        def to_degrees(geom):
+            return shapely.transform(geom, lambda xy: xy / scale + origin)
+
+        return to_metric, to_degrees
+
+
+_exclusion_planner = None
+
+def get_exclusion_planner() -> ExclusionPlanner:
+    global _exclusion_planner
+    if _exclusion_planner is None:
+        _exclusion_planner = ExclusionPlanner()
+    return _exclusion_planner
@@ -0,0 +1,107 @@
+import math
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.data.polygon_loader import get_polygon_loader
+from app.schemas.routing import AvoidOptions
+
+
+class ExposureService:
+
+    def __init__(self, polygon_loader=None, spacing_m: float = settings.EXPOSURE_SAMPLE_SPACING_M):
+        self.polygon_loader = polygon_loader or get_polygon_loader()
+        self.spacing_m = spacing_m
+        self.default_noise_db = settings.EXPOSURE_DEFAULT_NOISE_DB
+        self.default_crowd = settings.EXPOSURE_DEFAULT_CROWD
+
+    def score_route(
+        self,
+        route_coords: Sequence[Sequence[float]],
+        avoid: Optional[AvoidOptions] = None
+    ) -> Dict[str, float]:
+        """Средние шум/толпа вдоль маршрута и длина участков выше порогов"""
+        avoid = avoid or AvoidOptions()
+        coords = np.asarray(route_coords, dtype=np.float64).reshape(-1, 2)
+
+        lons, lats, weights = self._sample_route(coords)
+        length_m = float(weights.sum())
+
+        if length_m == 0:
+            return {
+                "length_m": 0.0,
+                "avg_noise_db": self.default_noise_db,
+                "avg_crowd": self.default_crowd,
+                "noise_above_m": 0.0,
+                "crowd_above_m": 0.0
+            }
+
+        noise = self.polygon_loader.lookup_points("noise", lons, lats)
+        noise = np.where(np.isnan(noise), self.default_noise_db, noise)
+
+        crowd = self.polygon_loader.lookup_points("crowd", lons, lats)
+        crowd = np.where(np.isnan(crowd), self.default_crowd, crowd)
+
+        noise_threshold = avoid.noise_above_db or settings.NOISE_THRESHOLD_DB
+        crowd_threshold = avoid.crowd_level_above or settings.CROWD_THRESHOLD
+
+        return {
+            "length_m": length_m,
+            "avg_noise_db": float(np.dot(noise, weights) / length_m),
+            "avg_crowd": float(np.dot(crowd, weights) / length_m),
+            "noise_above_m": float(weights[noise > noise_threshold].sum()),
+            "crowd_above_m": float(weights[crowd > crowd_threshold].sum())
+        }
+
+    def _sample_route(self, coords: np.ndarray):
+        if len(coords) < 2:
+            return np.empty(0), np.empty(0), np.empty(0)
+
+        lat0 = math.radians(coords[:, 1].mean())
+        scale = np.array([111000.0 * math.cos(lat0), 111000.0])
+
+        step_lengths = np.hypot(*(np.diff(coords, axis=0) * scale).T)
+        cumulative = np.concatenate(([0.0], np.cumsum(step_lengths)))
+        total = cumulative[-1]
+
+        if total == 0:
+            return np.empty(0), np.empty(0), np.empty(0)
+
+        starts = np.arange(0.0, total, self.spacing_m)
+        weights = np.minimum(self.spacing_m, total - starts)
+        positions = starts + weights / 2
+
+        lons = np.interp(positions, cumulative, coords[:, 0])
+        lats = np.interp(positions, cumulative, coords[:, 1])
+
+        return lons, lats, weights
+
+
+def find_violations(
+    avoid: AvoidOptions,
+    noise: np.ndarray,
+    crowd: np.ndarray,
+    light: np.ndarray,
+    puddles: np.ndarray
+) -> np.ndarray:
+    """Маска точек, нарушающих пороги профиля (NaN — нет данных, не нарушение)"""
+    violation = np.zeros(len(noise), dtype=bool)
+    if avoid.noise_above_db:
+        violation |= noise > avoid.noise_above_db
+    if avoid.crowd_level_above:
+        violation |= crowd > avoid.crowd_level_above
+    if avoid.light_below_lux:
+        violation |= light < avoid.light_below_lux
+    if avoid.puddles:
+        violation |= puddles > 0.5
+    return violation
+
+
+_exposure_service = None
+
+def get_exposure_service() -> ExposureService:
+    global _exposure_service
+    if _exposure_service is None:
+        _exposure_service = ExposureService()
+    return _exposure_service
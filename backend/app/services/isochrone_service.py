@@ -0,0 +1,226 @@
+import asyncio
+import heapq
+import math
+from typing import List, Tuple
+
+import numpy as np
+import shapely
+
+from app.core.config import settings
+from app.data.pedestrian_graph import distance_m
+from app.data.polygon_loader import get_polygon_loader
+from app.schemas.routing import (
+    IsochroneRequest, IsochroneResponse, IsochroneContour, IsochroneGeometry, RouteProfile
+)
+from app.services.exposure_service import find_violations
+from app.services.local_router import LocalRouter, get_local_router
+
+
+GRID_STEPS = [
+    (-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+    (-1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (1, 1, math.sqrt(2))
+]
+
+
+class IsochroneService:
+    """Зоны, достижимые пешком за N минут без нарушения фильтров профиля.
+
+    Один проход Дейкстры до наибольшего бюджета, контуры всех бюджетов
+    снимаются с одного массива расстояний. Рёбра/клетки, нарушающие
+    пороги профиля, непроходимы. При включённом локальном графе расчёт
+    идёт по улицам, иначе — по сетке вокруг старта со значениями слоёв.
+    """
+
+    def __init__(self, polygon_loader=None):
+        self.polygon_loader = polygon_loader or get_polygon_loader()
+
+    async def build_isochrones(self, request: IsochroneRequest) -> IsochroneResponse:
+        budgets_min = sorted(set(request.budgets_min))
+        if budgets_min[0] <= 0 or budgets_min[-1] > settings.ISOCHRONE_MAX_BUDGET_MIN:
+            raise ValueError(f"Бюджет времени должен быть от 1 до {settings.ISOCHRONE_MAX_BUDGET_MIN} минут")
+
+        start = (request.start.lat, request.start.lon)
+        budgets_m = [budget * settings.LOCAL_ROUTING_SPEED_M_PER_MIN for budget in budgets_min]
+
+        local_router = get_local_router()
+        if local_router:
+            method = "graph"
+            shapes = await asyncio.to_thread(self._graph_contours, local_router, start, budgets_m, request.profile)
+        else:
+            method = "grid"
+            shapes = await asyncio.to_thread(self._grid_contours, start, budgets_m, request.profile)
+
+        print(f"🗺️ [ISOCHRONE] {method}: бюджеты {budgets_min} мин")
+
+        to_degrees = self._make_to_degrees(start)
+        return IsochroneResponse(
+            method=method,
+            contours=[
+                IsochroneContour(
+                    budget_min=budget,
+                    geometry=self._to_geometry(to_degrees(shape)),
+                    area_m2=int(shape.area)
+                )
+                for budget, shape in zip(budgets_min, shapes)
+            ]
+        )
+
+    def _graph_contours(
+        self,
+        router: LocalRouter,
+        start: Tuple[float, float],
+        budgets_m: List[float],
+        profile: RouteProfile
+    ) -> List[shapely.Geometry]:
+        graph = router.graph
+        lat, lon = start
+        source = graph.nearest_node(lon, lat)
+        snap_m = float(distance_m(lon, lat, graph.node_lon[source], graph.node_lat[source]))
+
+        lengths = graph.edge_length_m.astype(np.float64)
+        costs = np.where(router.edge_violations(profile), np.inf, lengths)
+        reach = graph.dijkstra(source, costs.tolist(), max_cost=max(budgets_m) - snap_m)
+
+        scale = self._metric_scale(lat)
+        node_x = (graph.node_lon - lon) * scale[0]
+        node_y = (graph.node_lat - lat) * scale[1]
+        u, v = graph.edge_source, graph.indices
+        passable = np.isfinite(costs) & (lengths > 0)
+
+        shapes = []
+        for budget in budgets_m:
+            limit = budget - snap_m
+            reached = reach <= limit
+
+            # Граф симметричный — берём одно направление ребра и рисуем части,
+            # достижимые с каждого конца: при reach[u] + reach[v] + длина > 2 * limit
+            # середина ребра остаётся недостижимой
+            edges = passable & (u < v) & (reached[u] | reached[v])
+            lines = np.concatenate([
+                self._edge_segments(node_x, node_y, u[edges], v[edges], reach, lengths[edges], limit),
+                self._edge_segments(node_x, node_y, v[edges], u[edges], reach, lengths[edges], limit)
+            ])
+
+            area = shapely.union_all(np.append(
+                shapely.buffer(lines, settings.ISOCHRONE_BUFFER_M),
+                shapely.Point(0, 0).buffer(settings.ISOCHRONE_BUFFER_M)
+            ))
+            shapes.append(area.simplify(settings.ISOCHRONE_BUFFER_M / 4))
+
+        return shapes
+
+    def _edge_segments(
+        self,
+        node_x: np.ndarray,
+        node_y: np.ndarray,
+        source: np.ndarray,
+        target: np.ndarray,
+        reach: np.ndarray,
+        lengths: np.ndarray,
+        limit: float
+    ) -> np.ndarray:
+        """Отрезки от достигнутого source в сторону target на оставшийся бюджет"""
+        reached = reach[source] <= limit
+        source, target, lengths = source[reached], target[reached], lengths[reached]
+        fraction = np.clip((limit - reach[source]) / lengths, 0, 1)
+        sx, sy = node_x[source], node_y[source]
+        tx, ty = node_x[target], node_y[target]
+
+        return shapely.linestrings(np.stack([
+            np.column_stack([sx, sy]),
+            np.column_stack([sx + (tx - sx) * fraction, sy + (ty - sy) * fraction])
+        ], axis=1).reshape(-1, 2, 2))
+
+    def _grid_contours(
+        self,
+        start: Tuple[float, float],
+        budgets_m: List[float],
+        profile: RouteProfile
+    ) -> List[shapely.Geometry]:
+        lat, lon = start
+        cell = settings.ISOCHRONE_GRID_CELL_M
+        step_m = cell * settings.ISOCHRONE_GRID_DETOUR
+        radius = math.ceil(max(budgets_m) / step_m)
+        size = 2 * radius + 1
+
+        scale = self._metric_scale(lat)
+        offsets = (np.arange(size) - radius) * cell
+        xs, ys = np.meshgrid(offsets, offsets)
+        lons = lon + xs.ravel() / scale[0]
+        lats = lat + ys.ravel() / scale[1]
+
+        blocked = find_violations(
+            profile.avoid,
+            self.polygon_loader.lookup_points("noise", lons, lats),
+            self.polygon_loader.lookup_points("crowd", lons, lats),
+            self.polygon_loader.lookup_points("light", lons, lats),
+            self.polygon_loader.lookup_points("puddles", lons, lats)
+        )
+        blocked[radius * size + radius] = False
+
+        reach = self._grid_dijkstra(blocked.tolist(), size, radius * size + radius, step_m, max(budgets_m))
+
+        shapes = []
+        for budget in budgets_m:
+            reached = np.flatnonzero(reach <= budget)
+            x = xs.ravel()[reached]
+            y = ys.ravel()[reached]
+            boxes = shapely.box(x - cell / 2, y - cell / 2, x + cell / 2, y + cell / 2)
+            shapes.append(shapely.coverage_union_all(boxes).simplify(cell / 2))
+
+        return shapes
+
+    def _grid_dijkstra(
+        self,
+        blocked: List[bool],
+        size: int,
+        source: int,
+        step_m: float,
+        max_cost: float
+    ) -> np.ndarray:
+        best = [math.inf] * (size * size)
+        best[source] = 0.0
+        queue = [(0.0, source)]
+
+        while queue:
+            cost, cell = heapq.heappop(queue)
+            if cost > best[cell]:
+                continue
+            row, col = divmod(cell, size)
+            for d_row, d_col, weight in GRID_STEPS:
+                n_row, n_col = row + d_row, col + d_col
+                if not (0 <= n_row < size and 0 <= n_col < size):
+                    continue
+                neighbour = n_row * size + n_col
+                new_cost = cost + weight * step_m
+                if not blocked[neighbour] and new_cost <= max_cost and new_cost < best[neighbour]:
+                    best[neighbour] = new_cost
+                    heapq.heappush(queue, (new_cost, neighbour))
+
+        return np.array(best)
+
+    def _metric_scale(self, lat: float) -> np.ndarray:
+        return np.array([111000.0 * math.cos(math.radians(lat)), 111000.0])
+
+    def _make_to_degrees(self, start: Tuple[float, float]):
+        lat, lon = start
+        origin = np.array([lon, lat])
+        scale = self._metric_scale(lat)
+        return lambda geom: shapely.transform(geom, lambda xy: xy / scale + origin)
+
+    def _to_geometry(self, shape: shapely.Geometry) -> IsochroneGeometry:
+        polygons = [part for part in shapely.get_parts(shape) if part.geom_type == "Polygon" and not part.is_empty]
+        return IsochroneGeometry(coordinates=[
+            [np.asarray(polygon.exterior.coords).tolist()] +
+            [np.asarray(ring.coords).tolist() for ring in polygon.interiors]
+            for polygon in polygons
+        ])
+
+
+_isochrone_service = None
+
+def get_isochrone_service() -> IsochroneService:
+    global _isochrone_service
+    if _isochrone_service is None:
+        _isochrone_service = IsochroneService()
+    return _isochrone_service
@@ -0,0 +1,273 @@
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.data.pedestrian_graph import PedestrianGraph, EDGE_STEPS, EDGE_UNPAVED, get_pedestrian_graph
+from app.data.graph_landmarks import GraphLandmarks, landmarks_path
+from app.data.polygon_loader import get_polygon_loader
+from app.services.exposure_service import find_violations
+from app.schemas.routing import RouteProfile
+
+
+class LocalRouter:
+    """Маршруты по локальному пешеходному графу.
+
+    Маршруты строятся параллельно в потоках asyncio.to_thread, поэтому
+    значения слоёв на рёбрах и кэш стоимостей меняются только под self._lock.
+    """
+
+    def __init__(
+        self,
+        graph: PedestrianGraph,
+        polygon_loader=None,
+        landmarks: Optional[GraphLandmarks] = None
+    ):
+        self.graph = graph
+        self.landmarks = landmarks
+        self._cost_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.polygon_loader = polygon_loader or get_polygon_loader()
+        self._load_edge_values()
+
+        self._indptr = graph.indptr.tolist()
+        self._indices = graph.indices.tolist()
+        self._node_lon = graph.node_lon.tolist()
+        self._node_lat = graph.node_lat.tolist()
+
+    def _load_edge_values(self) -> None:
+        graph, loader = self.graph, self.polygon_loader
+        self.edge_noise = loader.lookup_points("noise", graph.edge_mid_lon, graph.edge_mid_lat)
+        self.edge_crowd = loader.lookup_points("crowd", graph.edge_mid_lon, graph.edge_mid_lat)
+        self.edge_light = loader.lookup_points("light", graph.edge_mid_lon, graph.edge_mid_lat)
+        self.edge_puddles = loader.lookup_points("puddles", graph.edge_mid_lon, graph.edge_mid_lat)
+        self._layer_versions = dict(loader.layer_versions)
+
+    def _sync_layers(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Перечитать значения слоёв на рёбрах, если слой перезагружен.
+
+        Возвращает шум, толпу, свет и лужи одной версии — читатель не
+        смешает массивы до и после перезагрузки.
+        """
+        with self._lock:
+            if self._layer_versions != self.polygon_loader.layer_versions:
+                self._load_edge_values()
+                self._cost_cache.clear()
+            return self.edge_noise, self.edge_crowd, self.edge_light, self.edge_puddles
+
+    def edge_costs(self, profile: RouteProfile) -> np.ndarray:
+        """Стоимость рёбер: длина с надбавками за шум, толпу и нарушение фильтров профиля"""
+        layers = self._sync_layers()
+        priorities = profile.priorities
+
+        noise = np.nan_to_num(layers[0], nan=settings.EXPOSURE_DEFAULT_NOISE_DB)
+        crowd = np.nan_to_num(layers[1], nan=settings.EXPOSURE_DEFAULT_CROWD)
+
+        penalty = (
+            priorities.noise * np.clip((noise - settings.EXPOSURE_DEFAULT_NOISE_DB) / 20, 0, None) +
+            priorities.crowd * (np.clip(crowd, 1, 5) - 1) / 4
+        )
+
+        violation = self._violations(profile, layers)
+
+        return self.graph.edge_length_m * (1 + penalty + violation * settings.LOCAL_ROUTING_AVOID_PENALTY)
+
+    def edge_violations(self, profile: RouteProfile) -> np.ndarray:
+        """Рёбра, нарушающие фильтры профиля (шум, толпа, свет, лужи, лестницы, грунт)"""
+        return self._violations(profile, self._sync_layers())
+
+    def _violations(self, profile: RouteProfile, layers: Tuple[np.ndarray, ...]) -> np.ndarray:
+        avoid = profile.avoid
+        violation = find_violations(avoid, *layers)
+        if avoid.stairs:
+            violation |= (self.graph.edge_flags & EDGE_STEPS) > 0
+        if avoid.unpaved:
+            violation |= (self.graph.edge_flags & EDGE_UNPAVED) > 0
+        return violation
+
+    def route(
+        self,
+        start: Tuple[float, float],
+        end: Tuple[float, float],
+        profile: RouteProfile
+    ) -> Optional[Dict]:
+        start_lat, start_lon = start
+        end_lat, end_lon = end
+
+        source = self.graph.nearest_node(start_lon, start_lat)
+        target = self.graph.nearest_node(end_lon, end_lat)
+
+        path = self._astar(source, target, self._get_costs(profile), self._make_heuristic(source, target))
+        if path is None:
+            print(f"⚠️ [LOCAL ROUTING] Путь между узлами {source} и {target} не найден")
+            return None
+
+        coordinates = [[start_lon, start_lat]] + self.graph.path_coordinates(path) + [[end_lon, end_lat]]
+        distance_m = sum(self._distance(a, b) for a, b in zip(coordinates, coordinates[1:]))
+
+        return {
+            "coordinates": coordinates,
+            "distance_m": distance_m,
+            "duration_sec": distance_m / settings.LOCAL_ROUTING_SPEED_M_PER_MIN * 60
+        }
+
+    def route_many(
+        self,
+        start: Tuple[float, float],
+        ends: List[Tuple[float, float]],
+        profile: RouteProfile
+    ) -> List[Optional[Dict]]:
+        """Маршруты из одной точки во многие за один проход Дейкстры"""
+        start_lat, start_lon = start
+        source = self.graph.nearest_node(start_lon, start_lat)
+        targets = [self.graph.nearest_node(lon, lat) for lat, lon in ends]
+
+        parents = self._shortest_path_tree(source, set(targets), self._get_costs(profile))
+
+        results = []
+        for (end_lat, end_lon), target in zip(ends, targets):
+            if target not in parents:
+                results.append(None)
+                continue
+
+            path = self._unwind(parents, target)
+            coordinates = [[start_lon, start_lat]] + self.graph.path_coordinates(path) + [[end_lon, end_lat]]
+            distance_m = sum(self._distance(a, b) for a, b in zip(coordinates, coordinates[1:]))
+            results.append({
+                "coordinates": coordinates,
+                "distance_m": distance_m,
+                "duration_sec": distance_m / settings.LOCAL_ROUTING_SPEED_M_PER_MIN * 60
+            })
+
+        return results
+
+    def _get_costs(self, profile: RouteProfile) -> List[float]:
+        self._sync_layers()
+        key = profile.model_dump_json()
+        with self._lock:
+            costs = self._cost_cache.get(key)
+            if costs is not None:
+                self._cost_cache.move_to_end(key)
+                return costs
+            layer_versions = self._layer_versions
+
+        costs = self.edge_costs(profile).tolist()
+        with self._lock:
+            # Слой перезагрузили, пока считали, — стоимости старой версии не кэшируем
+            if self._layer_versions is layer_versions:
+                self._cost_cache[key] = costs
+                if len(self._cost_cache) > settings.LOCAL_ROUTING_COST_CACHE_SIZE:
+                    self._cost_cache.popitem(last=False)
+        return costs
+
+    def _make_heuristic(self, source: int, target: int) -> Callable[[int], float]:
+        target_lon, target_lat = self._node_lon[target], self._node_lat[target]
+        lon_scale = 111000.0 * math.cos(math.radians(target_lat))
+
+        def straight_line(node: int) -> float:
+            return math.hypot(
+                (self._node_lon[node] - target_lon) * lon_scale,
+                (self._node_lat[node] - target_lat) * 111000.0
+            ) * 0.99
+
+        if self.landmarks is None:
+            return straight_line
+
+        active = self.landmarks.select_active(source, target, settings.LOCAL_ROUTING_ACTIVE_LANDMARKS)
+        bounds = self.landmarks.lower_bounds(target, active)
+
+        def landmark_bound(node: int) -> float:
+            return max(float(bounds[node]) * 0.999, straight_line(node))
+
+        return landmark_bound
+
+    def _astar(
+        self,
+        source: int,
+        target: int,
+        costs: List[float],
+        heuristic: Callable[[int], float]
+    ) -> Optional[List[int]]:
+        indptr, indices = self._indptr, self._indices
+
+        best = {source: 0.0}
+        parents = {source: -1}
+        queue = [(heuristic(source), 0.0, source)]
+
+        while queue:
+            _, cost, node = heapq.heappop(queue)
+            if node == target:
+                return self._unwind(parents, target)
+            if cost > best[node]:
+                continue
+
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[edge]
+                new_cost = cost + costs[edge]
+                if new_cost < best.get(neighbour, math.inf):
+                    best[neighbour] = new_cost
+                    parents[neighbour] = node
+                    heapq.heappush(queue, (new_cost + heuristic(neighbour), new_cost, neighbour))
+
+        return None
+
+    def _shortest_path_tree(self, source: int, targets: set, costs: List[float]) -> Dict[int, int]:
+        indptr, indices = self._indptr, self._indices
+        remaining = set(targets)
+
+        best = {source: 0.0}
+        parents = {source: -1}
+        settled = {}
+        queue = [(0.0, source)]
+
+        while queue and remaining:
+            cost, node = heapq.heappop(queue)
+            if node in settled:
+                continue
+            settled[node] = parents[node]
+            remaining.discard(node)
+
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[edge]
+                new_cost = cost + costs[edge]
+                if new_cost < best.get(neighbour, math.inf):
+                    best[neighbour] = new_cost
+                    parents[neighbour] = node
+                    heapq.heappush(queue, (new_cost, neighbour))
+
+        return settled
+
+    def _unwind(self, parents: Dict[int, int], target: int) -> List[int]:
+        path = [target]
+        while parents[path[-1]] != -1:
+            path.append(parents[path[-1]])
+        return path[::-1]
+
+    def _distance(self, a: List[float], b: List[float]) -> float:
+        lon_scale = 111000.0 * math.cos(math.radians((a[1] + b[1]) / 2))
+        return math.hypot((b[0] - a[0]) * lon_scale, (b[1] - a[1]) * 111000.0)
+
+
+_local_router = None
+_local_router_lock = threading.Lock()
+
+def get_local_router() -> Optional[LocalRouter]:
+    """Локальный роутер или None.
+
+    Первая сборка долгая (чтение графа, значения слоёв на всех рёбрах) —
+    её делает lifespan приложения через asyncio.to_thread, запросы
+    получают уже готовый роутер.
+    """
+    global _local_router
+    if _local_router is None and settings.LOCAL_ROUTING_ENABLED:
+        with _local_router_lock:
+            if _local_router is None:
+                graph = get_pedestrian_graph(settings.LOCAL_GRAPH_FILE)
+                if graph is not None:
+                    landmarks = GraphLandmarks.load(landmarks_path(settings.LOCAL_GRAPH_FILE), graph)
+                    _local_router = LocalRouter(graph, landmarks=landmarks)
+    return _local_router
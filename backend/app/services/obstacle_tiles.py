@@ -0,0 +1,63 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+
+class ObstacleTileIndex:
+    """Заранее отфильтрованные и объединённые препятствия по тайлам.
+
+    Ключ — профиль порогов и стратегия обхода. Полигон относится к тайлу
+    своей первой вершины, поэтому при склейке тайлов препятствия не
+    дублируются. Строится CalmRouteService по данным PolygonLoader и
+    пересобирается при смене версий слоёв.
+    """
+
+    def __init__(self, tile_size_deg: float):
+        self.tile_size_deg = tile_size_deg
+        self.layers: List[str] = []
+        self.layer_versions: Optional[Dict[str, int]] = None
+        self._tiles: Dict[str, Dict[Tuple[int, int], List[Tuple[Tuple[float, float, float, float], Dict]]]] = {}
+
+    def tile_of(self, lon: float, lat: float) -> Tuple[int, int]:
+        return math.floor(lon / self.tile_size_deg), math.floor(lat / self.tile_size_deg)
+
+    def group_by_tile(self, polygons: List[Dict]) -> Dict[Tuple[int, int], List[Dict]]:
+        groups = {}
+        for polygon in polygons:
+            lon, lat = polygon["coordinates"][0][:2]
+            groups.setdefault(self.tile_of(lon, lat), []).append(polygon)
+        return groups
+
+    def add(self, key: str, tile: Tuple[int, int], obstacles: List[Dict]) -> None:
+        entries = self._tiles.setdefault(key, {}).setdefault(tile, [])
+        for obstacle in obstacles:
+            lons = [point[0] for point in obstacle["coordinates"]]
+            lats = [point[1] for point in obstacle["coordinates"]]
+            entries.append(((min(lons), min(lats), max(lons), max(lats)), obstacle))
+
+    def mark_built(self, key: str) -> None:
+        self._tiles.setdefault(key, {})
+
+    def has(self, key: str) -> bool:
+        return key in self._tiles
+
+    def lookup(self, key: str, bbox: Tuple[float, float, float, float]) -> List[Dict]:
+        """Препятствия профиля, пересекающие bbox (lat_min, lon_min, lat_max, lon_max)"""
+        tiles = self._tiles.get(key)
+        if not tiles:
+            return []
+
+        lat_min, lon_min, lat_max, lon_max = bbox
+        # Полигон может выходить за свой тайл — захватываем соседние тайлы
+        x_min, y_min = self.tile_of(lon_min, lat_min)
+        x_max, y_max = self.tile_of(lon_max, lat_max)
+
+        obstacles = []
+        for x in range(x_min - 1, x_max + 2):
+            for y in range(y_min - 1, y_max + 2):
+                for bounds, obstacle in tiles.get((x, y), []):
+                    if bounds[0] <= lon_max and bounds[2] >= lon_min and bounds[1] <= lat_max and bounds[3] >= lat_min:
+                        obstacles.append(obstacle)
+        return obstacles
+
+    def obstacle_count(self) -> int:
+        return sum(len(entries) for tiles in self._tiles.values() for entries in tiles.values())
@@ -0,0 +1,146 @@
+import math
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_text(text: str) -> str:
+    """Нижний регистр, ё → е, пунктуация → пробел"""
+    return _NON_WORD.sub(" ", text.lower().replace("ё", "е")).strip()
+
+
+def _stem(token: str) -> str:
+    # Грубо отрезаем окончание: «аптеки» найдёт «аптека», «музеи» — «музей»
+    if len(token) >= 6:
+        return token[:-2]
+    if len(token) == 5:
+        return token[:-1]
+    return token
+
+
+def _word_trigrams(token: str) -> Set[str]:
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _prefix_trigrams(stem: str) -> Set[str]:
+    padded = f" {stem}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LocalPlaceIndex:
+    """Индекс мест, уже полученных от 2GIS.
+
+    Пространственная часть — сетка ячеек cell_size_deg, текстовая —
+    триграммы нормализованных слов названия и рубрик. Слово запроса
+    совпадает, если с его основы начинается какое-то слово места.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.01):
+        self.cell_size_deg = cell_size_deg
+        self.places: Dict[str, Dict[str, Any]] = {}
+        self.seen_after = ""
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._tokens: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def add(self, place: Dict[str, Any]) -> bool:
+        """Добавить или обновить место; False — если такое место уже есть"""
+        place_id = place["id"]
+        existing = self.places.get(place_id)
+        if existing and all(existing.get(key) == place.get(key) for key in ("name", "latitude", "longitude", "rubrics")):
+            return False
+        if existing:
+            self._remove(place_id)
+
+        self.places[place_id] = place
+        self._cells.setdefault(self._cell_of(place["latitude"], place["longitude"]), set()).add(place_id)
+
+        tokens = normalize_text(" ".join([place.get("name", "")] + self._rubric_names(place))).split()
+        self._tokens[place_id] = tokens
+        for token in tokens:
+            for trigram in _word_trigrams(token):
+                self._trigrams.setdefault(trigram, set()).add(place_id)
+        return True
+
+    def search(self, query: str, lat: float, lon: float, radius_km: float, limit: int) -> List[Dict[str, Any]]:
+        """Места в радиусе, подходящие под запрос, от ближних к дальним"""
+        stems = [_stem(token) for token in normalize_text(query).split()]
+
+        if stems:
+            candidates = self._text_candidates(stems)
+        else:
+            candidates = self._cell_candidates(lat, lon, radius_km)
+
+        lon_scale = math.cos(math.radians(lat))
+        found = []
+        for place_id in candidates:
+            place = self.places[place_id]
+            distance_km = 111.0 * math.hypot(place["latitude"] - lat, (place["longitude"] - lon) * lon_scale)
+            if distance_km > radius_km:
+                continue
+            tokens = self._tokens[place_id]
+            if all(any(token.startswith(stem) for token in tokens) for stem in stems):
+                found.append((distance_km, place_id))
+
+        found.sort()
+        return [self.places[place_id] for _, place_id in found[:limit]]
+
+    def _text_candidates(self, stems: List[str]) -> Set[str]:
+        postings = sorted(
+            (self._trigrams.get(trigram, set()) for stem in stems for trigram in _prefix_trigrams(stem)),
+            key=len
+        )
+        if not postings or not postings[0]:
+            return set()
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def _cell_candidates(self, lat: float, lon: float, radius_km: float) -> Set[str]:
+        lat_offset = radius_km / 111.0
+        lon_offset = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        x_min, y_min = self._cell_of(lat - lat_offset, lon - lon_offset)
+        x_max, y_max = self._cell_of(lat + lat_offset, lon + lon_offset)
+
+        candidates = set()
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                candidates |= self._cells.get((x, y), set())
+        return candidates
+
+    def _remove(self, place_id: str) -> None:
+        place = self.places.pop(place_id)
+        self._cells.get(self._cell_of(place["latitude"], place["longitude"]), set()).discard(place_id)
+        for token in self._tokens.pop(place_id, []):
+            for trigram in _word_trigrams(token):
+                self._trigrams.get(trigram, set()).discard(place_id)
+
+    def _cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lon / self.cell_size_deg), math.floor(lat / self.cell_size_deg)
+
+    @staticmethod
+    def _rubric_names(place: Dict[str, Any]) -> List[str]:
+        names = []
+        for rubric in place.get("rubrics") or []:
+            names.append(rubric.get("name", "") if isinstance(rubric, dict) else str(rubric))
+        return names
+
+
+_index: Optional[LocalPlaceIndex] = None
+
+def get_place_index() -> LocalPlaceIndex:
+    global _index
+    if _index is None:
+        _index = LocalPlaceIndex(settings.PLACES_INDEX_CELL_DEG)
+    return _index
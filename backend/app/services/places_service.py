@@ -1,14 +1,27 @@
-from typing import List, Dict, Any, Tuple
+import asyncio
+import base64
+import json
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from app.core.config import settings
 from app.data.mock_data import get_mock_generator
-from app.data.places_storage import get_places_storage
+from app.data.async_places_storage import get_async_places_storage
+from app.data.places_storage import newest_reviews
 from app.services.gis_service import get_gis_service
 from app.services.accessibility_generator import get_accessibility_generator
+from app.services.rating_aggregator import get_rating_aggregator
+from app.services.place_index import get_place_index, normalize_text
+from app.services.search_cache import SearchResponseCache
+from app.services.accessibility_mask import accessibility_mask, conditions_mask, filters_mask, match_masks
 from app.schemas.places import (
     Place, 
     PlaceSearchRequest, 
     PlaceSearchResponse,
     PlaceLocation,
     Review,
+    ReviewsPage,
     AddReviewRequest,
     AccessibilityRating
 )
@@ -19,53 +32,178 @@ class PlacesService:
     def __init__(self):
         self.mock_generator = get_mock_generator()
         self.gis_service = get_gis_service()
-        self.storage = get_places_storage()
+        self.storage = get_async_places_storage()
         self.accessibility_generator = get_accessibility_generator()
+        self.rating_aggregator = get_rating_aggregator()
+        self.place_index = get_place_index()
+        self._index_loaded_at = None
+        self._upstream_refreshed_at: Dict[Tuple[str, float, float], float] = {}
+        self._refresh_tasks = set()
+        self.search_cache = SearchResponseCache(
+            settings.PLACES_SEARCH_CACHE_SIZE,
+            settings.PLACES_SEARCH_CACHE_TTL_SEC,
+            settings.PLACES_SEARCH_CACHE_TILE_DEG
+        )
+    
+    async def search_places_json(self, request: PlaceSearchRequest) -> bytes:
+        """Ответ поиска в JSON; повторный запрос из того же тайла отдаётся из кэша"""
+        key = self.search_cache.make_key(
+            request.query,
+            request.location.latitude,
+            request.location.longitude,
+            [f.value for f in request.filters]
+        )
+        payload = self.search_cache.get(key)
+        if payload is None:
+            response = await self.search_places(request)
+            payload = response.model_dump_json().encode()
+            self.search_cache.put(key, payload, [place.id for place in response.places])
+        return payload
     
     async def search_places(self, request: PlaceSearchRequest) -> PlaceSearchResponse:
         lat, lon = request.location.latitude, request.location.longitude
         bbox = self._create_bbox(lat, lon, radius_km=5.0)
         
-        gis_places = await self.gis_service.search_places(
-            query=request.query,
-            bbox=bbox,
-            limit=20
-        )
+        await self._sync_place_index()
+        local_places = self.place_index.search(request.query, lat, lon, radius_km=5.0, limit=20)
+        
+        if len(local_places) >= settings.PLACES_LOCAL_MIN_RESULTS:
+            # Отвечаем из локального индекса, 2GIS только обновляет его в фоне
+            gis_places = local_places
+            self._schedule_upstream_refresh(request.query, lat, lon, bbox)
+        else:
+            gis_places = await self._search_upstream(request.query, bbox) or local_places
         
         if not gis_places:
             print("⚠️ [PLACES] 2GIS API не вернул результатов, используем моковые данные")
             return await self._get_mock_places(request)
         
-        places = []
-        filter_values = [f.value for f in request.filters] if request.filters else []
-        for gis_place in gis_places:
-            place = await self._process_place(gis_place, filter_values)
-            if place:
-                places.append(place)
-        
+        places = await self._enrich_places(gis_places, [f.value for f in request.filters])
         return PlaceSearchResponse(places=places)
     
-    async def _process_place(self, gis_place: Dict[str, Any], filters: List[str]) -> Place:
-        place_id = gis_place["id"]
+    async def _search_upstream(self, query: str, bbox: Tuple[float, float, float, float]) -> List[Dict[str, Any]]:
+        gis_places = await self.gis_service.search_places(
+            query=query,
+            bbox=bbox,
+            limit=20
+        )
         
-        accessibility_data = self.storage.get_place_accessibility(place_id)
+        new_places = [place for place in gis_places if self.place_index.add(place)]
+        if new_places:
+            await self.storage.save_places(new_places)
+        return gis_places
+    
+    def _schedule_upstream_refresh(self, query: str, lat: float, lon: float, bbox: Tuple[float, float, float, float]) -> None:
+        key = (normalize_text(query), round(lat, 2), round(lon, 2))
+        now = time.monotonic()
+        refreshed_at = self._upstream_refreshed_at.get(key)
+        if refreshed_at is not None and now - refreshed_at < settings.PLACES_UPSTREAM_REFRESH_TTL_SEC:
+            return
+        if len(self._upstream_refreshed_at) > 10000:
+            self._upstream_refreshed_at = {
+                other: at for other, at in self._upstream_refreshed_at.items()
+                if now - at < settings.PLACES_UPSTREAM_REFRESH_TTL_SEC
+            }
+        self._upstream_refreshed_at[key] = now
         
-        if not accessibility_data:
-            print(f"✅ [PLACES] Генерируем данные о доступности для {gis_place['name']}")
-            accessibility_data = self.accessibility_generator.generate_accessibility_data(gis_place)
-            
-            self.storage.save_place_accessibility(place_id, accessibility_data)
+        task = asyncio.create_task(self._search_upstream(query, bbox))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def _sync_place_index(self) -> None:
+        """Подтянуть в индекс места, сохранённые этим и другими процессами"""
+        now = time.monotonic()
+        if self._index_loaded_at is not None and now - self._index_loaded_at < settings.PLACES_INDEX_REFRESH_SEC:
+            return
+        self._index_loaded_at = now
+        
+        places = await self.storage.get_places_seen_after(self.place_index.seen_after)
+        for place in places:
+            self.place_index.add(place)
+        if places:
+            self.place_index.seen_after = places[-1]["seen_at"]
+            print(f"✅ [PLACES] Локальный индекс: {len(self.place_index)} мест")
+    
+    async def _enrich_places(self, gis_places: List[Dict[str, Any]], filters: List[str]) -> List[Place]:
+        """Доступность и отзывы для всей выдачи: два пакетных чтения, одна пакетная запись.
+
+        Синтетическая доступность не сохраняется — она детерминирована и
+        считается на лету; в хранилище попадают только данные из отзывов.
+        """
+        place_ids = [gis_place["id"] for gis_place in gis_places]
+        stored_accessibility, review_summaries = await asyncio.gather(
+            self.storage.get_places_accessibility(place_ids),
+            self.storage.get_places_review_summaries(place_ids, settings.PLACES_TOP_REVIEWS)
+        )
         
-        reviews_data = self.storage.get_place_reviews(place_id)
-        if not reviews_data:
-            reviews_data = self._generate_reviews(gis_place["name"])
-            for review in reviews_data:
-                self.storage.add_place_review(place_id, review)
+        unrated = [gis_place for gis_place in gis_places if not stored_accessibility.get(gis_place["id"])]
+        generated = dict(zip(
+            (gis_place["id"] for gis_place in unrated),
+            self.accessibility_generator.generate_batch(unrated)
+        ))
+        accessibility = [
+            stored_accessibility.get(place_id) or generated[place_id]
+            for place_id in place_ids
+        ]
         
         if filters:
-            available_filters = {cond["filter_type"] for cond in accessibility_data["accessibility_conditions"]}
-            if not all(f in available_filters for f in filters):
-                return None
+            masks = np.array([accessibility_mask(data) for data in accessibility], dtype=np.int64)
+            matched = np.flatnonzero(match_masks(masks, filters_mask(filters)))
+        else:
+            matched = range(len(gis_places))
+        
+        new_reviews = {}
+        for i in matched:
+            gis_place = gis_places[i]
+            if not review_summaries[gis_place["id"]]["count"]:
+                new_reviews[gis_place["id"]] = self._generate_reviews(gis_place["name"])
+        
+        if new_reviews:
+            print(f"✅ [PLACES] Генерируем отзывы для {len(new_reviews)} мест")
+            # Запись заполняет id и date у новых отзывов
+            await self.storage.save_places_data({}, new_reviews)
+            for place_id, reviews_data in new_reviews.items():
+                review_summaries[place_id] = {
+                    "count": len(reviews_data),
+                    "reviews": newest_reviews(reviews_data)[:settings.PLACES_TOP_REVIEWS]
+                }
+        
+        return [
+            self._process_place(gis_places[i], accessibility[i], review_summaries[gis_places[i]["id"]])
+            for i in matched
+        ]
+    
+    async def get_reviews_page(self, place_id: str, cursor: Optional[str], limit: int) -> ReviewsPage:
+        """Страница отзывов от новых к старым; курсор — (date, id) последнего отзыва"""
+        before = self._decode_cursor(cursor) if cursor else None
+        reviews = await self.storage.get_place_reviews_page(place_id, before, limit + 1)
+        
+        next_cursor = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            next_cursor = self._encode_cursor(reviews[-1])
+        
+        return ReviewsPage(reviews=[Review(**review) for review in reviews], next_cursor=next_cursor)
+    
+    def _encode_cursor(self, review: Dict[str, Any]) -> str:
+        raw = json.dumps([review["date"], review["id"]]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    
+    def _decode_cursor(self, cursor: str) -> Tuple[str, str]:
+        try:
+            date, review_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            return str(date), str(review_id)
+        except Exception:
+            raise ValueError("Некорректный курсор")
+    
+    def _process_place(
+        self,
+        gis_place: Dict[str, Any],
+        accessibility_data: Dict[str, Any],
+        review_summary: Dict[str, Any]
+    ) -> Place:
+        place_id = gis_place["id"]
+        
         place = Place(
             id=place_id,
             name=gis_place["name"],
@@ -74,7 +212,8 @@ class PlacesService:
                 longitude=gis_place["longitude"]
             ),
             accessibility_conditions=accessibility_data["accessibility_conditions"],
-            reviews=[Review(**review) for review in reviews_data],
+            reviews=[Review(**review) for review in review_summary["reviews"]],
+            reviews_count=review_summary["count"],
             overall_rating=accessibility_data["overall_rating"]
         )
         
@@ -123,7 +262,7 @@ class PlacesService:
         
         places = []
         for mock_place in mock_places:
-            place = Place(**mock_place)
+            place = Place(**mock_place, reviews_count=len(mock_place.get("reviews", [])))
             places.append(place)
         
         return PlaceSearchResponse(places=places)
@@ -137,46 +276,56 @@ class PlacesService:
             "text": request.text
         }
         
-        success = self.storage.add_place_review(place_id, review_data)
+        success = await self.storage.add_place_review(place_id, review_data)
         
         if not success:
             return False
         
-        await self._update_accessibility_from_review(place_id, request.accessibility_ratings)
+        place = await self.storage.get_place(place_id)
+        await self._update_accessibility_from_review(place_id, place, request.accessibility_ratings)
+        self.search_cache.invalidate_place(place_id)
+        # Новые оценки могут добавить место в выдачу с фильтрами, где его не было:
+        # сбрасываем такие ответы для локаций, из которых место попадает в поиск
+        self.search_cache.invalidate_filtered(
+            self._create_bbox(place["latitude"], place["longitude"], radius_km=5.0) if place else None
+        )
         
         return True
     
-    async def _update_accessibility_from_review(self, place_id: str, ratings: List[AccessibilityRating]) -> None:
-        current_data = self.storage.get_place_accessibility(place_id)
+    async def _update_accessibility_from_review(
+        self,
+        place_id: str,
+        place: Optional[Dict[str, Any]],
+        ratings: List[AccessibilityRating]
+    ) -> None:
+        # Первый отзыв дополняет те же синтетические данные, что показывал поиск.
+        # Рубрики берём из хранилища, а не из индекса процесса: после рестарта
+        # и в другом воркере базовые оценки должны получиться теми же
+        baseline = self.accessibility_generator.generate_accessibility_data(place or {"id": place_id})
+        now = datetime.utcnow()
         
-        if not current_data:
-            all_ratings = {}
-        else:
-            all_ratings = current_data.get("all_ratings", {})
-        
-        for rating in ratings:
-            if rating.rating > 0:
-                filter_type = rating.filter_type.value
-                if filter_type not in all_ratings:
-                    all_ratings[filter_type] = []
-                all_ratings[filter_type].append(rating.rating)
-        
-        accessibility_conditions = []
-        for filter_type, rating_list in all_ratings.items():
-            if rating_list:
-                average_rating = sum(rating_list) / len(rating_list)
+        def apply_ratings(current_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            # Выполняется внутри хранилища атомарно: чтение, пересчёт и запись не разделены
+            aggregates = self.rating_aggregator.load(current_data or baseline)
+            for rating in ratings:
+                if rating.rating > 0:
+                    self.rating_aggregator.add(aggregates, rating.filter_type.value, rating.rating, now)
+            
+            accessibility_conditions = []
+            for filter_type, aggregate in aggregates.items():
                 condition = {
                     "filter_type": filter_type,
-                    "name": self.accessibility_generator._get_condition_name(filter_type),
-                    "rating": round(average_rating, 1)
+                    "name": self.accessibility_generator.get_condition_name(filter_type),
+                    "rating": round(self.rating_aggregator.average(aggregate), 1)
                 }
                 accessibility_conditions.append(condition)
+            
+            return {
+                "accessibility_conditions": accessibility_conditions,
+                "rating_aggregates": aggregates,
+                "filter_mask": conditions_mask(accessibility_conditions),
+                "overall_rating": self.accessibility_generator.calculate_overall_rating(accessibility_conditions)
+            }
         
-        new_data = {
-            "accessibility_conditions": accessibility_conditions,
-            "all_ratings": all_ratings,
-            "overall_rating": self.accessibility_generator._calculate_overall_rating(accessibility_conditions)
-        }
-        
-        self.storage.save_place_accessibility(place_id, new_data)
+        await self.storage.update_place_accessibility(place_id, apply_ratings)
     
@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+class RatingAggregator:
+    """Оценки доступности как накопительные суммы по фильтрам.
+
+    Для каждого фильтра хранится {"sum", "weight", "count", "updated_at"}:
+    новая оценка меняет только его, запись места не растёт с числом
+    отзывов. При half_life_days > 0 старые оценки затухают — перед
+    добавлением sum и weight умножаются на 0.5 ** (прошло дней / half_life).
+    """
+
+    def __init__(self, half_life_days: float = 0.0):
+        self.half_life_days = half_life_days
+
+    def load(self, accessibility_data: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Агрегаты места; старый формат со списками all_ratings переводится на лету"""
+        if not accessibility_data:
+            return {}
+        if "rating_aggregates" in accessibility_data:
+            return {key: dict(value) for key, value in accessibility_data["rating_aggregates"].items()}
+
+        updated_at = accessibility_data.get("updated_at") or datetime.utcnow().isoformat()
+        return {
+            filter_type: {
+                "sum": float(sum(ratings)),
+                "weight": float(len(ratings)),
+                "count": len(ratings),
+                "updated_at": updated_at
+            }
+            for filter_type, ratings in accessibility_data.get("all_ratings", {}).items()
+            if ratings
+        }
+
+    def add(self, aggregates: Dict[str, Dict[str, Any]], filter_type: str, rating: float, now: datetime) -> None:
+        aggregate = aggregates.get(filter_type)
+        if aggregate is None:
+            aggregates[filter_type] = {"sum": float(rating), "weight": 1.0, "count": 1, "updated_at": now.isoformat()}
+            return
+
+        decay = self._decay(aggregate["updated_at"], now)
+        aggregate["sum"] = aggregate["sum"] * decay + rating
+        aggregate["weight"] = aggregate["weight"] * decay + 1.0
+        aggregate["count"] += 1
+        aggregate["updated_at"] = now.isoformat()
+
+    def average(self, aggregate: Dict[str, Any]) -> float:
+        return aggregate["sum"] / aggregate["weight"]
+
+    def from_ratings(self, ratings: Dict[str, float], updated_at: str) -> Dict[str, Dict[str, Any]]:
+        """Агрегаты для начальных (сгенерированных) оценок — по одной на фильтр"""
+        return {
+            filter_type: {"sum": float(rating), "weight": 1.0, "count": 1, "updated_at": updated_at}
+            for filter_type, rating in ratings.items()
+        }
+
+    def _decay(self, updated_at: str, now: datetime) -> float:
+        if self.half_life_days <= 0:
+            return 1.0
+        elapsed_days = max((now - datetime.fromisoformat(updated_at)).total_seconds(), 0.0) / 86400
+        return 0.5 ** (elapsed_days / self.half_life_days)
+
+
+_aggregator = None
+
+def get_rating_aggregator() -> RatingAggregator:
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = RatingAggregator(settings.PLACES_RATING_HALF_LIFE_DAYS)
+    return _aggregator
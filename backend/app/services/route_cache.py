@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from app.core.config import settings
+from app.data.polygon_loader import get_polygon_loader
+from app.schemas.routing import RouteProfile
+
+
+class RouteCache:
+    """LRU-кэш результатов маршрутизации по привязанным к сетке O/D и профилю.
+
+    Кэш привязан к «поколению» данных: версиям слоёв PolygonLoader и
+    текущему временному слоту толпы. При смене поколения (перезагрузка
+    слоя, новый слот) кэш очищается целиком.
+    """
+
+    def __init__(self, max_size: int, snap_decimals: int, polygon_loader=None):
+        self.max_size = max_size
+        self.snap_decimals = snap_decimals
+        self.polygon_loader = polygon_loader or get_polygon_loader()
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._generation = self._current_generation()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float],
+        profile: RouteProfile,
+        *extra: Any
+    ) -> str:
+        snapped = [round(value, self.snap_decimals) for value in (*origin, *destination)]
+        return f"{snapped}:{profile.model_dump_json()}:{':'.join(str(item) for item in extra)}"
+
+    def get(self, key: str) -> Optional[Any]:
+        self._check_generation()
+        if key not in self._entries:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def put(self, key: str, value: Any) -> None:
+        self._check_generation()
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _current_generation(self) -> Tuple:
+        versions = tuple(sorted(self.polygon_loader.layer_versions.items()))
+        crowd_bucket = int(time.time() // (settings.ROUTE_CACHE_CROWD_BUCKET_MIN * 60))
+        return versions, crowd_bucket
+
+    def _check_generation(self) -> None:
+        generation = self._current_generation()
+        if generation != self._generation:
+            if self._entries:
+                print(f"🔄 [ROUTE CACHE] Данные слоёв изменились, сбрасываем {len(self._entries)} записей")
+            self._entries.clear()
+            self._generation = generation
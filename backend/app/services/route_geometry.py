@@ -0,0 +1,82 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class ParsedRoute:
+    """Геометрия маршрута 2GIS, разобранная один раз в массив (N, 2) [lon, lat]"""
+
+    def __init__(self, coords: np.ndarray, segment_offsets: np.ndarray):
+        self.coords = coords
+        self.segment_offsets = segment_offsets
+
+        if len(coords) >= 2:
+            lat0 = math.radians(coords[:, 1].mean())
+            steps = np.diff(coords, axis=0) * np.array([111000.0 * math.cos(lat0), 111000.0])
+            self.step_lengths = np.hypot(steps[:, 0], steps[:, 1])
+        else:
+            self.step_lengths = np.empty(0)
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.coords) == 0
+
+    @property
+    def length_m(self) -> float:
+        return float(self.step_lengths.sum())
+
+    @property
+    def segment_count(self) -> int:
+        return len(self.segment_offsets) - 1
+
+    def segment(self, index: int) -> np.ndarray:
+        return self.coords[self.segment_offsets[index]:self.segment_offsets[index + 1]]
+
+    def bbox(self, padding: float = 0.1) -> Optional[Tuple[float, float, float, float]]:
+        """(lat_min, lon_min, lat_max, lon_max) с запасом padding от размера"""
+        if self.is_empty:
+            return None
+
+        lon_min, lat_min = self.coords.min(axis=0)
+        lon_max, lat_max = self.coords.max(axis=0)
+        lat_pad = (lat_max - lat_min) * padding
+        lon_pad = (lon_max - lon_min) * padding
+
+        return (
+            float(lat_min - lat_pad),
+            float(lon_min - lon_pad),
+            float(lat_max + lat_pad),
+            float(lon_max + lon_pad)
+        )
+
+    def to_list(self) -> List[List[float]]:
+        return self.coords.tolist()
+
+
+def parse_route_item(route_item: Dict) -> ParsedRoute:
+    """Разобрать все LINESTRING(...) маневров одним проходом"""
+    chunks = []
+    for maneuver in route_item.get("maneuvers", []):
+        for geom_item in maneuver.get("outcoming_path", {}).get("geometry", []):
+            selection = geom_item.get("selection", "")
+            if selection.startswith("LINESTRING(") and selection.endswith(")"):
+                chunks.append(selection[11:-1])
+
+    if not chunks:
+        return ParsedRoute(np.empty((0, 2)), np.zeros(1, dtype=np.int64))
+
+    counts = [chunk.count(",") + 1 for chunk in chunks]
+    values = np.array(" ".join(chunks).replace(",", " ").split(), dtype=np.float64)
+
+    return ParsedRoute(
+        values.reshape(-1, 2),
+        np.concatenate(([0], np.cumsum(counts)))
+    )
+
+
+def parse_route(route: Dict) -> Dict:
+    """Добавить к каждому варианту ответа 2GIS разобранную геометрию (ключ "parsed")"""
+    for route_item in route.get("result", []):
+        route_item["parsed"] = parse_route_item(route_item)
+    return route
@@ -1,5 +1,6 @@
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Optional
 import httpx
+import numpy as np
 from datetime import datetime
 
 from app.schemas.routing import (
@@ -26,39 +27,94 @@ class RoutingService:
         
         base_routes = await self._get_base_routes(request)
         
+        scored = self.score_routes_batch(
+            base_routes,
+            request.profile.priorities.model_dump(),
+            request.profile.avoid.model_dump(),
+            top_k=request.alternatives
+        )
+        
         calm_routes = []
-        for idx, base_route in enumerate(base_routes):
-            metrics, calm_score = self._evaluate_route(
-                base_route,
-                request.profile.priorities.model_dump()
-            )
-            
-            explanations = self._generate_explanations(
-                base_route,
-                request.profile.avoid.model_dump()
-            )
-            
-            warnings = self._generate_warnings(base_route)
-            
-            name = self._generate_route_name(idx, calm_score, metrics)
+        for result in scored:
+            idx = result["index"]
+            base_route = base_routes[idx]
             
             route = Route(
                 id=f"route_{idx + 1}",
-                name=name,
+                name=self._generate_route_name(idx, result["calm_score"], result["metrics"]),
                 geometry=RouteGeometry(
                     type="LineString",
                     coordinates=base_route["geometry"]["coordinates"]
                 ),
-                metrics=metrics,
-                calm_score=round(calm_score, 1),
-                explanations=explanations,
-                warnings=warnings
+                metrics=result["metrics"],
+                calm_score=round(result["calm_score"], 1),
+                explanations=self._generate_explanations(base_route, result["noisy"], result["crowded"]),
+                warnings=self._generate_warnings(base_route, result["puddles"])
             )
             calm_routes.append(route)
         
-        calm_routes.sort(key=lambda r: r.calm_score, reverse=True)
+        return calm_routes
+    
+    def score_routes_batch(
+        self,
+        routes: List[dict],
+        priorities: dict,
+        avoid_options: dict,
+        top_k: Optional[int] = None
+    ) -> List[Dict]:
+        """Метрики, calm_score и нарушения порогов всех маршрутов одним проходом, top_k лучших"""
+        segments_by_route = [self._split_route_to_segments(route) for route in routes]
+        counts = np.array([len(segments) for segments in segments_by_route], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        route_index = np.repeat(np.arange(len(routes)), counts)
+        
+        segment_metrics = [segment["metrics"] for segments in segments_by_route for segment in segments]
+        noise = np.array([metrics["noise_db"] for metrics in segment_metrics], dtype=np.float64)
+        crowd = np.array([metrics["crowd_level"] for metrics in segment_metrics], dtype=np.float64)
+        puddles = np.array([bool(metrics.get("puddles", False)) for metrics in segment_metrics], dtype=bool)
+        
+        present = counts > 0
+        per_route = np.maximum(counts, 1)
+        avg_noise = np.where(present, np.bincount(route_index, noise, len(routes)) / per_route, 60)
+        avg_crowd = np.where(present, np.bincount(route_index, crowd, len(routes)) / per_route, 2.5)
+        
+        distance_m = np.array([route.get("distance_m", 1000) for route in routes], dtype=np.float64)
+        duration_min = [route.get("duration_min", 12) for route in routes]
+        
+        noise_score = np.maximum(0, 10 - (np.round(avg_noise, 1) - 40) / 5)
+        crowd_score = 10 - (np.round(avg_crowd, 1) - 1) * 2.5
+        distance_score = np.maximum(0, 10 - (distance_m - 1000) / 100)
+        calm_scores = np.clip((
+            noise_score * priorities.get("noise", 0.5) +
+            crowd_score * priorities.get("crowd", 0.4) +
+            distance_score * priorities.get("distance", 0.1)
+        ) * 10, 0, 10)
+        
+        noise_limit = avoid_options.get("noise_above_db", 75)
+        crowd_limit = avoid_options.get("crowd_level_above", 4)
+        noisy = noise > noise_limit if noise_limit is not None else np.zeros(len(noise), dtype=bool)
+        crowded = crowd >= crowd_limit if crowd_limit is not None else np.zeros(len(crowd), dtype=bool)
+        
+        order = np.argsort(-calm_scores, kind="stable")[:top_k]
+        
+        results = []
+        for i in order.tolist():
+            segment_slice = slice(offsets[i], offsets[i + 1])
+            results.append({
+                "index": i,
+                "metrics": RouteMetrics(
+                    distance_m=int(distance_m[i]),
+                    duration_min=duration_min[i],
+                    avg_noise_db=round(float(avg_noise[i]), 1),
+                    avg_crowd=round(float(avg_crowd[i]), 1)
+                ),
+                "calm_score": float(calm_scores[i]),
+                "noisy": noisy[segment_slice],
+                "crowded": crowded[segment_slice],
+                "puddles": puddles[segment_slice]
+            })
         
-        return calm_routes[:request.alternatives]
+        return results
     
     async def _get_base_routes(
         self, 
@@ -70,102 +126,45 @@ class RoutingService:
             count=3
         )
     
-    def _evaluate_route(
-        self, 
-        route: dict,
-        priorities: dict
-    ) -> Tuple[RouteMetrics, float]:
-        segments = self._split_route_to_segments(route)
-        
-        total_noise = 0
-        total_crowd = 0
-        
-        for segment in segments:
-            total_noise += segment["metrics"]["noise_db"]
-            total_crowd += segment["metrics"]["crowd_level"]
-        
-        n = len(segments)
-        avg_noise = total_noise / n if n > 0 else 60
-        avg_crowd = total_crowd / n if n > 0 else 2.5
-        
-        distance_m = route.get("distance_m", 1000)
-        duration_min = route.get("duration_min", 12)
-        
-        metrics = RouteMetrics(
-            distance_m=distance_m,
-            duration_min=duration_min,
-            avg_noise_db=round(avg_noise, 1),
-            avg_crowd=round(avg_crowd, 1)
-        )
-        
-        calm_score = self._calculate_calm_score(
-            metrics,
-            priorities
-        )
-        
-        return metrics, calm_score
-    
-    def _calculate_calm_score(
-        self, 
-        metrics: RouteMetrics,
-        priorities: dict
-    ) -> float:
-        noise_score = max(0, 10 - (metrics.avg_noise_db - 40) / 5)
-        crowd_score = 10 - (metrics.avg_crowd - 1) * 2.5
-        
-        distance_score = max(0, 10 - (metrics.distance_m - 1000) / 100)
-        
-        calm_score = (
-            noise_score * priorities.get("noise", 0.5) +
-            crowd_score * priorities.get("crowd", 0.4) +
-            distance_score * priorities.get("distance", 0.1)
-        ) * 10
-        
-        return min(10, max(0, calm_score))
-    
     def _split_route_to_segments(self, route: dict) -> List[dict]:
         return route.get("segments", [])
     
     def _generate_explanations(
         self, 
         route: dict,
-        avoid_options: dict
+        noisy: np.ndarray,
+        crowded: np.ndarray
     ) -> List[RouteExplanation]:
         explanations = []
-        segments = route.get("segments", [])
+        segments = self._split_route_to_segments(route)
         
-        for segment in segments:
-            metrics = segment["metrics"]
+        for i in np.flatnonzero(noisy | crowded)[:3].tolist():
+            street_name = segments[i].get("street_name", "участок")
             
-            if metrics["noise_db"] > avoid_options.get("noise_above_db", 75):
+            if noisy[i]:
                 explanations.append(RouteExplanation(
-                    segment=segment.get("street_name", "участок"),
-                    reason=f"Обошли — там {int(metrics['noise_db'])} дБ"
+                    segment=street_name,
+                    reason=f"Обошли — там {int(segments[i]['metrics']['noise_db'])} дБ"
                 ))
             
-            if metrics["crowd_level"] >= avoid_options.get("crowd_level_above", 4):
+            if crowded[i]:
                 explanations.append(RouteExplanation(
-                    segment=segment.get("street_name", "участок"),
+                    segment=street_name,
                     reason="Обошли — там слишком людно"
                 ))
         
         return explanations[:3]
     
-    def _generate_warnings(self, route: dict) -> List[RouteWarning]:
-        warnings = []
-        segments = route.get("segments", [])
-        
-        for segment in segments:
-            metrics = segment["metrics"]
-            
-            if metrics.get("puddles", False):
-                coords = segment["geometry"]["coordinates"][0]
-                warnings.append(RouteWarning(
-                    location=coords,
-                    message="Возможны лужи"
-                ))
+    def _generate_warnings(self, route: dict, puddles: np.ndarray) -> List[RouteWarning]:
+        segments = self._split_route_to_segments(route)
         
-        return warnings[:5]
+        return [
+            RouteWarning(
+                location=segments[i]["geometry"]["coordinates"][0],
+                message="Возможны лужи"
+            )
+            for i in np.flatnonzero(puddles)[:5].tolist()
+        ]
     
     def _generate_route_name(
         self, 
@@ -0,0 +1,91 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from app.services.place_index import normalize_text
+
+
+class SearchResponseCache:
+    """LRU-кэш готовых JSON-ответов /places/search.
+
+    Ключ — нормализованный запрос, тайл локации и отсортированные фильтры.
+    Запись живёт ttl_sec и удаляется раньше, если изменилось любое из
+    мест ответа (новый отзыв). Отзыв может и добавить место в выдачу
+    с фильтрами — такие ответы рядом с местом удаляет invalidate_filtered.
+    Кэш свой у каждого процесса — изменения из других воркеров он видит
+    не позже чем через ttl_sec.
+    """
+
+    def __init__(self, max_size: int, ttl_sec: float, tile_deg: float):
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self.tile_deg = tile_deg
+        self._entries: "OrderedDict[str, tuple[float, bytes, List[str]]]" = OrderedDict()
+        self._keys_by_place: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, query: str, lat: float, lon: float, filters: Iterable[str]) -> str:
+        tile = (math.floor(lat / self.tile_deg), math.floor(lon / self.tile_deg))
+        return f"{normalize_text(query)}|{tile[0]},{tile[1]}|{','.join(sorted(filters))}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_sec:
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, payload: bytes, place_ids: List[str]) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic(), payload, place_ids)
+        for place_id in place_ids:
+            self._keys_by_place.setdefault(place_id, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_place(self, place_id: str) -> int:
+        """Удалить ответы, в которых есть место; вернуть их число"""
+        keys = self._keys_by_place.pop(place_id, set())
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def invalidate_filtered(self, bbox: Optional[Sequence[float]]) -> int:
+        """Удалить ответы с фильтрами, чей тайл локации пересекает bbox (None — все); вернуть их число"""
+        keys = []
+        for key in self._entries:
+            _, tile, filters = key.rsplit("|", 2)
+            if not filters:
+                continue
+            if bbox is not None:
+                lat_min, lon_min, lat_max, lon_max = bbox
+                row, col = (int(part) for part in tile.split(","))
+                if not (
+                    row * self.tile_deg <= lat_max and (row + 1) * self.tile_deg >= lat_min and
+                    col * self.tile_deg <= lon_max and (col + 1) * self.tile_deg >= lon_min
+                ):
+                    continue
+            keys.append(key)
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        _, _, place_ids = self._entries.pop(key)
+        for place_id in place_ids:
+            keys = self._keys_by_place.get(place_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_place[place_id]
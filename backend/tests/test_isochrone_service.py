@@ -0,0 +1,53 @@
+import math
+
+import numpy as np
+import shapely
+
+from app.core.config import settings
+from app.data.pedestrian_graph import PedestrianGraph
+from app.schemas.routing import RouteProfile
+from app.services.isochrone_service import IsochroneService
+
+
+LAT, LON = 55.75, 37.6
+
+
+class _Router:
+    def __init__(self, graph: PedestrianGraph):
+        self.graph = graph
+
+    def edge_violations(self, profile: RouteProfile) -> np.ndarray:
+        return np.zeros(self.graph.edge_count, dtype=bool)
+
+
+def _triangle_graph() -> PedestrianGraph:
+    # Старт S, X в 100 м к северу, Y в 100 м к востоку; X–Y ≈ 141 м
+    d_lat = 100 / 111000.0
+    d_lon = 100 / (111000.0 * math.cos(math.radians(LAT)))
+    edges = [(0, 1), (0, 2), (1, 2)]
+    return PedestrianGraph.from_edges(
+        np.array([LON, LON, LON + d_lon]),
+        np.array([LAT, LAT + d_lat, LAT]),
+        np.array([a for a, b in edges] + [b for a, b in edges]),
+        np.array([b for a, b in edges] + [a for a, b in edges])
+    )
+
+
+def test_edge_reached_from_both_ends_keeps_both_partial_segments(monkeypatch):
+    monkeypatch.setattr(settings, "ISOCHRONE_BUFFER_M", 5.0)
+    graph = _triangle_graph()
+
+    [shape] = IsochroneService(polygon_loader=object())._graph_contours(
+        _Router(graph), (LAT, LON), [150.0], RouteProfile()
+    )
+
+    # X и Y достигнуты за ~100 м, на ребро X–Y остаётся по ~50 м с каждого конца
+    x = np.array([0.0, 100.0])
+    y = np.array([100.0, 0.0])
+    near_x = x + (y - x) * 45 / 141.4
+    near_y = y + (x - y) * 45 / 141.4
+    middle = (x + y) / 2
+
+    assert shape.contains(shapely.Point(near_x))
+    assert shape.contains(shapely.Point(near_y))
+    assert not shape.contains(shapely.Point(middle))
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from app.data.async_places_storage import AsyncPlacesStorage
+from app.data.places_sqlite_storage import SqlitePlacesStorage
+from app.data.places_storage import PlacesStorage
+from app.data.places_write_buffer import PlacesWriteBuffer
+from app.schemas.places import AccessibilityFilter, AccessibilityRating, AddReviewRequest
+from app.services import places_service
+from app.services.accessibility_generator import get_accessibility_generator
+
+
+PLACE_ID = "place_1"
+REVIEWS = 40
+
+
+def _json_storage(tmp_path):
+    return PlacesStorage(str(tmp_path))
+
+
+def _sqlite_storage(tmp_path):
+    return SqlitePlacesStorage(f"sqlite:///{tmp_path / 'places.db'}")
+
+
+def _buffered_storage(tmp_path):
+    return PlacesWriteBuffer(_sqlite_storage(tmp_path), str(tmp_path / "journal.jsonl"), batch_size=7)
+
+
+@pytest.mark.parametrize("make_storage", [_json_storage, _sqlite_storage, _buffered_storage])
+def test_concurrent_reviews_are_all_counted(tmp_path, monkeypatch, make_storage):
+    storage = AsyncPlacesStorage(make_storage(tmp_path), max_workers=4)
+    monkeypatch.setattr(places_service, "get_async_places_storage", lambda: storage)
+    service = places_service.PlacesService()
+    request = AddReviewRequest(
+        place_id=PLACE_ID,
+        accessibility_ratings=[AccessibilityRating(filter_type=AccessibilityFilter.WHEELCHAIR_ACCESS, rating=5)],
+        text="Пандус у входа",
+        author="Тест",
+        overall_rating=5
+    )
+
+    async def add_reviews():
+        await asyncio.gather(*(service.add_review(request) for _ in range(REVIEWS)))
+        return await storage.get_place_accessibility(PLACE_ID)
+
+    try:
+        data = asyncio.run(add_reviews())
+    finally:
+        storage.shutdown()
+
+    baseline = get_accessibility_generator().generate_accessibility_data({"id": PLACE_ID})
+    baseline_count = baseline["rating_aggregates"].get("wheelchair_access", {}).get("count", 0)
+    assert data["rating_aggregates"]["wheelchair_access"]["count"] == REVIEWS + baseline_count
+
+
+@pytest.mark.parametrize("make_storage", [_json_storage, _sqlite_storage, _buffered_storage])
+def test_concurrent_first_sight_generates_reviews_once(tmp_path, monkeypatch, make_storage):
+    storage = AsyncPlacesStorage(make_storage(tmp_path), max_workers=4)
+    monkeypatch.setattr(places_service, "get_async_places_storage", lambda: storage)
+    service = places_service.PlacesService()
+    gis_place = {"id": PLACE_ID, "name": "Кафе", "latitude": 55.75, "longitude": 37.6, "rubrics": []}
+
+    async def search_twice():
+        await asyncio.gather(*(service._enrich_places([dict(gis_place)], []) for _ in range(2)))
+        return await storage.get_place_reviews(PLACE_ID)
+
+    try:
+        reviews = asyncio.run(search_twice())
+    finally:
+        storage.shutdown()
+
+    assert len(reviews) == 3
+
+
+def test_review_baseline_uses_rubrics_from_storage(tmp_path, monkeypatch):
+    # Место видели в выдаче, но индекс нового процесса его ещё не подтянул
+    place = {"id": PLACE_ID, "name": "Музей", "latitude": 55.75, "longitude": 37.6, "rubrics": [{"name": "Музей"}]}
+    backend = _sqlite_storage(tmp_path)
+    backend.save_places([place])
+    storage = AsyncPlacesStorage(backend)
+    monkeypatch.setattr(places_service, "get_async_places_storage", lambda: storage)
+    service = places_service.PlacesService()
+    monkeypatch.setattr(service.place_index, "places", {})
+    request = AddReviewRequest(
+        place_id=PLACE_ID,
+        accessibility_ratings=[AccessibilityRating(filter_type=AccessibilityFilter.HEARING_LOOP, rating=0)],
+        text="Без оценок",
+        author="Тест",
+        overall_rating=4
+    )
+
+    async def add_review():
+        await service.add_review(request)
+        return await storage.get_place_accessibility(PLACE_ID)
+
+    try:
+        data = asyncio.run(add_review())
+    finally:
+        storage.shutdown()
+
+    baseline = get_accessibility_generator().generate_accessibility_data(place)
+    assert data["rating_aggregates"] == baseline["rating_aggregates"]
+
+
+def test_review_drops_nearby_filtered_searches(tmp_path, monkeypatch):
+    place = {"id": PLACE_ID, "name": "Кафе", "latitude": 55.75, "longitude": 37.6, "rubrics": []}
+    backend = _sqlite_storage(tmp_path)
+    backend.save_places([place])
+    storage = AsyncPlacesStorage(backend)
+    monkeypatch.setattr(places_service, "get_async_places_storage", lambda: storage)
+    service = places_service.PlacesService()
+    cache = service.search_cache
+
+    # Ответы без места: рядом с фильтром, рядом без фильтров и с фильтром в другом городе
+    nearby_filtered = cache.make_key("кафе", 55.76, 37.61, ["wheelchair_access", "low_noise"])
+    nearby_plain = cache.make_key("кафе", 55.76, 37.61, [])
+    far_filtered = cache.make_key("кафе", 59.93, 30.31, ["wheelchair_access"])
+    for key in (nearby_filtered, nearby_plain, far_filtered):
+        cache.put(key, b"{}", ["other_place"])
+
+    request = AddReviewRequest(
+        place_id=PLACE_ID,
+        accessibility_ratings=[AccessibilityRating(filter_type=AccessibilityFilter.WHEELCHAIR_ACCESS, rating=5)],
+        text="Пандус у входа",
+        author="Тест",
+        overall_rating=5
+    )
+    try:
+        asyncio.run(service.add_review(request))
+    finally:
+        storage.shutdown()
+
+    assert cache.get(nearby_filtered) is None
+    assert cache.get(nearby_plain) is not None
+    assert cache.get(far_filtered) is not None
@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+
+import pytest
+
+from app.data.places_sqlite_storage import SqlitePlacesStorage
+from app.data.places_storage import PlacesStorage
+from app.data.places_write_buffer import PlacesWriteBuffer
+
+
+PLACE_ID = "place_1"
+
+
+def _backend(kind, tmp_path):
+    if kind == "json":
+        return PlacesStorage(str(tmp_path / "places"))
+    return SqlitePlacesStorage(f"sqlite:///{tmp_path / 'places.db'}")
+
+
+def _buffer(backend, tmp_path):
+    return PlacesWriteBuffer(backend, str(tmp_path / "journal.jsonl"), batch_size=1000)
+
+
+def _review(text):
+    return {"author": "Тест", "rating": 5, "text": text}
+
+
+def _crash_in_child(target, *args):
+    """Запустить target в дочернем процессе, который падает через os._exit посреди работы"""
+    process = multiprocessing.get_context("fork").Process(target=target, args=args)
+    process.start()
+    process.join()
+    assert process.exitcode == 1
+
+
+def _crash_mid_batch(kind, tmp_path):
+    buffer = _buffer(_backend(kind, tmp_path), tmp_path)
+    for i in range(3):
+        buffer.add_place_review(PLACE_ID, _review(f"отзыв {i}"))
+    buffer.save_place_accessibility(PLACE_ID, {"overall_rating": 4.0})
+    os._exit(1)
+
+
+def _crash_mid_flush(kind, tmp_path):
+    buffer = _buffer(_backend(kind, tmp_path), tmp_path)
+    for i in range(3):
+        buffer.add_place_review(PLACE_ID, _review(f"отзыв {i}"))
+
+    def write_batch(accessibility, reviews):
+        # Пачка уже в .flushing, новый отзыв попадает в свежий журнал
+        buffer.add_place_review(PLACE_ID, _review("во время сброса"))
+        os._exit(1)
+
+    buffer.backend.write_batch = write_batch
+    buffer.flush()
+
+
+def _crash_after_rating(kind, tmp_path):
+    buffer = _buffer(_backend(kind, tmp_path), tmp_path)
+    buffer.save_place_accessibility(PLACE_ID, {"source": "synthetic"})
+    buffer.update_place_accessibility(PLACE_ID, lambda current: {"source": "rated"})
+    os._exit(1)
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite"])
+def test_replay_after_crash_mid_batch(tmp_path, kind):
+    _crash_in_child(_crash_mid_batch, kind, tmp_path)
+
+    backend = _backend(kind, tmp_path)
+    buffer = _buffer(backend, tmp_path)
+
+    assert [review["text"] for review in backend.get_place_reviews(PLACE_ID)] == [f"отзыв {i}" for i in range(3)]
+    assert backend.get_place_accessibility(PLACE_ID)["overall_rating"] == 4.0
+    assert list(tmp_path.glob("journal.*.jsonl")) == [buffer.journal_path]
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite"])
+def test_replay_after_crash_mid_flush(tmp_path, kind):
+    _crash_in_child(_crash_mid_flush, kind, tmp_path)
+    assert len(list(tmp_path.glob("journal.*.flushing.jsonl"))) == 1
+
+    backend = _backend(kind, tmp_path)
+    buffer = _buffer(backend, tmp_path)
+
+    reviews = backend.get_place_reviews(PLACE_ID)
+    assert sorted(review["id"] for review in reviews) == [f"review_{i}" for i in range(1, 5)]
+    assert list(tmp_path.glob("journal.*.jsonl")) == [buffer.journal_path]
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite"])
+def test_replay_keeps_newer_rating_than_staged_record(tmp_path, kind):
+    _crash_in_child(_crash_after_rating, kind, tmp_path)
+
+    backend = _backend(kind, tmp_path)
+    _buffer(backend, tmp_path)
+
+    assert backend.get_place_accessibility(PLACE_ID)["source"] == "rated"
+
+
+def test_failed_flush_is_requeued_before_newer_changes(tmp_path):
+    backend = _backend("sqlite", tmp_path)
+    buffer = _buffer(backend, tmp_path)
+    write_batch = backend.write_batch
+    backend.write_batch = lambda accessibility, reviews: False
+
+    buffer.add_place_review(PLACE_ID, _review("первый"))
+    buffer.add_place_review(PLACE_ID, _review("второй"))
+    assert not buffer.flush()
+    buffer.add_place_review(PLACE_ID, _review("третий"))
+
+    assert buffer._pending_count == 3
+    assert len(buffer._read_journal_lines(buffer.journal_path)) == 3
+    assert not buffer.flushing_path.exists()
+
+    backend.write_batch = write_batch
+    assert buffer.flush()
+    assert [review["text"] for review in backend.get_place_reviews(PLACE_ID)] == ["первый", "второй", "третий"]
+    assert buffer._read_journal_lines(buffer.journal_path) == []
+
+
+def test_rating_update_unstages_accessibility(tmp_path):
+    buffer = _buffer(_backend("sqlite", tmp_path), tmp_path)
+    buffer.save_place_accessibility(PLACE_ID, {"source": "synthetic"})
+    buffer.update_place_accessibility(PLACE_ID, lambda current: {"source": current["source"] + "+rated"})
+
+    assert buffer._pending_count == 0
+    assert buffer.get_place_accessibility(PLACE_ID)["source"] == "synthetic+rated"